@@ -1,5 +1,6 @@
 """SAVIIA Integration."""
 
+import asyncio
 from pathlib import Path
 
 from homeassistant.components.frontend import async_register_built_in_panel
@@ -8,21 +9,29 @@ from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant
 from saviialib import SaviiaAPI, SaviiaAPIConfig
 
-from custom_components.saviia.const import GeneralParams
+from custom_components.saviia.const import CoordinatorParams, GeneralParams
 
+from .api_registry import get_api_registry
+from .backup_index import BackupHashIndex
+from .backup_journal import BackupJournal
+from .connection_pool import get_connection_pool
 from .coordinator import (
     LocalBackupCoordinator,
     NetcameraRatesCoordinator,
     SyncThiesDataCoordinator,
 )
+from .day_summaries import shutdown_executor
 from .libs.log_client import (
     DebugArgs,
     ErrorArgs,
+    InfoArgs,
     LogClient,
     LogClientArgs,
     LogStatus,
 )
 from .services import async_setup_services, async_unload_services
+from .thies_sync import ThiesSyncManifest
+from .upload_spool import UploadSpool, async_remove_spool
 
 CONFIG_SCHEMA = GeneralParams.CONFIG_SCHEMA
 
@@ -87,11 +96,15 @@ async def async_setup_entry(hass: HomeAssistant, config_entry: ConfigEntry) -> b
     backup_coordinator = LocalBackupCoordinator(*coordinator_parameters)
     netcamera_rates_coordinator = NetcameraRatesCoordinator(*coordinator_parameters)
 
+    coordinators = (thies_coordinator, backup_coordinator, netcamera_rates_coordinator)
     try:
-        await thies_coordinator.async_config_entry_first_refresh()
-        await backup_coordinator.async_config_entry_first_refresh()
-        await netcamera_rates_coordinator.async_config_entry_first_refresh()
-
+        setup_timings = await _async_first_refresh_coordinators(
+            coordinators,
+            thies_coordinator.spool,
+            concurrent=config_entry.data.get(
+                "concurrent_startup", CoordinatorParams.CONCURRENT_STARTUP
+            ),
+        )
     except ValueError as ve:
         logclient.error(
             ErrorArgs(
@@ -133,6 +146,10 @@ async def async_setup_entry(hass: HomeAssistant, config_entry: ConfigEntry) -> b
     hass.data[GeneralParams.DOMAIN][config_entry.entry_id][
         netcamera_rates_coordinator.name
     ] = netcamera_rates_coordinator
+    hass.data[GeneralParams.DOMAIN][config_entry.entry_id]["setup_timings"] = (
+        setup_timings
+    )
+    get_api_registry(hass).register(config_entry.entry_id, api)
     logclient.debug(
         DebugArgs(
             status=LogStatus.SUCCESSFUL,
@@ -248,7 +265,20 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
         entry, GeneralParams.PLATFORMS
     )
     if unload_ok:
-        hass.data[GeneralParams.DOMAIN].pop(entry.entry_id)
+        entry_data = hass.data[GeneralParams.DOMAIN].pop(entry.entry_id)
+        get_api_registry(hass).unregister(entry.entry_id)
+        await hass.async_add_executor_job(
+            entry_data["local_backup_coordinator"].pipeline.index.close
+        )
+        await entry_data["upload_spool"].async_stop()
+        # The connections are shared with the entries of the same servers.
+        await get_connection_pool(hass).async_release(
+            entry_data["api"].get("thies").config,
+            (api.get("thies").config for api in get_api_registry(hass).apis.values()),
+        )
+        if get_api_registry(hass).get() is None:
+            # The services stay registered, so the last entry stops the workers.
+            shutdown_executor()
 
     if not hass.data[GeneralParams.DOMAIN]:
         await async_unload_services(hass)
@@ -261,6 +291,82 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     return unload_ok
 
 
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Remove the persistent data of a config entry."""
+    logclient.method_name = "async_remove_entry"
+    await ThiesSyncManifest(hass, entry.entry_id).async_remove()
+    await BackupJournal(hass, entry.entry_id).async_remove()
+    await async_remove_spool(hass, entry.entry_id)
+    await hass.async_add_executor_job(BackupHashIndex(hass, entry.entry_id).remove)
+    logclient.debug(
+        DebugArgs(
+            status=LogStatus.SUCCESSFUL,
+            metadata={"msg": "Config entry storage removed"},
+        )
+    )
+
+
+async def _async_run_first_refreshes(coordinators: tuple, *, concurrent: bool) -> list:
+    if not concurrent:
+        return [
+            await coordinator.async_timed_first_refresh()
+            for coordinator in coordinators
+        ]
+    results = await asyncio.gather(
+        *(
+            coordinator.async_timed_first_refresh(
+                CoordinatorParams.STARTUP_DEADLINES.get(coordinator.name)
+            )
+            for coordinator in coordinators
+        ),
+        return_exceptions=True,
+    )
+    for result in results:
+        if isinstance(result, BaseException):
+            raise result
+    return list(results)
+
+
+async def _async_first_refresh_coordinators(
+    coordinators: tuple, spool: UploadSpool, *, concurrent: bool
+) -> list[dict]:
+    """
+    Run the first refresh of the coordinators and report their setup timing.
+
+    The spool is loaded first, so the refreshes skip the files it queued, and
+    only drained once they succeed. If a first refresh fails, the refreshes
+    deferred to the background by the other coordinators are cancelled and the
+    spool is stopped, as the entry will not be loaded.
+    """
+    logclient.method_name = "_async_first_refresh_coordinators"
+    if not spool.loaded:
+        await spool.async_load()
+    try:
+        setup_timings = await _async_run_first_refreshes(
+            coordinators, concurrent=concurrent
+        )
+    except BaseException:
+        for coordinator in coordinators:
+            coordinator.cancel_first_refresh()
+        await spool.async_stop()
+        raise
+    for timing in setup_timings:
+        logclient.info(
+            InfoArgs(
+                status=LogStatus.SUCCESSFUL,
+                metadata={
+                    "msg": (
+                        f"{timing['coordinator']} first refresh "
+                        f"{'deferred' if timing['deferred'] else 'completed'} "
+                        f"after {timing['elapsed']:.2f}s"
+                    )
+                },
+            )
+        )
+    await spool.async_start()
+    return setup_timings
+
+
 async def _panel_exists(hass: HomeAssistant, panel_name: str) -> bool:
     try:
         return hasattr(hass.data, "frontend_panels") and panel_name in hass.data.get(
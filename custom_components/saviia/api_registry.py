@@ -0,0 +1,42 @@
+"""Registry of the SAVIIA API instances of the config entries."""
+
+from homeassistant.core import HomeAssistant
+from saviialib import SaviiaAPI
+
+from .const import GeneralParams
+
+
+def get_api_registry(hass: HomeAssistant) -> "ApiRegistry":
+    """Return the API registry of Home Assistant, creating it if needed."""
+    if GeneralParams.API_REGISTRY_KEY not in hass.data:
+        hass.data[GeneralParams.API_REGISTRY_KEY] = ApiRegistry()
+    return hass.data[GeneralParams.API_REGISTRY_KEY]
+
+
+class ApiRegistry:
+    """
+    SAVIIA API instances keyed by config entry ID, in setup order.
+
+    Services route their calls to the API of the entry they target, or to the
+    API of the first entry set up when no entry is given.
+    """
+
+    def __init__(self) -> None:
+        self.apis: dict[str, SaviiaAPI] = {}
+
+    def register(self, entry_id: str, api: SaviiaAPI) -> None:
+        self.apis[entry_id] = api
+
+    def unregister(self, entry_id: str) -> None:
+        self.apis.pop(entry_id, None)
+
+    def get(self, entry_id: str | None = None) -> SaviiaAPI | None:
+        """
+        Return the API of a config entry.
+
+        :param entry_id: ID of the config entry. Defaults to the first one.
+        :return: The API, or None if the entry is not set up.
+        """
+        if entry_id is None:
+            return next(iter(self.apis.values()), None)
+        return self.apis.get(entry_id)
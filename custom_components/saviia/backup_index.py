@@ -0,0 +1,111 @@
+"""Content-addressed index of the files uploaded by the SAVIIA local backup."""
+
+import hashlib
+import sqlite3
+import threading
+from pathlib import Path
+
+from homeassistant.core import HomeAssistant
+
+from .const import BackupParams, StorageParams
+
+
+class BackupHashIndex:
+    """
+    SQLite index of the content already present in SharePoint.
+
+    Local files are hashed once and the digest is reused while their size and
+    mtime do not change. A file whose digest was already uploaded, under any
+    name or folder, does not need to be uploaded again. Every method is
+    blocking and must run in an executor.
+    """
+
+    def __init__(self, hass: HomeAssistant, entry_id: str) -> None:
+        self.path = Path(
+            hass.config.path(
+                ".storage", StorageParams.BACKUP_INDEX_FILE.format(entry_id=entry_id)
+            )
+        )
+        self._connection: sqlite3.Connection | None = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._connection is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._connection = sqlite3.connect(self.path, check_same_thread=False)
+            self._connection.executescript(
+                """
+                PRAGMA journal_mode=WAL;
+                CREATE TABLE IF NOT EXISTS local_files (
+                    path TEXT PRIMARY KEY,
+                    size INTEGER NOT NULL,
+                    mtime REAL NOT NULL,
+                    digest TEXT NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS remote_contents (
+                    digest TEXT PRIMARY KEY,
+                    remote_path TEXT NOT NULL
+                );
+                """
+            )
+        return self._connection
+
+    @staticmethod
+    def _hash_file(path: Path) -> str:
+        digest = hashlib.blake2b(digest_size=16)
+        with path.open("rb") as file:
+            while block := file.read(BackupParams.HASH_BLOCK_SIZE):
+                digest.update(block)
+        return digest.hexdigest()
+
+    def digest(self, path: Path, relative_path: str, size: int, mtime: float) -> str:
+        """Return the digest of a file, hashing it only when it changed."""
+        with self._lock:
+            row = (
+                self._connect()
+                .execute(
+                    "SELECT size, mtime, digest FROM local_files WHERE path = ?",
+                    (relative_path,),
+                )
+                .fetchone()
+            )
+        if row and row[0] == size and row[1] == mtime:
+            return row[2]
+        digest = self._hash_file(path)
+        with self._lock, self._connect() as connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO local_files VALUES (?, ?, ?, ?)",
+                (relative_path, size, mtime, digest),
+            )
+        return digest
+
+    def remote_path(self, digest: str) -> str | None:
+        """Return where a content was uploaded, if it was."""
+        with self._lock:
+            row = (
+                self._connect()
+                .execute(
+                    "SELECT remote_path FROM remote_contents WHERE digest = ?",
+                    (digest,),
+                )
+                .fetchone()
+            )
+        return row[0] if row else None
+
+    def record_remote(self, digest: str, remote_path: str) -> None:
+        with self._lock, self._connect() as connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO remote_contents VALUES (?, ?)",
+                (digest, remote_path),
+            )
+
+    def close(self) -> None:
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+    def remove(self) -> None:
+        self.close()
+        for suffix in ("", "-wal", "-shm"):
+            self.path.with_name(self.path.name + suffix).unlink(missing_ok=True)
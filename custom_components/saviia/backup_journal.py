@@ -0,0 +1,77 @@
+"""Persistent checkpoint journal of the SAVIIA local backup."""
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.storage import Store
+
+from .const import BackupParams, StorageParams
+
+
+class BackupJournal:
+    """
+    Checkpoints of the backup run in progress, per config entry.
+
+    It records the files already uploaded and, for the files sent in chunks,
+    the upload session and the offset of the next chunk. A backup that fails or
+    is interrupted by a restart resumes from these checkpoints. The journal is
+    cleared once a run uploads every file.
+    """
+
+    def __init__(self, hass: HomeAssistant, entry_id: str) -> None:
+        self._store: Store[dict[str, dict]] = Store(
+            hass,
+            StorageParams.STORAGE_VERSION,
+            StorageParams.BACKUP_JOURNAL_KEY.format(entry_id=entry_id),
+        )
+        self.files: dict[str, dict] = {}
+        self.sessions: dict[str, dict] = {}
+        self.loaded = False
+
+    def _data_to_save(self) -> dict[str, dict]:
+        return {"files": self.files, "sessions": self.sessions}
+
+    async def async_load(self) -> None:
+        data = await self._store.async_load() or {}
+        self.files = data.get("files", {})
+        self.sessions = data.get("sessions", {})
+        self.loaded = True
+
+    async def async_save(self) -> None:
+        await self._store.async_save(self._data_to_save())
+
+    async def async_remove(self) -> None:
+        await self._store.async_remove()
+        self.files = {}
+        self.sessions = {}
+
+    async def async_clear(self) -> None:
+        self.files = {}
+        self.sessions = {}
+        await self.async_save()
+
+    def is_uploaded(self, relative_path: str, size: int, mtime: float) -> bool:
+        return self.files.get(relative_path) == {"size": size, "mtime": mtime}
+
+    def mark_uploaded(self, relative_path: str, size: int, mtime: float) -> None:
+        self.files[relative_path] = {"size": size, "mtime": mtime}
+        self.sessions.pop(relative_path, None)
+        self._store.async_delay_save(
+            self._data_to_save, BackupParams.JOURNAL_SAVE_DELAY
+        )
+
+    def get_session(self, relative_path: str, size: int, mtime: float) -> dict | None:
+        """Return the upload session of a file, unless the file has changed."""
+        session = self.sessions.get(relative_path)
+        if session and session["size"] == size and session["mtime"] == mtime:
+            return session
+        return None
+
+    async def async_checkpoint(
+        self, relative_path: str, session: dict, offset: int
+    ) -> None:
+        """Record the offset of the next chunk to upload, right away."""
+        self.sessions[relative_path] = {**session, "offset": offset}
+        await self.async_save()
+
+    async def async_discard_session(self, relative_path: str) -> None:
+        if self.sessions.pop(relative_path, None) is not None:
+            await self.async_save()
@@ -0,0 +1,529 @@
+"""Bounded-concurrency upload pipeline for the SAVIIA local backup."""
+
+import asyncio
+import os
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from http import HTTPStatus
+from pathlib import Path
+from time import monotonic
+from typing import Any
+from uuid import uuid4
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+from saviialib.libs.sharepoint_client import (
+    SpCreateFolderArgs,
+    SpListFilesArgs,
+    SpUploadFileArgs,
+)
+
+from custom_components.saviia.helpers.sharepoint_utils import (
+    SharepointSessionError,
+    cancel_upload_session,
+    is_unreachable,
+    move_file,
+    part_file_name,
+    recycle_file,
+    upload_file_chunk,
+)
+from custom_components.saviia.libs.log_client import (
+    DebugArgs,
+    LogClient,
+    LogClientArgs,
+    LogStatus,
+    WarningArgs,
+)
+
+from .backup_index import BackupHashIndex
+from .backup_journal import BackupJournal
+from .connection_pool import get_connection_pool
+from .const import BackupParams
+from .instrumentation import StageTimings
+from .upload_spool import UploadSpool
+
+
+@dataclass
+class BackupItem:
+    """A local file waiting to be uploaded."""
+
+    relative_path: str
+    size: int
+    mtime: float
+    reset: bool = False
+
+
+@dataclass
+class BackupProgress:
+    """Progress counters of the running, or last, backup."""
+
+    files_uploaded: int = 0
+    files_skipped: int = 0
+    files_deduplicated: int = 0
+    files_failed: int = 0
+    files_spooled: int = 0
+    bytes_uploaded: int = 0
+    queue_depth: int = 0
+    started: float = field(default_factory=monotonic)
+    finished: float | None = None
+
+    def as_dict(self) -> dict[str, Any]:
+        elapsed = max((self.finished or monotonic()) - self.started, 1e-6)
+        return {
+            "files_uploaded": self.files_uploaded,
+            "files_skipped": self.files_skipped,
+            "files_deduplicated": self.files_deduplicated,
+            "files_failed": self.files_failed,
+            "files_spooled": self.files_spooled,
+            "bytes_uploaded": self.bytes_uploaded,
+            "queue_depth": self.queue_depth,
+            "files_per_second": round(self.files_uploaded / elapsed, 2),
+            "bytes_per_second": round(self.bytes_uploaded / elapsed, 2),
+        }
+
+
+def _scan_directory(path: str) -> list[tuple[str, bool, os.stat_result | None]]:
+    with os.scandir(path) as entries:
+        return [
+            (entry.name, entry.is_dir(), None if entry.is_dir() else entry.stat())
+            for entry in entries
+        ]
+
+
+def _read_chunk(path: Path, offset: int, size: int) -> bytes:
+    with path.open("rb") as file:
+        file.seek(offset)
+        return file.read(size)
+
+
+class BackupUploadPipeline:
+    """
+    Upload the local backup with a directory walker feeding a worker pool.
+
+    The walker lists one directory at a time in the executor and puts the files
+    in a bounded queue, so memory stays flat on large trees. Each worker uploads
+    one file at a time and retries it with an exponential backoff. Files bigger
+    than a chunk are uploaded in a chunked session checkpointed in the journal.
+    Once SharePoint is unreachable, the remaining files are queued in the
+    upload spool instead.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        config_entry: ConfigEntry,
+        config: Any,
+        spool: UploadSpool,
+        on_progress: Callable[[], None] | None = None,
+    ) -> None:
+        self.hass = hass
+        self.config = config
+        self.spool = spool
+        self.spool.preparers["backup"] = self._async_prepare_spooled
+        self.spool.handlers["backup"] = self._async_spooled
+        self.journal = BackupJournal(hass, config_entry.entry_id)
+        self.index = BackupHashIndex(hass, config_entry.entry_id)
+        self.local_backup_source_path = config_entry.data["local_backup_source_path"]
+        self.sharepoint_destination_path = (
+            config_entry.data["sharepoint_backup_base_url"]
+            + "/"
+            + BackupParams.LOCAL_BACKUP_NAME
+        )
+        self.concurrency = config_entry.data.get(
+            "backup_upload_concurrency", BackupParams.UPLOAD_CONCURRENCY
+        )
+        self.retries = config_entry.data.get(
+            "backup_upload_retries", BackupParams.UPLOAD_RETRIES
+        )
+        self.on_progress = on_progress
+        self.progress = BackupProgress()
+        self.timings = StageTimings()
+        self.failed_files: list[str] = []
+        # Error that showed SharePoint unreachable during the current run.
+        self.unreachable: Exception | None = None
+        self._queue: asyncio.Queue[BackupItem] = asyncio.Queue(
+            maxsize=BackupParams.QUEUE_SIZE
+        )
+        # Size of the files of each SharePoint folder, by name.
+        self._remote_files: dict[str, dict[str, int]] = {}
+        self._folder_locks: dict[str, asyncio.Lock] = {}
+        self._last_notified = 0.0
+        self.logclient = LogClient(
+            LogClientArgs(
+                client_name="logging",
+                service_name="backup_pipeline",
+                class_name="backup_upload_pipeline",
+            )
+        )
+
+    def _notify_progress(self, *, force: bool = False) -> None:
+        self.progress.queue_depth = self._queue.qsize()
+        now = monotonic()
+        if self.on_progress is None:
+            return
+        if force or now - self._last_notified >= BackupParams.PROGRESS_INTERVAL:
+            self._last_notified = now
+            self.on_progress()
+
+    async def _walk(self) -> None:
+        """Produce the files to upload, skipping the .PASS.txt folders."""
+        root = self.local_backup_source_path
+        top_entries = await self.hass.async_add_executor_job(_scan_directory, root)
+        for name, is_dir, _ in top_entries:
+            # Only the folders of the backup root are synchronised.
+            if not is_dir:
+                continue
+            # Relative paths always use "/", as SharePoint folder URLs do.
+            pending = [name]
+            reset = False
+            first = True
+            while pending:
+                relative_dir = pending.pop()
+                entries = await self.hass.async_add_executor_job(
+                    _scan_directory, f"{root}/{relative_dir}"
+                )
+                names = {entry_name for entry_name, _, _ in entries}
+                if BackupParams.PASS_FILE in names:
+                    continue
+                if first:
+                    reset = BackupParams.RESET_FILE in names
+                    first = False
+                for entry_name, entry_is_dir, stat in entries:
+                    relative_path = f"{relative_dir}/{entry_name}"
+                    if entry_is_dir:
+                        pending.append(relative_path)
+                        continue
+                    if entry_name in {BackupParams.PASS_FILE, BackupParams.RESET_FILE}:
+                        continue
+                    await self._queue.put(
+                        BackupItem(
+                            relative_path=relative_path,
+                            size=stat.st_size,
+                            mtime=stat.st_mtime,
+                            reset=reset,
+                        )
+                    )
+                    self._notify_progress()
+
+    def _spool_info(self, item: BackupItem) -> dict:
+        return {"size": item.size, "mtime": item.mtime, "reset": item.reset}
+
+    def _remote_folder(self, item: BackupItem) -> tuple[str, str]:
+        relative_folder, _, file_name = item.relative_path.rpartition("/")
+        return f"{self.sharepoint_destination_path}/{relative_folder}", file_name
+
+    async def _async_prepare_spooled(self, spooled: dict) -> None:
+        """Hash a file queued in the spool right before the spool uploads it."""
+        file_path = Path(spooled["local_path"])
+        stat = await self.hass.async_add_executor_job(file_path.stat)
+        spooled["digest"] = await self.hass.async_add_executor_job(
+            self.index.digest, file_path, spooled["key"], stat.st_size, stat.st_mtime
+        )
+
+    async def _async_spooled(self, spooled: dict) -> None:
+        """
+        Record in the index and the journal a file uploaded by the spool.
+
+        The local records come first, so a failure to clean up the stale part
+        file or the reset file never makes the file upload again.
+        """
+        relative_path = spooled["key"]
+        info = spooled["info"]
+        file_path = Path(spooled["local_path"])
+        await self.hass.async_add_executor_job(
+            self.index.record_remote,
+            spooled["digest"],
+            f"{spooled['folder_url']}/{spooled['file_name']}",
+        )
+        session = None
+        if self.journal.loaded:
+            session = self.journal.sessions.get(relative_path)
+            self.journal.mark_uploaded(relative_path, info["size"], info["mtime"])
+        if session is not None and "part_name" in session:
+            await recycle_file(
+                get_connection_pool(self.hass).sharepoint(self.config),
+                f"{spooled['folder_url']}/{session['part_name']}",
+            )
+        if info["reset"]:
+            await self.hass.async_add_executor_job(file_path.unlink)
+
+    async def _ensure_remote_folder(
+        self, client: Any, folder_url: str
+    ) -> dict[str, int]:
+        """Create a SharePoint folder once and cache the sizes of its files."""
+        lock = self._folder_locks.setdefault(folder_url, asyncio.Lock())
+        async with lock:
+            if folder_url not in self._remote_files:
+                await client.create_folder(
+                    SpCreateFolderArgs(folder_relative_url=folder_url)
+                )
+                response = await client.list_files(SpListFilesArgs(folder_url))
+                self._remote_files[folder_url] = {
+                    item["Name"]: int(item["Length"])
+                    for item in response["value"]  # type: ignore
+                }
+        return self._remote_files[folder_url]
+
+    async def _upload_in_chunks(
+        self, client: Any, item: BackupItem, folder_url: str, file_name: str
+    ) -> None:
+        """
+        Upload a file in a chunked session, resuming it from the journal.
+
+        The chunks go to a temporary part file, moved over the target once
+        complete, so an interrupted session never replaces the file in
+        SharePoint. The session is journaled before the part file is created.
+        """
+        file_path = Path(self.local_backup_source_path) / item.relative_path
+        session = self.journal.get_session(item.relative_path, item.size, item.mtime)
+        if session is None or "part_name" not in session:
+            stale = self.journal.sessions.get(item.relative_path)
+            if stale is not None and "part_name" in stale:
+                await recycle_file(client, f"{folder_url}/{stale['part_name']}")
+            upload_id = str(uuid4())
+            session = {
+                "upload_id": upload_id,
+                "part_name": part_file_name(file_name, upload_id),
+                "size": item.size,
+                "mtime": item.mtime,
+                "offset": 0,
+            }
+            await self.journal.async_checkpoint(item.relative_path, session, 0)
+        part_url = f"{folder_url}/{session['part_name']}"
+        offset = session["offset"]
+        try:
+            if offset == 0:
+                await client.upload_file(
+                    SpUploadFileArgs(
+                        folder_relative_url=folder_url, file_name=session["part_name"]
+                    )
+                )
+            while offset < item.size:
+                chunk = await self.hass.async_add_executor_job(
+                    _read_chunk, file_path, offset, BackupParams.CHUNK_SIZE
+                )
+                if not chunk:
+                    msg = f"{item.relative_path} changed during the upload"
+                    raise OSError(msg)
+                last = offset + len(chunk) >= item.size
+                offset = await upload_file_chunk(
+                    client, part_url, session["upload_id"], offset, chunk, last=last
+                )
+                self.progress.bytes_uploaded += len(chunk)
+                # Also after the last chunk, so a failed move is retried alone.
+                await self.journal.async_checkpoint(item.relative_path, session, offset)
+            await move_file(client, part_url, f"{folder_url}/{file_name}")
+        except SharepointSessionError:
+            # The session expired or was rejected, start over on the next attempt.
+            await cancel_upload_session(client, part_url, session["upload_id"])
+            await recycle_file(client, part_url)
+            await self.journal.async_discard_session(item.relative_path)
+            raise
+
+    async def _upload(self, client: Any, item: BackupItem) -> bool:
+        """Upload a file. Return False when it was already uploaded."""
+        if self.journal.is_uploaded(item.relative_path, item.size, item.mtime):
+            return False
+        folder_url, file_name = self._remote_folder(item)
+        if self.spool.contains(f"{folder_url}/{file_name}", self._spool_info(item)):
+            return False
+        file_path = Path(self.local_backup_source_path) / item.relative_path
+        resuming = (
+            self.journal.get_session(item.relative_path, item.size, item.mtime)
+            is not None
+        )
+        # Check the name before hashing. A file with the same name but another
+        # size is partial or outdated. Its content is not verified, so it is not
+        # recorded in the index.
+        if self.unreachable is None and not resuming:
+            remote_files = await self._ensure_remote_folder(client, folder_url)
+            if remote_files.get(file_name) == item.size:
+                return False
+        with self.timings.span("hashing"):
+            digest = await self.hass.async_add_executor_job(
+                self.index.digest, file_path, item.relative_path, item.size, item.mtime
+            )
+        # Empty files share the same digest, so they are never deduplicated.
+        if item.size and not resuming:
+            remote_path = await self.hass.async_add_executor_job(
+                self.index.remote_path, digest
+            )
+            if remote_path is not None:
+                self.progress.files_deduplicated += 1
+                await self._async_mark_uploaded(item, file_path)
+                return False
+        if self.unreachable is not None:
+            raise self.unreachable
+        remote_files = await self._ensure_remote_folder(client, folder_url)
+        with self.timings.span("sharepoint_upload"):
+            if item.size > BackupParams.CHUNK_SIZE:
+                await self._upload_in_chunks(client, item, folder_url, file_name)
+            else:
+                file_content = await self.hass.async_add_executor_job(
+                    file_path.read_bytes
+                )
+                await client.upload_file(
+                    SpUploadFileArgs(
+                        folder_relative_url=folder_url,
+                        file_content=file_content,
+                        file_name=file_name,
+                    )
+                )
+                self.progress.bytes_uploaded += item.size
+        remote_files[file_name] = item.size
+        await self.hass.async_add_executor_job(
+            self.index.record_remote, digest, f"{folder_url}/{file_name}"
+        )
+        await self._async_mark_uploaded(item, file_path)
+        return True
+
+    async def _async_mark_uploaded(self, item: BackupItem, file_path: Path) -> None:
+        """Journal a file whose content is in SharePoint, and reset it if asked."""
+        self.journal.mark_uploaded(item.relative_path, item.size, item.mtime)
+        if item.reset:
+            await self.hass.async_add_executor_job(file_path.unlink)
+
+    async def _upload_with_retries(self, client: Any, item: BackupItem) -> None:
+        self.logclient.method_name = "_upload_with_retries"
+        for attempt in range(self.retries + 1):
+            try:
+                uploaded = await self._upload(client, item)
+            except Exception as error:  # noqa: BLE001
+                if is_unreachable(error):
+                    self.unreachable = error
+                    self._spool(item)
+                    return
+                if attempt < self.retries:
+                    await asyncio.sleep(BackupParams.RETRY_BACKOFF * 2**attempt)
+                    continue
+                self.logclient.warning(
+                    WarningArgs(
+                        status=LogStatus.FAILED,
+                        metadata={
+                            "msg": f"{item.relative_path} could not be uploaded: {error}"
+                        },
+                    )
+                )
+                self.progress.files_failed += 1
+                self.failed_files.append(item.relative_path)
+                return
+            if uploaded:
+                self.progress.files_uploaded += 1
+            else:
+                self.progress.files_skipped += 1
+            return
+
+    def _spool(self, item: BackupItem) -> None:
+        folder_url, file_name = self._remote_folder(item)
+        self.spool.enqueue(
+            "backup",
+            item.relative_path,
+            Path(self.local_backup_source_path) / item.relative_path,
+            folder_url=folder_url,
+            file_name=file_name,
+            info=self._spool_info(item),
+        )
+        self.progress.files_spooled += 1
+
+    async def _worker(self, client: Any) -> None:
+        while True:
+            item = await self._queue.get()
+            try:
+                await self._upload_with_retries(client, item)
+            finally:
+                self._queue.task_done()
+                self._notify_progress()
+
+    async def async_execute(self) -> dict:
+        """
+        Run the backup.
+
+        :return: A response with the same shape as `upload_backup_to_sharepoint`.
+        """
+        self.logclient.method_name = "async_execute"
+        source_exists = await self.hass.async_add_executor_job(
+            os.path.isdir, self.local_backup_source_path
+        )
+        if not source_exists:
+            return {
+                "message": "Invalid local backup source path provided.",
+                "status": HTTPStatus.BAD_REQUEST.value,
+                "metadata": {
+                    "error": f"'{self.local_backup_source_path}' doesn't exist."
+                },
+            }
+        if not self.journal.loaded:
+            await self.journal.async_load()
+        self.progress = BackupProgress()
+        self.failed_files = []
+        self.unreachable = None
+        self._queue = asyncio.Queue(maxsize=BackupParams.QUEUE_SIZE)
+        self._remote_files = {}
+        self._folder_locks = {}
+        client = get_connection_pool(self.hass).sharepoint(self.config)
+        try:
+            await client.create_folder(
+                SpCreateFolderArgs(folder_relative_url=self.sharepoint_destination_path)
+            )
+        except (ConnectionError, TimeoutError) as error:
+            if not is_unreachable(error):
+                raise
+            # Walk anyway, to queue the new files in the spool.
+            self.unreachable = error
+        workers = [
+            asyncio.create_task(self._worker(client)) for _ in range(self.concurrency)
+        ]
+        try:
+            await self._walk()
+            await self._queue.join()
+        finally:
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+        if self.progress.files_uploaded:
+            self.spool.wake()
+        self.progress.finished = monotonic()
+        self._notify_progress(force=True)
+        # The sessions of the spooled files are kept, to recycle their part files.
+        if self.failed_files or self.progress.files_spooled:
+            await self.journal.async_save()
+        else:
+            await self.journal.async_clear()
+        self.logclient.debug(
+            DebugArgs(
+                status=LogStatus.SUCCESSFUL,
+                metadata={
+                    "msg": "Backup progress: %s",
+                    "args": self.progress.as_dict(),
+                },
+            )
+        )
+        data = {"new_files": self.progress.files_uploaded}
+        if self.failed_files:
+            return {
+                "message": "An error occurred during local backup",
+                "status": HTTPStatus.MULTI_STATUS.value,
+                "metadata": {
+                    "error": "Not all the files have been uploaded successfully.",
+                    "data": data,
+                },
+            }
+        if self.progress.files_spooled:
+            return {
+                "message": "Files were queued until SharePoint is reachable",
+                "status": HTTPStatus.ACCEPTED.value,
+                "metadata": {
+                    "data": {**data, "spooled_files": self.progress.files_spooled}
+                },
+            }
+        if self.progress.files_uploaded == 0:
+            return {
+                "message": "No files to upload",
+                "status": HTTPStatus.NO_CONTENT.value,
+                "metadata": {},
+            }
+        return {
+            "message": "Local backup was migrated successfully",
+            "status": HTTPStatus.OK.value,
+            "metadata": {"data": data},
+        }
@@ -0,0 +1,141 @@
+"""Cache of the netcamera rates shared by the coordinators and the services."""
+
+import asyncio
+from dataclasses import dataclass, replace
+from datetime import datetime
+from http import HTTPStatus
+
+from homeassistant.core import HomeAssistant
+from homeassistant.util import dt as dt_util
+from saviialib import SaviiaNetcameraAPI, SaviiaNetcameraConfig
+
+from custom_components.saviia.libs.log_client import (
+    DebugArgs,
+    LogClient,
+    LogClientArgs,
+    LogStatus,
+    WarningArgs,
+)
+
+from .const import NetcameraParams
+
+
+@dataclass
+class CameraRatesEntry:
+    """Camera rates computed from the forecast of an hour."""
+
+    forecast_hour: datetime
+    result: dict
+
+
+def get_camera_rates_cache(hass: HomeAssistant) -> "CameraRatesCache":
+    """Return the camera rates cache of Home Assistant, creating it if needed."""
+    if NetcameraParams.RATES_CACHE_KEY not in hass.data:
+        hass.data[NetcameraParams.RATES_CACHE_KEY] = CameraRatesCache(hass)
+    return hass.data[NetcameraParams.RATES_CACHE_KEY]
+
+
+class CameraRatesCache:
+    """
+    Camera rates keyed by rounded coordinates and forecast hour.
+
+    The rates of the current hour are served from the cache. Once the hour
+    changes, the previous rates are still served while a background task
+    fetches the new ones, so the weather backend receives at most one request
+    per location and hour. Only the first lookup of a location, or one older
+    than `MAX_STALE`, waits for the weather backend.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        self.hass = hass
+        self.entries: dict[tuple[float, float], CameraRatesEntry] = {}
+        self._refreshing: dict[tuple[float, float], asyncio.Task] = {}
+        self.logclient = LogClient(
+            LogClientArgs(
+                client_name="logging",
+                service_name="camera_rates_cache",
+                class_name="camera_rates_cache",
+            )
+        )
+
+    @staticmethod
+    def _location(latitude: float, longitude: float) -> tuple[float, float]:
+        return (
+            round(latitude, NetcameraParams.COORDINATE_DECIMALS),
+            round(longitude, NetcameraParams.COORDINATE_DECIMALS),
+        )
+
+    @staticmethod
+    def _forecast_hour() -> datetime:
+        return dt_util.utcnow().replace(minute=0, second=0, microsecond=0)
+
+    async def async_get(
+        self,
+        camera_service: SaviiaNetcameraAPI,
+        latitude: float | None = None,
+        longitude: float | None = None,
+    ) -> dict:
+        """
+        Return the camera rates of a location.
+
+        :param camera_service: Netcamera service of the SAVIIA API.
+        :param latitude: Latitude of the cameras. Defaults to the service one.
+        :param longitude: Longitude of the cameras. Defaults to the service one.
+        :return: The saviialib response of the camera rates.
+        """
+        self.logclient.method_name = "async_get"
+        if latitude is None or longitude is None:
+            latitude = camera_service.config.latitude
+            longitude = camera_service.config.longitude
+        location = self._location(latitude, longitude)
+        forecast_hour = self._forecast_hour()
+        entry = self.entries.get(location)
+        if entry is not None and entry.forecast_hour == forecast_hour:
+            return entry.result
+        task = self._refreshing.get(location)
+        if task is None:
+            task = self.hass.async_create_background_task(
+                self._async_fetch(camera_service, location, forecast_hour),
+                name=f"saviia_camera_rates_{location[0]}_{location[1]}",
+            )
+            self._refreshing[location] = task
+        if (
+            entry is not None
+            and forecast_hour - entry.forecast_hour <= NetcameraParams.MAX_STALE
+        ):
+            self.logclient.debug(
+                DebugArgs(
+                    status=LogStatus.EARLY_RETURN,
+                    metadata={"msg": f"Serving stale camera rates of {location}"},
+                )
+            )
+            return entry.result
+        return await asyncio.shield(task)
+
+    async def _async_fetch(
+        self,
+        camera_service: SaviiaNetcameraAPI,
+        location: tuple[float, float],
+        forecast_hour: datetime,
+    ) -> dict:
+        try:
+            config: SaviiaNetcameraConfig = replace(
+                camera_service.config, latitude=location[0], longitude=location[1]
+            )
+            result = await SaviiaNetcameraAPI(config).get_camera_rates()
+        finally:
+            self._refreshing.pop(location, None)
+        if result.get("status") == HTTPStatus.OK.value:
+            self.entries[location] = CameraRatesEntry(forecast_hour, result)
+        else:
+            self.logclient.method_name = "_async_fetch"
+            self.logclient.warning(
+                WarningArgs(
+                    status=LogStatus.FAILED,
+                    metadata={
+                        "msg": f"Camera rates of {location} not refreshed: "
+                        f"{result.get('message')}"
+                    },
+                )
+            )
+        return result
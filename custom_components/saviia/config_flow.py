@@ -78,6 +78,22 @@ class SaviiaConfigFlow(config_entries.ConfigFlow, domain=GeneralParams.DOMAIN):
                 # Email client notification
                 vol.Optional("email_address", default=""): cv.string,
                 vol.Optional("email_password", default=""): cv.string,
+                # Local backup upload pipeline
+                vol.Optional("backup_upload_concurrency", default=4): vol.All(
+                    int, vol.Range(min=1, max=32)
+                ),
+                vol.Optional("backup_upload_retries", default=3): vol.All(
+                    int, vol.Range(min=0, max=10)
+                ),
+                # Entry setup
+                vol.Optional("concurrent_startup", default=True): cv.boolean,
+                # Scheduled refreshes, in minutes
+                vol.Optional("thies_sync_interval", default=60): vol.All(
+                    int, vol.Range(min=0, max=10080)
+                ),
+                vol.Optional("local_backup_interval", default=1440): vol.All(
+                    int, vol.Range(min=0, max=10080)
+                ),
             }
         )
 
@@ -0,0 +1,86 @@
+"""Connections shared by the coordinators and services of every config entry."""
+
+from collections.abc import Iterable
+from typing import Any
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
+
+from custom_components.saviia.helpers.ftp_utils import ReusableFTPConnection
+from custom_components.saviia.helpers.sharepoint_utils import (
+    SharepointSession,
+    SharepointTokenCache,
+)
+
+from .const import ConnectionParams
+
+
+def get_connection_pool(hass: HomeAssistant) -> "ConnectionPool":
+    """Return the connection pool of Home Assistant, creating it if needed."""
+    if ConnectionParams.POOL_KEY not in hass.data:
+        hass.data[ConnectionParams.POOL_KEY] = ConnectionPool(hass)
+    return hass.data[ConnectionParams.POOL_KEY]
+
+
+class ConnectionPool:
+    """
+    SharePoint clients and FTP connections keyed by their credentials.
+
+    The SharePoint clients send their requests over the keep-alive HTTP
+    session of Home Assistant and share a cache of access tokens. Every FTP
+    server keeps a single control connection, reused by the listings and
+    downloads of the coordinators and services.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        self.hass = hass
+        self.tokens = SharepointTokenCache(ConnectionParams.SHAREPOINT_EXPIRY_MARGIN)
+        self.sharepoint_clients: dict[tuple, SharepointSession] = {}
+        self.ftp_connections: dict[tuple, ReusableFTPConnection] = {}
+
+    @staticmethod
+    def _sharepoint_key(config: Any) -> tuple:
+        return (
+            config.sharepoint_tenant_id,
+            config.sharepoint_tenant_name,
+            config.sharepoint_site_name,
+            config.sharepoint_client_id,
+            config.sharepoint_client_secret,
+        )
+
+    @staticmethod
+    def _ftp_key(config: Any) -> tuple:
+        return (config.ftp_host, config.ftp_port, config.ftp_user, config.ftp_password)
+
+    def sharepoint(self, config: Any) -> SharepointSession:
+        """Return the SharePoint client of the site of a configuration."""
+        key = self._sharepoint_key(config)
+        if key not in self.sharepoint_clients:
+            self.sharepoint_clients[key] = SharepointSession(
+                async_get_clientsession(self.hass), config, self.tokens
+            )
+        return self.sharepoint_clients[key]
+
+    def ftp(self, config: Any) -> ReusableFTPConnection:
+        """Return the FTP control connection of the server of a configuration."""
+        key = self._ftp_key(config)
+        if key not in self.ftp_connections:
+            self.ftp_connections[key] = ReusableFTPConnection(
+                config, ConnectionParams.FTP_IDLE_TIMEOUT, ConnectionParams.FTP_TIMEOUT
+            )
+        return self.ftp_connections[key]
+
+    async def async_release(self, config: Any, in_use: Iterable[Any]) -> None:
+        """
+        Drop the connections of a configuration no other configuration uses.
+
+        :param config: Configuration of the config entry being unloaded.
+        :param in_use: Configurations of the config entries still loaded.
+        """
+        in_use = list(in_use)
+        if self._sharepoint_key(config) not in map(self._sharepoint_key, in_use):
+            self.sharepoint_clients.pop(self._sharepoint_key(config), None)
+        if self._ftp_key(config) not in map(self._ftp_key, in_use):
+            connection = self.ftp_connections.pop(self._ftp_key(config), None)
+            if connection is not None:
+                await self.hass.async_add_executor_job(connection.close)
@@ -1,6 +1,9 @@
 """Constants variables."""
 
 import logging
+import os
+from datetime import timedelta
+from http import HTTPStatus
 
 import homeassistant.helpers.config_validation as cv
 import voluptuous as vol
@@ -24,6 +27,8 @@ class GeneralParams:
     )
     LOGGER = logging.getLogger(__package__)
     PLATFORMS = [Platform.SENSOR]
+    # hass.data key of the SAVIIA API instances, keyed by config entry ID.
+    API_REGISTRY_KEY = "saviia_api_registry"
 
 
 class ServicesParams:
@@ -47,14 +52,24 @@ class ServicesParams:
     )
 
     SERVICE_SYNC_FILES = "sync_files"
-    SERVICE_SYNC_FILES_SCHEMA = vol.Schema({})
+    SERVICE_SYNC_FILES_SCHEMA = vol.Schema(
+        {
+            vol.Optional("entry_id"): cv.string,
+            vol.Optional("full_reconciliation", default=False): cv.boolean,
+        }
+    )
 
     SERVICE_LOCAL_BACKUP = "sync_local_backup"
-    SERVICE_LOCAL_BACKUP_SCHEMA = vol.Schema({})
+    SERVICE_LOCAL_BACKUP_SCHEMA = vol.Schema(
+        {
+            vol.Optional("entry_id"): cv.string,
+        }
+    )
 
     SERVICE_GET_NETCAMERA_RATES = "get_netcamera_rates"
     SERVICE_GET_NETCAMERA_RATES_SCHEMA = vol.Schema(
         {
+            vol.Optional("entry_id"): cv.string,
             vol.Required("latitude"): cv.latitude,
             vol.Required("longitude"): cv.longitude,
         }
@@ -62,6 +77,7 @@ class ServicesParams:
     SERVICE_UPDATE_TASK = "update_task"
     SERVICE_UPDATE_TASK_SCHEMA = vol.Schema(
         {
+            vol.Optional("entry_id"): cv.string,
             vol.Required("task"): dict,
             vol.Required("completed"): bool,
         }
@@ -69,12 +85,14 @@ class ServicesParams:
     SERVICE_DELETE_TASK = "delete_task"
     SERVICE_DELETE_TASK_SCHEMA = vol.Schema(
         {
+            vol.Optional("entry_id"): cv.string,
             vol.Required("task_id"): cv.string,
         }
     )
     SERVICE_CREATE_TASK = "create_task"
     SERVICE_CREATE_TASK_SCHEMA = vol.Schema(
         {
+            vol.Optional("entry_id"): cv.string,
             vol.Required("task"): dict,
             vol.Optional("images"): list,
         }
@@ -83,12 +101,14 @@ class ServicesParams:
     SERVICE_GET_TASKS = "get_tasks"
     SERVICE_GET_TASKS_SCHEMA = vol.Schema(
         {
+            vol.Optional("entry_id"): cv.string,
             vol.Optional("params"): dict,
         }
     )
     SERVICE_GET_PENDING_TASKS = "get_pending_tasks"
     SERVICE_GET_PENDING_TASKS_SCHEMA = vol.Schema(
         {
+            vol.Optional("entry_id"): cv.string,
             vol.Optional("download"): bool,
             vol.Optional("notify"): bool,
         }
@@ -97,6 +117,7 @@ class ServicesParams:
     SERVICE_DETECT_FAILURES = "detect_failures"
     SERVICE_DETECT_FAILURES_SCHEMA = vol.Schema(
         {
+            vol.Optional("entry_id"): cv.string,
             vol.Required("local_backup_source_path"): str,
             vol.Required("n_days"): int,
             vol.Optional("db_driver"): str,
@@ -110,9 +131,186 @@ class ServicesParams:
     SERVICE_GET_CONFIG_VALUE = "get_config_value"
     SERVICE_GET_CONFIG_VALUE_SCHEMA = vol.Schema(
         {
+            vol.Optional("entry_id"): cv.string,
             vol.Required("key"): cv.string,
         }
     )
+    SERVICE_LIST_SYNCED_FILES = "list_synced_files"
+    SERVICE_LIST_SYNCED_FILES_SCHEMA = vol.Schema(
+        {
+            vol.Optional("entry_id"): cv.string,
+            vol.Optional("kind", default="new"): vol.In(["new", "failed", "processed"]),
+            vol.Optional("offset", default=0): vol.All(int, vol.Range(min=0)),
+            vol.Optional("limit", default=100): vol.All(
+                int, vol.Range(min=1, max=1000)
+            ),
+        }
+    )
+    SERVICE_GET_DIAGNOSTICS = "get_diagnostics"
+    SERVICE_GET_DIAGNOSTICS_SCHEMA = vol.Schema(
+        {
+            vol.Optional("entry_id"): cv.string,
+        }
+    )
+    SERVICE_GET_LOG_HISTORY = "get_log_history"
+    SERVICE_GET_LOG_HISTORY_SCHEMA = vol.Schema(
+        {
+            vol.Optional("level", default="info"): vol.In(
+                ["debug", "info", "warning", "error"]
+            ),
+            vol.Optional("start"): cv.datetime,
+            vol.Optional("end"): cv.datetime,
+            vol.Optional("class_name"): cv.string,
+            vol.Optional("limit", default=100): vol.All(
+                int, vol.Range(min=1, max=2000)
+            ),
+        }
+    )
+
+    # Seconds a successful result of a read-only service is reused by identical
+    # calls. Zero only shares the calls running at the same time.
+    RESULT_TTL = {
+        SERVICE_DETECT_FAILURES: 60,
+        SERVICE_GET_TASKS: 60,
+        SERVICE_GET_PENDING_TASKS: 60,
+    }
+    # Config entries refreshed at the same time by the sync and backup services.
+    ENTRY_CONCURRENCY = 3
+    # Read-only services whose cached results a task change makes stale.
+    TASK_READ_SERVICES = frozenset({SERVICE_GET_TASKS, SERVICE_GET_PENDING_TASKS})
+
+
+class CoordinatorParams:
+    """Coordinators parameters."""
+
+    # - Entry setup
+    CONCURRENT_STARTUP = True
+    # Seconds each coordinator may block the entry setup before its first
+    # refresh is deferred to the background.
+    STARTUP_DEADLINES = {
+        "thies_coordinator": 60.0,
+        "local_backup_coordinator": 30.0,
+        "netcamera_rates_coordinator": 15.0,
+    }
+
+    # - Scheduled refreshes, in minutes. Zero disables the schedule.
+    THIES_SYNC_INTERVAL = 60
+    LOCAL_BACKUP_INTERVAL = 1440
+    # Fraction of the interval added as a random delay.
+    SCHEDULE_JITTER = 0.1
+    # Minimum time between the refreshes of two heavy I/O coordinators.
+    SCHEDULE_MIN_GAP = timedelta(minutes=15)
+    # First retry delay after a failure, doubled on every consecutive failure.
+    FAILURE_BACKOFF = timedelta(minutes=5)
+    # Response statuses of a successful THIES sync or local backup run.
+    SUCCESSFUL_STATUSES = (HTTPStatus.OK, HTTPStatus.ACCEPTED, HTTPStatus.NO_CONTENT)
+    # - Instrumentation
+    # Latest spans kept per stage for the rolling percentiles.
+    TIMING_WINDOW = 100
+
+
+class ThiesSyncParams:
+    """THIES synchronization parameters."""
+
+    # Bytes of the chunks streamed from the FTP server to SharePoint, and
+    # chunks buffered between the download and the upload.
+    STREAM_CHUNK_SIZE = 1024 * 1024
+    STREAM_BUFFER_CHUNKS = 4
+
+
+class BackupParams:
+    """Local backup upload pipeline parameters."""
+
+    LOCAL_BACKUP_NAME = "saviia-local-backup"
+    PASS_FILE = ".PASS.txt"  # noqa: S105
+    RESET_FILE = ".RESET.txt"
+    UPLOAD_CONCURRENCY = 4
+    UPLOAD_RETRIES = 3
+    # Seconds to wait before the first retry, doubled on every attempt.
+    RETRY_BACKOFF = 2.0
+    QUEUE_SIZE = 256
+    # Files bigger than a chunk are sent in a resumable upload session.
+    CHUNK_SIZE = 8 * 1024 * 1024
+    HASH_BLOCK_SIZE = 1024 * 1024
+    # Seconds to batch the journal writes of the files already uploaded.
+    JOURNAL_SAVE_DELAY = 10
+    # Minimum seconds between progress notifications to the sensors.
+    PROGRESS_INTERVAL = 5.0
+
+
+class ConnectionParams:
+    """Connections shared by every config entry."""
+
+    # hass.data key of the connection pool.
+    POOL_KEY = "saviia_connection_pool"
+    # Seconds an FTP control connection stays reusable while idle, below the
+    # usual idle timeout of the servers.
+    FTP_IDLE_TIMEOUT = 240
+    FTP_TIMEOUT = 30
+    # Seconds before the expiry of a SharePoint token or form digest to renew it.
+    SHAREPOINT_EXPIRY_MARGIN = 300
+
+
+class SpoolParams:
+    """Upload spool parameters."""
+
+    # Uploads per second while the spool drains.
+    DRAIN_RATE = 2.0
+    # Delay before trying an unreachable SharePoint again, doubled on every
+    # consecutive failure up to MAX_BACKOFF.
+    BACKOFF = timedelta(minutes=1)
+    MAX_BACKOFF = timedelta(minutes=30)
+    # Attempts of an upload rejected by SharePoint before it is dropped.
+    MAX_ATTEMPTS = 5
+    CHUNK_SIZE = 8 * 1024 * 1024
+    # Seconds to batch the writes of the queued uploads.
+    SAVE_DELAY = 5
+
+
+class NetcameraParams:
+    """Netcamera rates parameters."""
+
+    # hass.data key of the camera rates cache shared by every config entry.
+    RATES_CACHE_KEY = "saviia_camera_rates_cache"
+    # Decimals kept from the coordinates, about 1 km at 2 decimals.
+    COORDINATE_DECIMALS = 2
+    # Oldest forecast served while a fresher one is fetched in the background.
+    MAX_STALE = timedelta(hours=3)
+
+
+class FailureDetectionParams:
+    """THIES failure detection parameters."""
+
+    # Worker processes decoding the daily binfiles.
+    PROCESS_POOL_SIZE = min(4, os.cpu_count() or 1)
+    # Consecutive 10-minute records with the same value flagged as a flat line.
+    FLAT_LINE_RECORDS = 36
+    # Event fired as every day is validated, so the panel renders it early.
+    PROGRESS_EVENT = "saviia_detect_failures_progress"
+    # hass.data key of the day summary store shared by every config entry.
+    SUMMARY_STORE_KEY = "saviia_day_summaries"
+    # Days a summary is kept, and seconds to batch the writes of new summaries.
+    SUMMARY_RETENTION = 60
+    SUMMARY_SAVE_DELAY = 10
+
+
+class SensorParams:
+    """Sensors parameters."""
+
+    # Files listed in the state attributes. The full lists are served by the
+    # list_synced_files service.
+    ATTRIBUTE_PREVIEW_SIZE = 10
+
+
+class StorageParams:
+    """Persistent storage parameters."""
+
+    STORAGE_VERSION = 1
+    THIES_MANIFEST_KEY = "saviia.{entry_id}.thies_manifest"
+    BACKUP_JOURNAL_KEY = "saviia.{entry_id}.backup_journal"
+    BACKUP_INDEX_FILE = "saviia.{entry_id}.backup_index.db"
+    UPLOAD_SPOOL_KEY = "saviia.{entry_id}.upload_spool"
+    DAY_SUMMARIES_KEY = "saviia.day_summaries"
 
 
 class ConfigDefaultsParams:
@@ -1,4 +1,8 @@
-from datetime import timedelta
+import asyncio
+from contextlib import AbstractAsyncContextManager, nullcontext
+from datetime import datetime, timedelta
+from pathlib import Path
+from time import monotonic
 
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant
@@ -7,7 +11,7 @@ from homeassistant.helpers.update_coordinator import (
 )
 from saviialib import SaviiaAPI
 
-from custom_components.saviia.helpers.datetime_utils import datetime_to_str, today
+from custom_components.saviia.helpers.datetime_utils import today
 from custom_components.saviia.libs.log_client import (
     DebugArgs,
     ErrorArgs,
@@ -16,7 +20,32 @@ from custom_components.saviia.libs.log_client import (
     LogStatus,
 )
 
-from .const import GeneralParams
+from .backup_pipeline import BackupUploadPipeline
+from .camera_rates_cache import get_camera_rates_cache
+from .const import CoordinatorParams, GeneralParams
+from .day_summaries import get_day_summary_store
+from .instrumentation import RunStats, StageTimings
+from .scheduler import UplinkScheduler
+from .thies_sync import (
+    THIES_BASE_FOLDER_NAME,
+    ThiesIncrementalSync,
+    ThiesSyncManifest,
+)
+from .upload_spool import UploadSpool
+
+
+def entry_diagnostics(entry_data: dict) -> dict:
+    """Return the diagnostics of the coordinators of a config entry."""
+    spool = entry_data.get("upload_spool")
+    return {
+        "setup_timings": entry_data.get("setup_timings", []),
+        "upload_spool": spool.diagnostics() if spool is not None else None,
+        "coordinators": {
+            name: coordinator.diagnostics()
+            for name, coordinator in entry_data.items()
+            if isinstance(coordinator, SaviiaBaseCoordinator)
+        },
+    }
 
 
 class SaviiaBaseCoordinator(DataUpdateCoordinator):
@@ -36,8 +65,120 @@ class SaviiaBaseCoordinator(DataUpdateCoordinator):
         )
         self.api = api
         self.config_entry = config_entry
-        self.last_update: str | None = None
+        self.last_update: datetime | None = None
         self.data: dict[str, dict] = {}
+        self.setup_timing: dict = {}
+        self.first_refresh_task: asyncio.Task | None = None
+        self.timings = StageTimings()
+        self.last_run: RunStats | None = None
+        # Regular interval of the scheduled refreshes, None when unscheduled.
+        self.schedule_interval: timedelta | None = None
+        self.failures = 0
+        self.scheduler: UplinkScheduler = hass.data[GeneralParams.DOMAIN][
+            config_entry.entry_id
+        ].setdefault("uplink_scheduler", UplinkScheduler())
+        self.spool: UploadSpool = hass.data[GeneralParams.DOMAIN][
+            config_entry.entry_id
+        ].setdefault(
+            "upload_spool",
+            UploadSpool(
+                hass, config_entry.entry_id, api.get("backup").config, self.scheduler
+            ),
+        )
+
+    def diagnostics(self) -> dict:
+        """Return the timings and schedule of the coordinator."""
+        return {
+            "last_update": (self.last_update.isoformat() if self.last_update else None),
+            "last_update_success": self.last_update_success,
+            "update_interval": (
+                self.update_interval.total_seconds() if self.update_interval else None
+            ),
+            "failures": self.failures,
+            "setup_timing": self.setup_timing,
+            "timings": self.timings.summary(),
+        }
+
+    @staticmethod
+    def _interval_from_minutes(minutes: int) -> timedelta | None:
+        return timedelta(minutes=minutes) if minutes else None
+
+    def _plan_next_refresh(self, *, success: bool) -> None:
+        """Set the update interval from the schedule, with backoff on failures."""
+        if self.schedule_interval is None:
+            return
+        if success:
+            self.failures = 0
+            delay = self.schedule_interval
+        else:
+            self.failures += 1
+            delay = UplinkScheduler.backoff(self.schedule_interval, self.failures)
+        self.update_interval = self.scheduler.plan(self.name, delay)
+
+    def _uplink_lock(self) -> AbstractAsyncContextManager:
+        """
+        Return the uplink lock, or no lock during the first refresh.
+
+        The first refreshes of the coordinators run concurrently on purpose.
+        Holding the lock would serialise them, so the later ones would spend
+        their startup deadline waiting and always be deferred.
+        """
+        if asyncio.current_task() is self.first_refresh_task:
+            return nullcontext()
+        return self.scheduler.lock
+
+    async def async_timed_first_refresh(self, deadline: float | None = None) -> dict:
+        """
+        Run the first refresh, deferring it to the background after a deadline.
+
+        When the deadline expires the refresh keeps running as a background task
+        instead of being cancelled, so the work done so far is not lost and the
+        entry setup can continue with the remaining coordinators. The task is
+        tied to the config entry, so unloading or retrying the entry cancels it.
+        It does not take the uplink lock, see `_uplink_lock`.
+
+        :param deadline: Seconds to wait before deferring. None waits forever.
+        :return: The setup timing report of the coordinator.
+        """
+        started = monotonic()
+        task = self.config_entry.async_create_background_task(
+            self.hass,
+            self.async_config_entry_first_refresh(),
+            name=f"{GeneralParams.DOMAIN}_{self.name}_first_refresh",
+        )
+        self.first_refresh_task = task
+        done, _ = await asyncio.wait({task}, timeout=deadline)
+        deferred = task not in done
+        if deferred:
+            task.add_done_callback(self._log_deferred_refresh)
+        else:
+            task.result()
+        self.setup_timing = {
+            "coordinator": self.name,
+            "deadline": deadline,
+            "deferred": deferred,
+            "elapsed": round(monotonic() - started, 3),
+        }
+        return self.setup_timing
+
+    def cancel_first_refresh(self) -> None:
+        """Cancel the first refresh if it still runs in the background."""
+        if self.first_refresh_task is not None:
+            self.first_refresh_task.cancel()
+
+    def _log_deferred_refresh(self, task: asyncio.Task) -> None:
+        if task.cancelled():
+            return
+        error = task.exception()
+        if error is None:
+            return
+        self.logclient.method_name = "async_timed_first_refresh"
+        self.logclient.error(
+            ErrorArgs(
+                status=LogStatus.ERROR,
+                metadata={"msg": f"Deferred first refresh failed: {error}"},
+            )
+        )
 
 
 class SyncThiesDataCoordinator(SaviiaBaseCoordinator):
@@ -56,6 +197,18 @@ class SyncThiesDataCoordinator(SaviiaBaseCoordinator):
         ]
         self.local_backup_path = config_entry.data["local_backup_source_path"]
         self.thies_service = api.get("thies")
+        self.manifest = ThiesSyncManifest(hass, config_entry.entry_id)
+        self.incremental_sync = ThiesIncrementalSync(
+            hass, config_entry, self.thies_service.config, self.manifest, self.spool
+        )
+        self.timings = self.incremental_sync.timings
+        # Set by the sync service to reconcile every file against SharePoint.
+        self.force_full_sync = False
+        self.schedule_interval = self._interval_from_minutes(
+            config_entry.data.get(
+                "thies_sync_interval", CoordinatorParams.THIES_SYNC_INTERVAL
+            )
+        )
         self.logclient = LogClient(
             LogClientArgs(
                 client_name="logging",
@@ -64,6 +217,19 @@ class SyncThiesDataCoordinator(SaviiaBaseCoordinator):
             )
         )
 
+    def _summarize_synced_days(self, new_files: list[str]) -> None:
+        """Update in the background the day summaries of the synced binfiles."""
+        days = {Path(file_key).stem[-8:] for file_key in new_files}
+        days = sorted(day for day in days if day.isdigit())
+        if not days:
+            return
+        self.hass.async_create_background_task(
+            get_day_summary_store(self.hass).async_update(
+                str(Path(self.local_backup_path, THIES_BASE_FOLDER_NAME)), days
+            ),
+            name=f"saviia_day_summaries_{self.config_entry.entry_id}",
+        )
+
     async def _async_update_data(self) -> dict:
         """Upload data using the SAVIIA library and get uploaded files."""
         self.logclient.method_name = "_async_update_data"
@@ -73,23 +239,51 @@ class SyncThiesDataCoordinator(SaviiaBaseCoordinator):
             )
         )
         try:
-            synced_files = await self.thies_service.update_thies_data(
-                sharepoint_folders_path=self.sharepoint_folders_path,
-                ftp_server_folders_path=self.ftp_server_folders_path,
-                local_backup_source_path=self.local_backup_path,
+            async with self._uplink_lock():
+                with self.timings.span("total"):
+                    if not self.manifest.loaded:
+                        await self.manifest.async_load()
+                    if self.force_full_sync or not self.manifest.files:
+                        synced_files = await self.incremental_sync.async_reconcile(
+                            self.thies_service
+                        )
+                        self.force_full_sync = False
+                    else:
+                        synced_files = await self.incremental_sync.async_execute()
+            # Reconciliations and saviialib errors are reported, not raised.
+            success = (
+                synced_files.get("status") in CoordinatorParams.SUCCESSFUL_STATUSES
+            )
+            self._plan_next_refresh(success=success)
+            sync_data = (synced_files.get("metadata") or {}).get("data") or {}
+            new_files = sync_data.get("new_files", [])
+            processed_files = sync_data.get("processed_files", {})
+            self.last_run = RunStats(
+                self.timings.last("total") or 0.0,
+                files_transferred=len(new_files),
+                files_failed=len(sync_data.get("failed_files", [])),
+                bytes_transferred=sum(
+                    processed_files.get(file_key, {}).get("file_size", 0)
+                    for file_key in new_files
+                ),
+                failed=not success,
             )
             self.data = synced_files
-            self.last_update = datetime_to_str(today())
+            self.last_update = today()
+            self._summarize_synced_days(new_files + sync_data.get("spooled_files", []))
             self.logclient.debug(
                 DebugArgs(
                     status=LogStatus.SUCCESSFUL,
                     metadata={
-                        "msg": f"Thies data sync completed. Data: {synced_files}"
+                        "msg": "Thies data sync completed. Data: %s",
+                        "args": synced_files,
                     },
                 )
             )
             return {"synced_files": synced_files}
         except Exception as e:
+            self._plan_next_refresh(success=False)
+            self.last_run = RunStats(self.timings.last("total") or 0.0, failed=True)
             self.logclient.error(
                 ErrorArgs(
                     status=LogStatus.ERROR,
@@ -110,6 +304,19 @@ class LocalBackupCoordinator(SaviiaBaseCoordinator):
             "sharepoint_backup_base_url"
         ]
         self.backup_service = api.get("backup")
+        self.pipeline = BackupUploadPipeline(
+            hass,
+            config_entry,
+            self.backup_service.config,
+            self.spool,
+            on_progress=self.async_update_listeners,
+        )
+        self.timings = self.pipeline.timings
+        self.schedule_interval = self._interval_from_minutes(
+            config_entry.data.get(
+                "local_backup_interval", CoordinatorParams.LOCAL_BACKUP_INTERVAL
+            )
+        )
         self.logclient = LogClient(
             LogClientArgs(
                 client_name="logging",
@@ -127,21 +334,37 @@ class LocalBackupCoordinator(SaviiaBaseCoordinator):
             )
         )
         try:
-            exported_files = await self.backup_service.upload_backup_to_sharepoint(
-                local_backup_source_path=self.local_backup_source_path,
-                sharepoint_destination_path=self.sharepoint_backup_base_url,
+            async with self._uplink_lock():
+                with self.timings.span("total"):
+                    exported_files = await self.pipeline.async_execute()
+            success = (
+                exported_files.get("status") in CoordinatorParams.SUCCESSFUL_STATUSES
+            )
+            self._plan_next_refresh(success=success)
+            progress = self.pipeline.progress
+            self.last_run = RunStats(
+                self.timings.last("total") or 0.0,
+                files_transferred=progress.files_uploaded,
+                files_failed=progress.files_failed,
+                bytes_transferred=progress.bytes_uploaded,
+                failed=not success,
             )
             self.data = exported_files
-            self.last_update = datetime_to_str(today())
+            self.last_update = today()
             self.logclient.debug(
                 DebugArgs(
                     status=LogStatus.SUCCESSFUL,
-                    metadata={"msg": f"Local backup completed. Data: {exported_files}"},
+                    metadata={
+                        "msg": "Local backup completed. Data: %s",
+                        "args": exported_files,
+                    },
                 )
             )
 
             return {"exported_files": exported_files}
         except Exception as e:
+            self._plan_next_refresh(success=False)
+            self.last_run = RunStats(self.timings.last("total") or 0.0, failed=True)
             self.logclient.error(
                 ErrorArgs(
                     status=LogStatus.ERROR,
@@ -157,8 +380,8 @@ class NetcameraRatesCoordinator(SaviiaBaseCoordinator):
     def __init__(self, hass, config_entry, api):
         super().__init__(hass, config_entry, api)
         self.name = "netcamera_rates_coordinator"
-        self.latitude = config_entry.data["latitude"]
-        self.longitude = config_entry.data["longitude"]
+        self.latitude = config_entry.data.get("latitude")
+        self.longitude = config_entry.data.get("longitude")
         self.update_interval = timedelta(minutes=10)
         self.camera_service = api.get("netcamera")
         self.logclient = LogClient(
@@ -179,14 +402,18 @@ class NetcameraRatesCoordinator(SaviiaBaseCoordinator):
             )
         )
         try:
-            netcamera_rates = await self.camera_service.get_camera_rates()
+            with self.timings.span("rates_lookup"):
+                netcamera_rates = await get_camera_rates_cache(self.hass).async_get(
+                    self.camera_service, self.latitude, self.longitude
+                )
             self.data = netcamera_rates
-            self.last_update = datetime_to_str(today())
+            self.last_update = today()
             self.logclient.debug(
                 DebugArgs(
                     status=LogStatus.SUCCESSFUL,
                     metadata={
-                        "msg": f"Netcamera rates fetching completed. Data: {netcamera_rates}"
+                        "msg": "Netcamera rates fetching completed. Data: %s",
+                        "args": netcamera_rates,
                     },
                 )
             )
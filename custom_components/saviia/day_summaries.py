@@ -0,0 +1,321 @@
+"""Daily summaries of the THIES binfiles of the local backup."""
+
+import asyncio
+import multiprocessing
+from concurrent.futures import Executor, ProcessPoolExecutor
+from dataclasses import asdict, dataclass
+from datetime import timedelta
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+import saviialib.services.thies.constants.detect_failures_constants as const
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.storage import Store
+
+from custom_components.saviia.helpers.datetime_utils import (
+    DAY_FORMAT,
+    datetime_to_str,
+    today,
+)
+from custom_components.saviia.helpers.thies_binfile import (
+    RECORD_INTERVAL,
+    RECORDS_PER_DAY,
+    THIESRecords,
+    read_binfile,
+    read_descfile,
+)
+from custom_components.saviia.libs.log_client import (
+    DebugArgs,
+    LogClient,
+    LogClientArgs,
+    LogStatus,
+    WarningArgs,
+)
+
+from .const import FailureDetectionParams, StorageParams
+
+_executor: ProcessPoolExecutor | None = None
+
+
+@dataclass
+class DaySummary:
+    """Hourly means and health checks of the THIES parameters of a day."""
+
+    # Day as "YYYY-MM-DD".
+    date: str
+    # Mean of every hour of the day, None for the hours without valid values.
+    hourly: dict[str, list[float | None]]
+    # Records, missing values, 10-minute gaps, min, max and flat-line flag.
+    health: dict[str, dict[str, Any]]
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor  # noqa: PLW0603
+    if _executor is None:
+        # Spawned workers do not inherit the threads of Home Assistant.
+        _executor = ProcessPoolExecutor(
+            max_workers=FailureDetectionParams.PROCESS_POOL_SIZE,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _executor
+
+
+def shutdown_executor() -> None:
+    """Stop the worker processes. They are started again on the next detection."""
+    global _executor  # noqa: PLW0603
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+def _longest_runs(values: np.ndarray) -> np.ndarray:
+    """Return the longest run of equal consecutive values of every column."""
+    if len(values) < 2:  # noqa: PLR2004
+        return np.full(values.shape[1], len(values))
+    same = (values[1:] == values[:-1]).astype(int)
+    steps = np.cumsum(same, axis=0)
+    # Steps counted before the latest change of value, per column.
+    resets = np.maximum.accumulate(np.where(same == 0, steps, 0), axis=0)
+    return (steps - resets).max(axis=0) + 1
+
+
+def _summarize_records(
+    records: THIESRecords, date: int, columns: list[str]
+) -> tuple[dict, dict]:
+    rows = records.dates == date
+    minutes = records.minutes[rows]
+    indexes = [records.names.index(column) for column in columns]
+    values = records.values[rows][:, indexes]
+    valid = ~np.isnan(values)
+    hours = minutes // 60
+    sums = np.zeros((24, len(columns)))
+    counts = np.zeros((24, len(columns)))
+    np.add.at(sums, hours, np.where(valid, values, 0))
+    np.add.at(counts, hours, valid)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        means = np.where(counts > 0, sums / counts, np.nan)
+    lows = np.where(valid, values, np.inf).min(axis=0, initial=np.inf)
+    highs = np.where(valid, values, -np.inf).max(axis=0, initial=-np.inf)
+    gaps = RECORDS_PER_DAY - len(np.unique(minutes // RECORD_INTERVAL))
+    flat_runs = _longest_runs(values)
+    hourly, health = {}, {}
+    for index, column in enumerate(columns):
+        hourly[column] = [
+            None if np.isnan(mean) else float(mean) for mean in means[:, index]
+        ]
+        has_values = bool(valid[:, index].any())
+        health[column] = {
+            "records": int(rows.sum()),
+            "missing": int((~valid[:, index]).sum()),
+            "gaps": int(gaps),
+            "min": float(lows[index]) if has_values else None,
+            "max": float(highs[index]) if has_values else None,
+            "flat_line": bool(
+                flat_runs[index] >= FailureDetectionParams.FLAT_LINE_RECORDS
+            ),
+        }
+    return hourly, health
+
+
+def summarize_day(root: str, day: str, columns: list[str]) -> DaySummary:
+    """
+    Decode the AVG and EXT binfiles of a day into hourly means and health checks.
+
+    Runs in a worker process, so it only takes and returns picklable values.
+    Records of other days, written around midnight, are ignored.
+
+    :param root: Path of the THIES folder of the local backup.
+    :param day: Day of the binfiles, as "YYYYMMDD".
+    :param columns: Columns kept from the binfiles.
+    :return: The summary of the day.
+    """
+    summary = DaySummary(f"{day[:4]}-{day[4:6]}-{day[6:]}", {}, {})
+    for prefix, datatype in (("AVG", "av"), ("EXT", "ex")):
+        names = read_descfile(Path(root, prefix, "DESCFILE.INI"))
+        records = read_binfile(Path(root, prefix, f"{day}.BIN"), names, datatype)
+        hourly, health = _summarize_records(
+            records, int(day), [column for column in columns if column in names]
+        )
+        summary.hourly.update(hourly)
+        summary.health.update(health)
+    missing = [
+        column
+        for column in columns
+        if column not in ("Date", "Time") and column not in summary.hourly
+    ]
+    if missing:
+        msg = f"The THIES binfiles of {day} lack the parameters {missing}"
+        raise ValueError(msg)
+    return summary
+
+
+def summary_columns() -> list[str]:
+    """Return the columns of the binfiles the failure detection validates."""
+    columns = []
+    for attr, aggr in const.COLS_TO_KEEP.items():
+        columns.append(attr)
+        if aggr != ():
+            columns.extend([f"{attr} {aggr[0]}", f"{attr} {aggr[1]}"])
+    return columns
+
+
+def _signatures(root: str, days: list[str]) -> dict[str, list[int] | None]:
+    signatures = {}
+    for day in days:
+        try:
+            signatures[day] = [
+                value
+                for prefix in ("AVG", "EXT")
+                for stat in [Path(root, prefix, f"{day}.BIN").stat()]
+                for value in (stat.st_size, stat.st_mtime_ns)
+            ]
+        except FileNotFoundError:
+            signatures[day] = None
+    return signatures
+
+
+def get_day_summary_store(hass: HomeAssistant) -> "DaySummaryStore":
+    """Return the day summary store of Home Assistant, creating it if needed."""
+    if FailureDetectionParams.SUMMARY_STORE_KEY not in hass.data:
+        hass.data[FailureDetectionParams.SUMMARY_STORE_KEY] = DaySummaryStore(hass)
+    return hass.data[FailureDetectionParams.SUMMARY_STORE_KEY]
+
+
+class DaySummaryStore:
+    """
+    Persistent summaries of the THIES binfiles, per local backup and day.
+
+    A summary is reused while the size and modification time of the AVG and
+    EXT binfiles of its day stay the same, so past days are decoded once and
+    only the binfiles of the current day, still growing, are decoded again.
+    The summaries are filled after every THIES synchronization and kept for
+    `SUMMARY_RETENTION` days.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        self.hass = hass
+        self._store: Store[dict[str, dict]] = Store(
+            hass, StorageParams.STORAGE_VERSION, StorageParams.DAY_SUMMARIES_KEY
+        )
+        # Root folder -> day -> binfile signature and summary.
+        self.roots: dict[str, dict[str, dict]] = {}
+        self.columns = summary_columns()
+        self._load_lock = asyncio.Lock()
+        self.loaded = False
+        self.logclient = LogClient(
+            LogClientArgs(
+                client_name="logging",
+                service_name="day_summaries",
+                class_name="day_summary_store",
+            )
+        )
+
+    def _data_to_save(self) -> dict[str, dict]:
+        return {"roots": self.roots}
+
+    async def async_load(self) -> None:
+        async with self._load_lock:
+            if self.loaded:
+                return
+            data = await self._store.async_load() or {}
+            self.roots = data.get("roots", {})
+            self.loaded = True
+
+    def _cached(
+        self, root: str, day: str, signature: list[int] | None
+    ) -> DaySummary | None:
+        entry = self.roots.get(root, {}).get(day)
+        if signature is None or entry is None or entry["signature"] != signature:
+            return None
+        summary = DaySummary(**entry["summary"])
+        # Summaries of other columns, from a previous release, are outdated.
+        if any(
+            column not in summary.hourly
+            for column in self.columns
+            if column not in ("Date", "Time")
+        ):
+            return None
+        return summary
+
+    def _put(
+        self, root: str, day: str, signature: list[int] | None, summary: DaySummary
+    ) -> None:
+        if signature is None:
+            return
+        days = self.roots.setdefault(root, {})
+        days[day] = {"signature": signature, "summary": asdict(summary)}
+        oldest = datetime_to_str(
+            today() - timedelta(days=FailureDetectionParams.SUMMARY_RETENTION),
+            date_format=DAY_FORMAT,
+        )
+        for expired in [stored for stored in days if stored < oldest]:
+            del days[expired]
+        self._store.async_delay_save(
+            self._data_to_save, FailureDetectionParams.SUMMARY_SAVE_DELAY
+        )
+
+    async def _async_decode(
+        self, executor: Executor | None, root: str, day: str, signature: list[int]
+    ) -> DaySummary:
+        summary = await asyncio.get_running_loop().run_in_executor(
+            executor, summarize_day, root, day, self.columns
+        )
+        self._put(root, day, signature, summary)
+        return summary
+
+    async def async_summaries(
+        self, root: str, days: list[str]
+    ) -> tuple[list[DaySummary], dict[str, asyncio.Task]]:
+        """
+        Return the summaries of some days of a THIES folder.
+
+        :param root: Path of the THIES folder of the local backup.
+        :param days: Days of the binfiles, as "YYYYMMDD".
+        :return: The stored summaries still valid, and the tasks decoding the
+            binfiles of the other days by day, stored as they finish.
+        """
+        if not self.loaded:
+            await self.async_load()
+        root = str(Path(root))
+        signatures = await self.hass.async_add_executor_job(_signatures, root, days)
+        cached, pending = [], []
+        for day in days:
+            summary = self._cached(root, day, signatures[day])
+            if summary is None:
+                pending.append(day)
+            else:
+                cached.append(summary)
+        # A single day is decoded sooner by a thread than by waking the workers.
+        executor = _get_executor() if len(pending) > 1 else None
+        decoding = {
+            day: asyncio.ensure_future(
+                self._async_decode(executor, root, day, signatures[day])
+            )
+            for day in pending
+        }
+        self.logclient.method_name = "async_summaries"
+        self.logclient.debug(
+            DebugArgs(
+                status=LogStatus.STARTED,
+                metadata={
+                    "msg": "Stored summaries: %s. Days to decode: %s",
+                    "args": (len(cached), pending),
+                },
+            )
+        )
+        return cached, decoding
+
+    async def async_update(self, root: str, days: list[str]) -> None:
+        """Summarize the days whose binfiles changed, logging the failures."""
+        _, decoding = await self.async_summaries(root, days)
+        results = await asyncio.gather(*decoding.values(), return_exceptions=True)
+        errors = [str(result) for result in results if isinstance(result, Exception)]
+        if errors:
+            self.logclient.method_name = "async_update"
+            self.logclient.warning(
+                WarningArgs(
+                    status=LogStatus.FAILED,
+                    metadata={"msg": "Days not summarized: %s", "args": (errors,)},
+                )
+            )
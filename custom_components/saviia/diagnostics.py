@@ -0,0 +1,32 @@
+"""Diagnostics support for the SAVIIA integration."""
+
+from typing import Any
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .const import GeneralParams
+from .coordinator import entry_diagnostics
+
+TO_REDACT = {
+    "ftp_user",
+    "ftp_password",
+    "sharepoint_client_id",
+    "sharepoint_client_secret",
+    "sharepoint_tenant_id",
+    "bot_token",
+    "email_address",
+    "email_password",
+}
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> dict[str, Any]:
+    """Return the diagnostics of a config entry."""
+    entry_data = hass.data.get(GeneralParams.DOMAIN, {}).get(entry.entry_id, {})
+    return {
+        "config_entry": async_redact_data(dict(entry.data), TO_REDACT),
+        **entry_diagnostics(entry_data),
+    }
@@ -0,0 +1,328 @@
+"""Failure detection of the THIES sensors, validated one day at a time."""
+
+import asyncio
+from collections.abc import Callable
+from http import HTTPStatus
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+import saviialib.services.thies.constants.detect_failures_constants as const
+from saviialib import SaviiaThiesConfig
+from saviialib.db import DbClient, DbClientInitArgs
+from saviialib.libs.weather_client import (
+    ForecastArgs,
+    WeatherClient,
+    WeatherClientInitArgs,
+    WeatherQuery,
+)
+from saviialib.services.thies.use_cases.detect_failures import DetectFailuresUseCase
+from saviialib.services.thies.use_cases.types.detect_failures_types import (
+    DetectFailuresUseCaseInput,
+    DetectFailuresUseCaseOutput,
+)
+
+from custom_components.saviia.day_summaries import DaySummary, DaySummaryStore
+from custom_components.saviia.libs.log_client import (
+    DebugArgs,
+    LogClient,
+    LogClientArgs,
+    LogStatus,
+    WarningArgs,
+)
+
+
+class FailureDetection(DetectFailuresUseCase):
+    """
+    Detection of the failed THIES sensors, validated one day at a time.
+
+    The days come from the summary store, and the binfiles of the days
+    without a valid summary are decoded while the weather forecasts are
+    fetched. Each day is validated against the forecasts as soon as its
+    summary is ready, so its result is reported before the slower days
+    finish. A day whose binfiles cannot be decoded is reported as failed and
+    left out of the validation. The validation rules are the saviialib ones.
+    """
+
+    def __init__(  # noqa: PLR0913
+        self,
+        local_backup_source_path: str,
+        weather_client: WeatherClient,
+        n_days: int,
+        store: DaySummaryStore,
+        on_progress: Callable[[dict[str, Any]], None] | None = None,
+        *,
+        db_client: DbClient | None = None,
+    ) -> None:
+        super().__init__(
+            DetectFailuresUseCaseInput(
+                local_backup_source_path=local_backup_source_path,
+                db_client=db_client,
+                weather_client=weather_client,
+                n_days=n_days,
+            )
+        )
+        self.store = store
+        self.on_progress = on_progress
+        self.validated_days = 0
+        self.total_days = 0
+        # Days whose binfiles could not be decoded, with their error.
+        self.failed_days: dict[str, str] = {}
+        self.logclient = LogClient(
+            LogClientArgs(
+                client_name="logging",
+                service_name="failure_detection",
+                class_name="failure_detection",
+            )
+        )
+
+    @staticmethod
+    def _sensor_attrs() -> dict[str, list[str]]:
+        sensor_attrs = {}
+        for attr, aggr in const.COLS_TO_KEEP.items():
+            if attr in ("Date", "Time"):
+                continue
+            sensor_attrs[attr] = [attr]
+            if aggr != ():
+                sensor_attrs[attr].extend([f"{attr} {aggr[0]}", f"{attr} {aggr[1]}"])
+        return sensor_attrs
+
+    async def _forecast(self, attr: str) -> dict:
+        return await self.weather_client.forecast(
+            ForecastArgs(
+                WeatherQuery(
+                    metric=const.METRIC_TO_WEATHER_PARAM[attr], show_aggregates=True
+                ),
+                self.start_date.strftime("%Y-%m-%d"),
+                self.end_date.strftime("%Y-%m-%d"),
+            )
+        )
+
+    @staticmethod
+    def _day_failures(
+        summary: DaySummary, attrs: list[str], low: float, high: float
+    ) -> tuple[bool, bool] | None:
+        """Return whether a day is mostly out of bounds and whether it is zero."""
+        attr = attrs[0]
+        hourly = np.array(summary.hourly[attr], dtype=float)
+        # Wind direction is only bounded by its dominant value.
+        if attr == "WD":
+            hourly = np.array(summary.hourly[attrs[2]], dtype=float)
+        hourly = hourly[~np.isnan(hourly)]
+        if not hourly.size:
+            return None
+        if attr == "WD":
+            out_of_bound = hourly > high
+        else:
+            out_of_bound = (hourly < low) | (hourly > high)
+        return bool(out_of_bound.mean() > const.UMBRAL), bool((hourly == 0).all())
+
+    def _report_progress(self, date: str, result: dict[str, Any]) -> None:
+        if self.on_progress is not None:
+            self.on_progress(
+                {
+                    "date": date,
+                    "completed": self.validated_days + len(self.failed_days),
+                    "total": self.total_days,
+                    **result,
+                }
+            )
+
+    def _fail_day(self, day: str, error: Exception) -> None:
+        date = f"{day[:4]}-{day[4:6]}-{day[6:]}"
+        self.failed_days[date] = str(error)
+        self.logclient.warning(
+            WarningArgs(
+                status=LogStatus.FAILED,
+                metadata={"msg": "Day %s not validated: %s", "args": (date, error)},
+            )
+        )
+        self._report_progress(date, {"sensors": {}, "error": str(error)})
+
+    def _validate_day(
+        self,
+        summary: DaySummary,
+        sensor_attrs: dict[str, list[str]],
+        forecasts: dict[str, dict],
+        counts: dict[str, dict[str, int]],
+    ) -> None:
+        """Add the failures of a day to the counts and report its result."""
+        day_result = {}
+        for attr, attrs in sensor_attrs.items():
+            low, high = self._extract_threshold_weather_client(
+                forecasts[attr], summary.date
+            )
+            failures = self._day_failures(summary, attrs, low, high)
+            if failures is None:
+                continue
+            out_of_bound, all_zeros = failures
+            counts[attr]["out_of_bound"] += out_of_bound
+            counts[attr]["all_zeros"] += all_zeros
+            counts[attr]["days_with_failures"] += out_of_bound or all_zeros
+            health = summary.health[attr]
+            day_result[const.METRICS_TO_SENSORS[attr]] = {
+                "out_of_bound": out_of_bound,
+                "all_zeros": all_zeros,
+                "missing": health["missing"],
+                "gaps": health["gaps"],
+                "flat_line": health["flat_line"],
+            }
+        self.validated_days += 1
+        self._report_progress(summary.date, {"sensors": day_result})
+
+    async def execute(self) -> DetectFailuresUseCaseOutput:
+        self.logclient.method_name = "execute"
+        avg_files = await self.dir_client.listdir(str(Path(self.root, "AVG")))
+        days = sorted(
+            file.split(".")[0] for file in avg_files if self._file_in_range(file)
+        )
+        if not days:
+            self.logclient.debug(
+                DebugArgs(
+                    status=LogStatus.EARLY_RETURN,
+                    metadata={"msg": "No files available."},
+                )
+            )
+            return DetectFailuresUseCaseOutput({})
+        self.total_days = len(days)
+        self.logclient.debug(
+            DebugArgs(
+                status=LogStatus.STARTED,
+                metadata={"msg": "Validating %s days", "args": len(days)},
+            )
+        )
+        cached, decoding = await self.store.async_summaries(self.root, days)
+        sensor_attrs = self._sensor_attrs()
+        counts = {
+            attr: {"days_with_failures": 0, "out_of_bound": 0, "all_zeros": 0}
+            for attr in sensor_attrs
+        }
+        try:
+            forecasts = dict(
+                zip(
+                    sensor_attrs,
+                    await asyncio.gather(*map(self._forecast, sensor_attrs)),
+                    strict=True,
+                )
+            )
+            for summary in cached:
+                self._validate_day(summary, sensor_attrs, forecasts, counts)
+            days_by_task = {task: day for day, task in decoding.items()}
+            pending = set(days_by_task)
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in sorted(done, key=days_by_task.__getitem__):
+                    try:
+                        summary = task.result()
+                    except (OSError, ValueError) as error:
+                        self._fail_day(days_by_task[task], error)
+                        continue
+                    self._validate_day(summary, sensor_attrs, forecasts, counts)
+        finally:
+            # A day already decoding in a worker process keeps running until it
+            # finishes, only the days not started yet are cancelled.
+            for task in decoding.values():
+                task.cancel()
+        majority = self.validated_days // 2 + 1
+        validation = {
+            const.METRICS_TO_SENSORS[attr]: {
+                "sensor_failed": count["days_with_failures"] > majority,
+                "considered_param": attr,
+                "days_with_failures": count["days_with_failures"],
+                "days_out_of_bound": count["out_of_bound"],
+                "days_all_zeros": count["all_zeros"],
+            }
+            for attr, count in counts.items()
+        }
+        self.logclient.debug(DebugArgs(status=LogStatus.SUCCESSFUL))
+        return DetectFailuresUseCaseOutput(validation)
+
+
+def create_db_client(
+    db_driver: str = "",
+    db_host: str = "",
+    db_name: str = "",
+    user: str = "",
+    pwd: str = "",
+) -> DbClient:
+    """Return the client of the warehouse of historical data, as saviialib does."""
+    return DbClient(
+        DbClientInitArgs(
+            client_name="pyodbc_client",
+            connection_string=(
+                f"driver={db_driver};"
+                f"server={db_host};"
+                f"database={db_name};"
+                f"uid={user};"
+                f"pwd={pwd}"
+            ),
+        )
+    )
+
+
+async def async_run_detection(  # noqa: PLR0913
+    thies_config: SaviiaThiesConfig,
+    local_backup_source_path: str,
+    n_days: int,
+    store: DaySummaryStore,
+    on_progress: Callable[[dict[str, Any]], None] | None = None,
+    *,
+    db_client: DbClient | None = None,
+) -> dict:
+    """
+    Detect the failed THIES sensors of the last days of the local backup.
+
+    :param thies_config: THIES configuration, with the station coordinates.
+    :param local_backup_source_path: Path of the local backup.
+    :param n_days: Days to validate, counting back from today.
+    :param store: Summaries of the days already decoded.
+    :param on_progress: Called with the result of every day once validated.
+    :param db_client: Client of the warehouse of historical data.
+    :return: A response with the same shape as the saviialib one.
+    """
+    weather_client = WeatherClient(
+        WeatherClientInitArgs(
+            client_name="open_meteo",
+            latitude=thies_config.latitude,
+            longitude=thies_config.longitude,
+        )
+    )
+    try:
+        detection = FailureDetection(
+            local_backup_source_path,
+            weather_client,
+            n_days,
+            store,
+            on_progress,
+            db_client=db_client,
+        )
+        await weather_client.connect()
+        try:
+            output = await detection.execute()
+        finally:
+            await weather_client.close()
+    except (AttributeError, NameError, ValueError) as error:
+        return {
+            "status": HTTPStatus.BAD_REQUEST.value,
+            "message": "An unexpected error occurred during use case initialization.",
+            "metadata": {"error": str(error)},
+        }
+    except (ConnectionError, RuntimeError) as error:
+        return {
+            "status": HTTPStatus.INTERNAL_SERVER_ERROR.value,
+            "message": "The connection could not bet established.",
+            "metadata": {"error": str(error)},
+        }
+    if output.validation == {}:
+        return {
+            "status": HTTPStatus.NO_CONTENT.value,
+            "message": "The /thies folder was empty.",
+            "metadata": output.__dict__,
+        }
+    return {
+        "status": HTTPStatus.OK.value,
+        "message": "The validation was successful.",
+        "metadata": {**output.__dict__, "failed_days": detection.failed_days},
+    }
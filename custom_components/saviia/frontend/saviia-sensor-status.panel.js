@@ -12,6 +12,7 @@ const logger = createLogger("SaviiaSensorStatus");
 
 const CACHE_KEY = "saviia.sensor_status.cache.v1";
 const CACHE_INVALIDATION_EVENT = "saviia-sensor-status:invalidate-cache";
+const PROGRESS_EVENT = "saviia_detect_failures_progress";
 
 class SaviiaSensorStatusPanel extends LitElement {
     static get properties() {
@@ -21,6 +22,7 @@ class SaviiaSensorStatusPanel extends LitElement {
             isLoading: { type: Boolean },
             error: { type: String },
             lastUpdated: { type: String },
+            progress: { type: String },
         };
     }
 
@@ -67,6 +69,7 @@ class SaviiaSensorStatusPanel extends LitElement {
         this.isLoading = true;
         this.error = "";
         this.lastUpdated = "";
+        this.progress = "";
         this.tasksAPI = null;
         this._initialized = false;
         this._reloadInvalidated = false;
@@ -205,6 +208,40 @@ class SaviiaSensorStatusPanel extends LitElement {
         }));
     }
 
+    async subscribeProgress(sourcePath) {
+        // Days are reported as soon as they are validated, before the service returns.
+        this.rows = [];
+        this.progress = "";
+        const connection = this._hass?.connection;
+        if (!connection) {
+            return () => {};
+        }
+
+        const partial = {};
+        try {
+            return await connection.subscribeEvents((event) => {
+                const data = event.data || {};
+                if (data.local_backup_source_path !== sourcePath) return;
+
+                for (const [sensorName, day] of Object.entries(data.sensors || {})) {
+                    const row = partial[sensorName] ||= {
+                        days_with_failures: 0,
+                        days_out_of_bound: 0,
+                        days_all_zeros: 0,
+                    };
+                    row.days_out_of_bound += day.out_of_bound ? 1 : 0;
+                    row.days_all_zeros += day.all_zeros ? 1 : 0;
+                    row.days_with_failures += day.out_of_bound || day.all_zeros ? 1 : 0;
+                }
+                this.rows = this.normalizeRows(partial);
+                this.progress = `${data.completed}/${data.total}`;
+            }, PROGRESS_EVENT);
+        } catch (error) {
+            logger.warn("Could not subscribe to the validation progress", error);
+            return () => {};
+        }
+    }
+
     async fetchSensorsStatus(forceRefresh = false) {
         this.isLoading = true;
         this.error = "";
@@ -226,7 +263,13 @@ class SaviiaSensorStatusPanel extends LitElement {
                 throw new Error("No se encontro local_backup_source_path en la configuracion.");
             }
 
-            const failedSensorsResult = await this.tasksAPI.getFailedSensors(localBackupPath, 7);
+            const unsubscribe = await this.subscribeProgress(localBackupPath);
+            let failedSensorsResult;
+            try {
+                failedSensorsResult = await this.tasksAPI.getFailedSensors(localBackupPath, 7);
+            } finally {
+                unsubscribe();
+            }
             const validation = this.extractValidationPayload(failedSensorsResult);
             const rows = this.normalizeRows(validation);
 
@@ -240,6 +283,7 @@ class SaviiaSensorStatusPanel extends LitElement {
             this.rows = [];
         } finally {
             this.isLoading = false;
+            this.progress = "";
         }
     }
 
@@ -309,9 +353,11 @@ class SaviiaSensorStatusPanel extends LitElement {
                 <p class="meta">Ultima actualizacion: ${this.formatTimestamp(this.lastUpdated)}</p>
             </section>
 
-            ${this.isLoading ? html`<div class="loading-spinner">Cargando estado de sensores...</div>` : null}
+            ${this.isLoading ? html`<div class="loading-spinner">
+                Cargando estado de sensores...${this.progress ? ` (${this.progress} dias)` : ""}
+            </div>` : null}
             ${this.error ? html`<div class="error">${this.error}</div>` : null}
-            ${!this.isLoading && !this.error ? this.renderTable() : null}
+            ${!this.error && (!this.isLoading || this.rows.length) ? this.renderTable() : null}
             <!-- Mobile-only Home button -->
             <button id="ha-home-btn" @click="${this.openHome}" aria-label="Open Home">
                 <span class="icon" aria-hidden="true">
@@ -1,8 +1,25 @@
-from datetime import datetime
+from collections.abc import Iterable
+from datetime import datetime, tzinfo
+from functools import lru_cache
 from zoneinfo import ZoneInfo
 
+DEFAULT_TIMEZONE = "America/Santiago"
+ISO_FORMAT = "%Y-%m-%dT%H:%M:%S"
+DAY_FORMAT = "%Y%m%d"
 
-def today(timezone: str = "America/Santiago") -> datetime:
+
+@lru_cache(maxsize=8)
+def get_timezone(timezone: str = DEFAULT_TIMEZONE) -> ZoneInfo:
+    """
+    Return the timezone of an IANA name, built once per name.
+
+    :param timezone: A string representing the IANA timezone name.
+    :return ZoneInfo:
+    """
+    return ZoneInfo(timezone)
+
+
+def today(timezone: str = DEFAULT_TIMEZONE) -> datetime:
     """
     Return the current date.
 
@@ -10,16 +27,55 @@ def today(timezone: str = "America/Santiago") -> datetime:
         Defaults to "America/Santiago".
     :return datetime:
     """
-    return datetime.now(tz=ZoneInfo(timezone))
+    return datetime.now(tz=get_timezone(timezone))
 
 
-def datetime_to_str(date: datetime, date_format: str = "%Y-%m-%dT%H:%M:%S") -> str:
+def datetime_to_str(date: datetime, date_format: str = ISO_FORMAT) -> str:
     """
     Convert a datetime object to a string in the specified format.
 
+    The default and the day formats skip `strftime`.
+
     :param date: The datetime object to convert.
     :param date_format: The format to convert the datetime object to.
-        Defaults to "YYYYMMDD:HHMMSS".
+        Defaults to "YYYY-MM-DDTHH:MM:SS".
     :return: A string in the specified format.
     """
+    if date_format == ISO_FORMAT:
+        return date.replace(tzinfo=None, microsecond=0).isoformat()
+    if date_format == DAY_FORMAT:
+        return f"{date.year:04d}{date.month:02d}{date.day:02d}"
     return date.strftime(date_format)
+
+
+def timestamps_to_str(
+    timestamps: Iterable[float],
+    timezone: str | tzinfo = DEFAULT_TIMEZONE,
+    date_format: str | None = ISO_FORMAT,
+) -> list[str]:
+    """
+    Convert many epoch timestamps to strings in the specified format.
+
+    Timestamps sharing the same second, as records logged together do, are
+    only formatted once.
+
+    :param timestamps: Epoch timestamps, in seconds.
+    :param timezone: An IANA timezone name, or a timezone.
+    :param date_format: The format to convert the timestamps to. None gives
+        ISO 8601 with the UTC offset.
+    :return: The formatted timestamps, in the same order.
+    """
+    tz = get_timezone(timezone) if isinstance(timezone, str) else timezone
+    formatted: dict[int, str] = {}
+    result = []
+    for timestamp in timestamps:
+        second = int(timestamp)
+        if second not in formatted:
+            date = datetime.fromtimestamp(second, tz=tz)
+            formatted[second] = (
+                date.isoformat()
+                if date_format is None
+                else datetime_to_str(date, date_format)
+            )
+        result.append(formatted[second])
+    return result
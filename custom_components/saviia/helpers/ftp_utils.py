@@ -0,0 +1,192 @@
+import ftplib
+import threading
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager, suppress
+from time import monotonic
+from typing import Any
+
+EXCLUDED_NAMES = frozenset({".", ".."})
+
+
+def connect_ftp(config: Any, timeout: float | None = None) -> ftplib.FTP:
+    """
+    Open an FTP control connection and log in.
+
+    :param config: Any object exposing ftp_host, ftp_port, ftp_user and ftp_password.
+    :param timeout: Seconds to wait for the server. Defaults to no timeout.
+    :return: The connected FTP client.
+    """
+    ftp = ftplib.FTP(timeout=timeout)  # noqa: S321
+    try:
+        ftp.connect(config.ftp_host, config.ftp_port)
+        ftp.login(config.ftp_user, config.ftp_password)
+    except OSError as error:
+        msg = (
+            f"{config.ftp_host}:{config.ftp_port} isn't active. "
+            "Please ensure the server is running and accessible."
+        )
+        raise ConnectionRefusedError(msg) from error
+    except ftplib.Error as error:
+        msg = "Authentication failed. Please verify your credentials and try again."
+        raise ConnectionAbortedError(msg) from error
+    return ftp
+
+
+class ReusableFTPConnection:
+    """
+    FTP control connection to a server, kept open between calls.
+
+    The calls hold a lock while they use the connection, so they run one at a
+    time. A connection idle for less than `idle_timeout` is probed with NOOP
+    before it is reused, and an older one is reopened, as the server has most
+    likely dropped it.
+    """
+
+    def __init__(
+        self, config: Any, idle_timeout: float, timeout: float | None = None
+    ) -> None:
+        self.config = config
+        self.idle_timeout = idle_timeout
+        self.timeout = timeout
+        self._ftp: ftplib.FTP | None = None
+        self._last_used = 0.0
+        self._lock = threading.Lock()
+
+    def _drop(self) -> None:
+        if self._ftp is not None:
+            self._ftp.close()
+            self._ftp = None
+
+    def _checkout(self) -> ftplib.FTP:
+        if self._ftp is not None:
+            if monotonic() - self._last_used > self.idle_timeout:
+                self._drop()
+            else:
+                try:
+                    self._ftp.voidcmd("NOOP")
+                except (OSError, EOFError, ftplib.Error):
+                    self._drop()
+        if self._ftp is None:
+            self._ftp = connect_ftp(self.config, self.timeout)
+        return self._ftp
+
+    @contextmanager
+    def connection(self) -> Iterator[ftplib.FTP]:
+        """
+        Use the connection, opening it if needed.
+
+        This is blocking and must run in an executor.
+        """
+        with self._lock:
+            ftp = self._checkout()
+            try:
+                yield ftp
+            except (ftplib.error_perm, FileNotFoundError):
+                # The command was refused, but the connection is still usable.
+                raise
+            except BaseException:
+                self._drop()
+                raise
+            finally:
+                self._last_used = monotonic()
+
+    def close(self) -> None:
+        """Log out and close the connection. This is blocking."""
+        with self._lock:
+            if self._ftp is None:
+                return
+            with suppress(OSError, EOFError, ftplib.Error):
+                self._ftp.quit()
+            self._drop()
+
+
+def _list_folder(ftp: ftplib.FTP, folder: str) -> dict[str, dict]:
+    try:
+        return {
+            f"{folder}/{name}": {
+                "size": int(facts.get("size", 0)),
+                "mtime": facts.get("modify"),
+            }
+            for name, facts in ftp.mlsd(folder, facts=["type", "size", "modify"])
+            if facts.get("type") == "file"
+        }
+    except ftplib.error_perm:
+        # The server does not support MLSD, fall back to NLST + SIZE + MDTM.
+        pass
+    ftp.voidcmd("TYPE I")
+    listing = {}
+    for entry in ftp.nlst(folder):
+        name = entry.rsplit("/", 1)[-1]
+        if name in EXCLUDED_NAMES:
+            continue
+        path = f"{folder}/{name}"
+        try:
+            size = int(ftp.size(path) or 0)
+        except ftplib.error_perm:
+            # Directories have no size.
+            continue
+        try:
+            mtime = ftp.voidcmd(f"MDTM {path}").split()[-1]
+        except ftplib.error_perm:
+            mtime = None
+        listing[path] = {"size": size, "mtime": mtime}
+    return listing
+
+
+def list_ftp_folders(
+    connection: ReusableFTPConnection, folders: list[str]
+) -> dict[str, dict]:
+    """
+    List the files of several FTP folders over the same control connection.
+
+    This is blocking and must run in an executor.
+
+    :param connection: Control connection to the FTP server.
+    :param folders: FTP folders to list.
+    :return: Mapping of FTP path to its size and modification time.
+    """
+    with connection.connection() as ftp:
+        listing = {}
+        for folder in folders:
+            try:
+                listing.update(_list_folder(ftp, folder))
+            except ftplib.Error as error:
+                raise ConnectionAbortedError(error) from error
+        return listing
+
+
+def stream_ftp_file(
+    ftp: ftplib.FTP, path: str, on_chunk: Callable[[bytes], None], chunk_size: int
+) -> int:
+    """
+    Download an FTP file in chunks, without holding the whole file in memory.
+
+    The blocks of the data channel are joined into chunks of at least
+    `chunk_size` bytes, except the last one. This is blocking and must run in
+    an executor.
+
+    :param ftp: Connected FTP client.
+    :param path: FTP path of the file.
+    :param on_chunk: Called with every chunk, in order.
+    :param chunk_size: Minimum size of the chunks.
+    :return: The size of the file.
+    """
+    buffer = bytearray()
+    size = 0
+
+    def on_block(block: bytes) -> None:
+        nonlocal size
+        size += len(block)
+        buffer.extend(block)
+        if len(buffer) >= chunk_size:
+            on_chunk(bytes(buffer))
+            buffer.clear()
+
+    try:
+        ftp.retrbinary(f"RETR {path}", on_block)
+    except ftplib.error_perm as error:
+        msg = f"File not found: {path}"
+        raise FileNotFoundError(msg) from error
+    if buffer:
+        on_chunk(bytes(buffer))
+    return size
@@ -0,0 +1,423 @@
+import asyncio
+import json
+from http import HTTPStatus
+from time import monotonic
+from typing import Any, Self
+from urllib.parse import quote
+from uuid import uuid4
+
+from aiohttp import ClientError, ClientResponseError, ClientSession
+from saviialib.libs.sharepoint_client import (
+    SpCreateFolderArgs,
+    SpListFilesArgs,
+    SpListFoldersArgs,
+    SpUploadFileArgs,
+)
+
+# Resource of the SharePoint Online app-only tokens.
+SHAREPOINT_RESOURCE = "00000003-0000-0ff1-ce00-000000000000"
+# Lifetime assumed for the tokens and form digests that do not report theirs.
+DEFAULT_TOKEN_LIFETIME = 3600
+DEFAULT_DIGEST_LIFETIME = 1800
+
+
+class SharepointSessionError(ConnectionError):
+    """SharePoint rejected an upload session, so it cannot be resumed."""
+
+
+def is_unreachable(error: BaseException) -> bool:
+    """
+    Return whether an error means SharePoint could not be reached.
+
+    Timeouts, network errors, throttling and server errors are transient,
+    unlike the requests rejected by SharePoint.
+    """
+    if isinstance(error, TimeoutError):
+        return True
+    if not isinstance(error, ConnectionError):
+        return False
+    cause = error.__cause__
+    if isinstance(cause, ClientResponseError):
+        return (
+            cause.status == HTTPStatus.TOO_MANY_REQUESTS
+            or cause.status >= HTTPStatus.INTERNAL_SERVER_ERROR
+        )
+    return True
+
+
+def _escape_url(relative_url: str) -> str:
+    # Keep the already encoded characters and escape quotes for OData.
+    return quote(relative_url, safe="/%'").replace("'", "''")
+
+
+class SharepointTokenCache:
+    """
+    App-only SharePoint access tokens, keyed by tenant and application.
+
+    A token is reused until `expiry_margin` seconds before it expires, and
+    concurrent requests for the same token wait for a single OAuth request.
+    """
+
+    def __init__(self, expiry_margin: float) -> None:
+        self.expiry_margin = expiry_margin
+        self.tokens: dict[tuple[str, ...], tuple[str, float]] = {}
+        self._locks: dict[tuple[str, ...], asyncio.Lock] = {}
+
+    @staticmethod
+    def _key(config: Any) -> tuple[str, ...]:
+        return (
+            config.sharepoint_tenant_id,
+            config.sharepoint_tenant_name,
+            config.sharepoint_client_id,
+            config.sharepoint_client_secret,
+        )
+
+    def _cached(self, key: tuple[str, ...]) -> str | None:
+        token = self.tokens.get(key)
+        if token is None or monotonic() >= token[1]:
+            return None
+        return token[0]
+
+    def invalidate(self, config: Any) -> None:
+        self.tokens.pop(self._key(config), None)
+
+    async def async_get(self, session: ClientSession, config: Any) -> str:
+        """
+        Return an access token, requesting a new one if needed.
+
+        :param session: HTTP session used for the OAuth request.
+        :param config: Any object exposing the SharePoint credentials.
+        :return: The access token.
+        """
+        key = self._key(config)
+        token = self._cached(key)
+        if token is not None:
+            return token
+        async with self._locks.setdefault(key, asyncio.Lock()):
+            token = self._cached(key)
+            if token is not None:
+                return token
+            tenant_id = config.sharepoint_tenant_id
+            resource = (
+                f"{SHAREPOINT_RESOURCE}/"
+                f"{config.sharepoint_tenant_name}.sharepoint.com@{tenant_id}"
+            )
+            async with session.post(
+                f"https://accounts.accesscontrol.windows.net/{tenant_id}/tokens/OAuth/2",
+                data={
+                    "grant_type": "client_credentials",
+                    "client_id": f"{config.sharepoint_client_id}@{tenant_id}",
+                    "client_secret": config.sharepoint_client_secret,
+                    "resource": resource,
+                },
+            ) as response:
+                if response.status != HTTPStatus.OK:
+                    msg = (
+                        f"Failed to fetch credentials: {response.status}, "
+                        f"{await response.text()}"
+                    )
+                    raise ClientError(msg)
+                response_json = await response.json()
+            lifetime = float(response_json.get("expires_in", DEFAULT_TOKEN_LIFETIME))
+            token = response_json["access_token"]
+            self.tokens[key] = (token, monotonic() + lifetime - self.expiry_margin)
+            return token
+
+
+class SharepointSession:
+    """
+    SharePoint REST client of a site over a shared, keep-alive HTTP session.
+
+    It offers the methods of the saviialib `SharepointRestAPI` used by the
+    integration, and can be shared by every coordinator and service. The
+    access token comes from the token cache and the form digest of the site
+    is reused until it expires, so the requests skip the OAuth, TLS and
+    `contextinfo` round trips. Entering it only makes sure a token is
+    available, and leaving it keeps the HTTP session open.
+    """
+
+    def __init__(
+        self,
+        session: ClientSession,
+        config: Any,
+        tokens: SharepointTokenCache,
+    ) -> None:
+        self.session = session
+        self.config = config
+        self.tokens = tokens
+        self.base_url = (
+            f"https://{config.sharepoint_tenant_name}.sharepoint.com"
+            f"/sites/{config.sharepoint_site_name}/_api/"
+        )
+        self._digest: tuple[str, float] | None = None
+        self._digest_lock = asyncio.Lock()
+
+    async def __aenter__(self) -> Self:
+        try:
+            await self.tokens.async_get(self.session, self.config)
+        except ClientError as error:
+            raise ConnectionError(error) from error
+        return self
+
+    async def __aexit__(self, _exc_type: Any, _exc_val: Any, _exc_tb: Any) -> None:
+        return None
+
+    async def _async_form_digest(self) -> str:
+        async with self._digest_lock:
+            if self._digest is None or monotonic() >= self._digest[1]:
+                response_json = await self.request("POST", "contextinfo")
+                lifetime = float(
+                    response_json.get(
+                        "FormDigestTimeoutSeconds", DEFAULT_DIGEST_LIFETIME
+                    )
+                )
+                self._digest = (
+                    response_json["FormDigestValue"],
+                    monotonic() + lifetime - self.tokens.expiry_margin,
+                )
+            return self._digest[0]
+
+    async def request(
+        self,
+        method: str,
+        endpoint: str,
+        *,
+        data: Any = None,
+        content_type: str = "application/json",
+        digest: bool = False,
+    ) -> Any:
+        """
+        Send a request to the REST API of the site.
+
+        :param method: HTTP method.
+        :param endpoint: Endpoint, relative to the `_api/` URL of the site.
+        :param data: Body of the request.
+        :param content_type: Content type of the body.
+        :param digest: Whether the request needs the form digest of the site.
+        :return: The decoded JSON response.
+        :raises ClientError: If the request fails.
+        """
+        token = await self.tokens.async_get(self.session, self.config)
+        headers = {
+            "Authorization": f"Bearer {token}",
+            "Accept": "application/json",
+            "Content-Type": content_type,
+        }
+        if digest:
+            headers["X-RequestDigest"] = await self._async_form_digest()
+        async with self.session.request(
+            method, self.base_url + endpoint, data=data, headers=headers
+        ) as response:
+            if response.status in (HTTPStatus.UNAUTHORIZED, HTTPStatus.FORBIDDEN):
+                # The token or the digest may have been revoked, renew both.
+                self.tokens.invalidate(self.config)
+                self._digest = None
+            response.raise_for_status()
+            return await response.json()
+
+    async def _call(self, method: str, endpoint: str, **kwargs: Any) -> Any:
+        try:
+            return await self.request(method, endpoint, **kwargs)
+        except ClientError as error:
+            raise ConnectionError(error) from error
+
+    async def list_files(self, args: SpListFilesArgs) -> dict:
+        folder = f"GetFolderByServerRelativeUrl('{args.folder_relative_url}')"
+        return await self._call("GET", f"web/{folder}/Files")
+
+    async def list_folders(self, args: SpListFoldersArgs) -> dict:
+        folder = f"GetFolderByServerRelativeUrl('{args.folder_relative_url}')"
+        return await self._call("GET", f"web/{folder}/Folders")
+
+    async def upload_file(self, args: SpUploadFileArgs) -> dict:
+        folder = f"GetFolderByServerRelativeUrl('{args.folder_relative_url}')"
+        return await self._call(
+            "POST",
+            f"web/{folder}/Files/add(url='{args.file_name}',overwrite=true)",
+            data=args.file_content,
+            content_type="application/octet-stream",
+            digest=True,
+        )
+
+    async def create_folder(self, args: SpCreateFolderArgs) -> dict:
+        return await self._call(
+            "POST",
+            "web/folders",
+            data=json.dumps({"ServerRelativeUrl": args.folder_relative_url}),
+            digest=True,
+        )
+
+
+async def upload_file_chunk(  # noqa: PLR0913
+    client: SharepointSession,
+    file_relative_url: str,
+    upload_id: str,
+    offset: int,
+    chunk: bytes,
+    *,
+    last: bool,
+) -> int:
+    """
+    Send a chunk of a SharePoint chunked upload session.
+
+    The first chunk starts the session, the last one finishes it and any other
+    one continues it. The file must already exist, usually as an empty file.
+
+    :param client: The SharePoint client of the site.
+    :param file_relative_url: Server relative URL of the file.
+    :param upload_id: GUID identifying the upload session.
+    :param offset: Offset of the chunk in the file.
+    :param chunk: Content of the chunk.
+    :param last: Whether it is the last chunk of the file.
+    :return: The offset of the next chunk.
+    """
+    if offset == 0 and not last:
+        method = f"StartUpload(uploadId=guid'{upload_id}')"
+    elif last:
+        method = f"FinishUpload(uploadId=guid'{upload_id}',fileOffset={offset})"
+    else:
+        method = f"ContinueUpload(uploadId=guid'{upload_id}',fileOffset={offset})"
+    file_url = _escape_url(file_relative_url)
+    endpoint = f"web/GetFileByServerRelativeUrl('{file_url}')/{method}"
+    try:
+        response_json = await client.request(
+            "POST",
+            endpoint,
+            data=chunk,
+            content_type="application/octet-stream",
+            digest=True,
+        )
+    except ClientResponseError as error:
+        if HTTPStatus.BAD_REQUEST <= error.status < HTTPStatus.INTERNAL_SERVER_ERROR:
+            raise SharepointSessionError(error) from error
+        raise ConnectionError(error) from error
+    except ClientError as error:
+        raise ConnectionError(error) from error
+    next_offset = response_json.get("value") if not last else None
+    return int(next_offset) if next_offset else offset + len(chunk)
+
+
+async def cancel_upload_session(
+    client: SharepointSession, file_relative_url: str, upload_id: str
+) -> None:
+    """Cancel a SharePoint chunked upload session, ignoring any error."""
+    file_url = _escape_url(file_relative_url)
+    endpoint = (
+        f"web/GetFileByServerRelativeUrl('{file_url}')"
+        f"/CancelUpload(uploadId=guid'{upload_id}')"
+    )
+    try:
+        await client.request("POST", endpoint, digest=True)
+    except ClientError:
+        return
+
+
+def part_file_name(file_name: str, upload_id: str) -> str:
+    """Return the temporary name of a file sent in a chunked upload session."""
+    return f"{file_name}.{upload_id}.part"
+
+
+async def move_file(
+    client: SharepointSession, source_relative_url: str, target_relative_url: str
+) -> None:
+    """
+    Move a SharePoint file, replacing the target if it exists.
+
+    :raises ConnectionError: If the file could not be moved.
+    """
+    source_url = _escape_url(source_relative_url)
+    target_url = _escape_url(target_relative_url)
+    endpoint = (
+        f"web/GetFileByServerRelativeUrl('{source_url}')"
+        f"/moveto(newurl='{target_url}',flags=1)"
+    )
+    try:
+        await client.request("POST", endpoint, digest=True)
+    except ClientError as error:
+        raise ConnectionError(error) from error
+
+
+async def recycle_file(client: SharepointSession, file_relative_url: str) -> None:
+    """Move a SharePoint file to the recycle bin, ignoring any error."""
+    file_url = _escape_url(file_relative_url)
+    endpoint = f"web/GetFileByServerRelativeUrl('{file_url}')/recycle()"
+    try:
+        await client.request("POST", endpoint, digest=True)
+    except ClientError:
+        return
+
+
+class SharepointStreamUpload:
+    """
+    Upload a file to SharePoint from chunks, without knowing its size.
+
+    A file sent in a single chunk is uploaded with one request. A longer one
+    is sent in a chunked upload session to a temporary part file, moved over
+    the target once complete, so a failed upload keeps the previous copy.
+    """
+
+    def __init__(
+        self, client: SharepointSession, folder_relative_url: str, file_name: str
+    ) -> None:
+        self.client = client
+        self.folder_relative_url = folder_relative_url
+        self.file_name = file_name
+        self.offset = 0
+        self.upload_id: str | None = None
+        self.part_name = ""
+
+    @property
+    def file_relative_url(self) -> str:
+        return f"{self.folder_relative_url}/{self.file_name}"
+
+    @property
+    def part_relative_url(self) -> str:
+        return f"{self.folder_relative_url}/{self.part_name}"
+
+    async def async_write(self, chunk: bytes, *, last: bool) -> None:
+        """
+        Send the next chunk of the file.
+
+        :param chunk: Content of the chunk.
+        :param last: Whether it is the last chunk of the file.
+        :raises ConnectionError: If SharePoint rejects the chunk.
+        """
+        if self.offset == 0 and last:
+            await self.client.upload_file(
+                SpUploadFileArgs(
+                    folder_relative_url=self.folder_relative_url,
+                    file_content=chunk,
+                    file_name=self.file_name,
+                )
+            )
+            self.offset = len(chunk)
+            return
+        if self.upload_id is None:
+            self.upload_id = str(uuid4())
+            self.part_name = part_file_name(self.file_name, self.upload_id)
+            await self.client.upload_file(
+                SpUploadFileArgs(
+                    folder_relative_url=self.folder_relative_url,
+                    file_name=self.part_name,
+                )
+            )
+        self.offset = await upload_file_chunk(
+            self.client,
+            self.part_relative_url,
+            self.upload_id,
+            self.offset,
+            chunk,
+            last=last,
+        )
+        if last:
+            await move_file(self.client, self.part_relative_url, self.file_relative_url)
+            self.upload_id = None
+
+    async def async_cancel(self) -> None:
+        """Cancel the upload session, if one was started, and drop its part file."""
+        if self.upload_id is not None:
+            await cancel_upload_session(
+                self.client, self.part_relative_url, self.upload_id
+            )
+            await recycle_file(self.client, self.part_relative_url)
+            self.upload_id = None
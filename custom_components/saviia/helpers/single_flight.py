@@ -0,0 +1,102 @@
+import asyncio
+import json
+from collections.abc import Awaitable, Callable, Hashable, Mapping
+from time import monotonic
+from typing import Any
+
+
+def call_key(service: str, data: Mapping[str, Any]) -> tuple[str, str]:
+    """
+    Build the single-flight key of a service call.
+
+    :param service: Name of the service.
+    :param data: Data of the service call.
+    :return: A hashable key, equal for calls with the same data.
+    """
+    return service, json.dumps(data, sort_keys=True, default=str)
+
+
+class SingleFlight:
+    """
+    Share one execution between concurrent identical calls.
+
+    The first call of a key starts the operation as a task and every call of
+    the same key made before it finishes awaits that task. The task is shielded,
+    so cancelling one caller does not cancel the operation of the others. With a
+    TTL, a successful result is also returned to the calls made shortly after,
+    until it expires or is invalidated.
+    """
+
+    def __init__(self) -> None:
+        self._inflight: dict[Hashable, asyncio.Task] = {}
+        self._results: dict[Hashable, tuple[float, Any]] = {}
+        # Bumped on invalidation, so results started before it are not cached.
+        self._generation = 0
+
+    async def run(
+        self,
+        key: Hashable,
+        operation: Callable[[], Awaitable[Any]],
+        ttl: float = 0,
+        cache_if: Callable[[Any], bool] | None = None,
+    ) -> Any:
+        """
+        Run an operation, unless an identical one is running or was cached.
+
+        :param key: Key identifying identical calls.
+        :param operation: Function returning the awaitable to run.
+        :param ttl: Seconds to reuse a successful result. Zero disables it.
+        :param cache_if: Predicate a result must satisfy to be reused.
+        :return: The result of the operation.
+        """
+        cached = self._results.get(key)
+        if cached is not None:
+            expires, result = cached
+            if monotonic() < expires:
+                return result
+            del self._results[key]
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(operation())
+            self._inflight[key] = task
+            generation = self._generation
+            task.add_done_callback(
+                lambda done: self._finish(key, done, generation, ttl, cache_if)
+            )
+        return await asyncio.shield(task)
+
+    def _finish(
+        self,
+        key: Hashable,
+        task: asyncio.Task,
+        generation: int,
+        ttl: float,
+        cache_if: Callable[[Any], bool] | None,
+    ) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # Retrieve the exception, as every caller may have been cancelled.
+        if task.cancelled() or task.exception() is not None:
+            return
+        if ttl <= 0 or generation != self._generation:
+            return
+        result = task.result()
+        if cache_if is None or cache_if(result):
+            self._results[key] = (monotonic() + ttl, result)
+
+    def invalidate(self, match: Callable[[Hashable], bool]) -> None:
+        """
+        Forget the cached results of the keys matching a predicate.
+
+        Matching operations still running are detached, so the calls made from
+        now on start a new operation and their stale results are not cached.
+        """
+        self._generation += 1
+        for key in [key for key in self._results if match(key)]:
+            del self._results[key]
+        for key in [key for key in self._inflight if match(key)]:
+            del self._inflight[key]
+
+    def clear(self) -> None:
+        """Forget the cached results. Running operations are not cancelled."""
+        self._results.clear()
@@ -0,0 +1,55 @@
+import asyncio
+import threading
+from typing import Any
+
+# Seconds a blocked producer waits before checking whether the buffer closed.
+PUT_POLL_INTERVAL = 1.0
+
+
+class StreamClosedError(Exception):
+    """The consumer closed the buffer, so the producer must stop."""
+
+
+class StreamBuffer:
+    """
+    Bounded buffer from a thread of the executor to the event loop.
+
+    The producer blocks while the buffer is full, so a fast download never
+    gets more than `maxsize` items ahead of a slow upload. Closing the buffer
+    stops a blocked producer, even if the event loop is no longer running.
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, maxsize: int) -> None:
+        self._loop = loop
+        self._queue: asyncio.Queue[Any] = asyncio.Queue(maxsize=maxsize)
+        self._closed = threading.Event()
+
+    def put(self, item: Any) -> None:
+        """
+        Add an item, waiting while the buffer is full.
+
+        This is blocking and must run in an executor.
+
+        :raises StreamClosedError: If the buffer was closed.
+        """
+        if self._closed.is_set():
+            raise StreamClosedError
+        future = asyncio.run_coroutine_threadsafe(self._queue.put(item), self._loop)
+        while True:
+            try:
+                future.result(timeout=PUT_POLL_INTERVAL)
+            except TimeoutError:
+                if self._closed.is_set():
+                    future.cancel()
+                    raise StreamClosedError from None
+            else:
+                return
+
+    async def get(self) -> Any:
+        return await self._queue.get()
+
+    def close(self) -> None:
+        """Stop the producer and drop the buffered items."""
+        self._closed.set()
+        while not self._queue.empty():
+            self._queue.get_nowait()
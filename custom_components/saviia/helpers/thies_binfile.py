@@ -0,0 +1,77 @@
+import configparser
+from pathlib import Path
+from typing import NamedTuple
+
+import numpy as np
+
+# Bytes of the record timestamp and of every parameter, per binfile type.
+TIMESTAMP_SIZE = 4
+PARAMETER_SIZE = {"av": 5, "ex": 9}
+# Minutes between the records of a day.
+RECORD_INTERVAL = 10
+RECORDS_PER_DAY = 24 * 60 // RECORD_INTERVAL
+
+
+class THIESRecords(NamedTuple):
+    """Decoded records of a THIES binfile, one row per record."""
+
+    names: list[str]
+    # Date of every record as YYYYMMDD, and its minutes since midnight.
+    dates: np.ndarray
+    minutes: np.ndarray
+    # Values whose status is not zero are NaN.
+    values: np.ndarray
+
+
+def read_descfile(path: str | Path) -> list[str]:
+    """
+    Read the parameter names of a DESCFILE.INI, in record order.
+
+    :param path: Path of the DESCFILE.INI.
+    :return: The names of the parameters.
+    """
+    config = configparser.ConfigParser()
+    config.read(path)
+    sections = sorted(config.sections(), key=int)
+    return [config[section]["name"] for section in sections]
+
+
+def record_dtype(nparameters: int, datatype: str) -> np.dtype:
+    """Return the structured dtype of a record with `nparameters` parameters."""
+    fields = [("timestamp", "<u4")]
+    for index in range(nparameters):
+        fields.extend([(f"status_{index}", "u1"), (f"value_{index}", "<f4")])
+        if datatype == "ex":
+            fields.append((f"time_{index}", "<u4"))
+    return np.dtype(fields)
+
+
+def read_binfile(binpath: str | Path, names: list[str], datatype: str) -> THIESRecords:
+    """
+    Decode a THIES binfile with memory-mapped, fixed-width records.
+
+    :param binpath: Path of the binfile.
+    :param names: Names of the parameters, from the DESCFILE.INI.
+    :param datatype: "av" for the average values or "ex" for the extremes.
+    :return: The decoded records.
+    """
+    dtype = record_dtype(len(names), datatype)
+    nrows = Path(binpath).stat().st_size // dtype.itemsize
+    if nrows == 0:
+        records = np.empty(0, dtype=dtype)
+    else:
+        records = np.memmap(binpath, dtype=dtype, mode="r", shape=(nrows,))
+    # Timestamp bits, from the most significant: year since 2000 (6), month (4),
+    # day (5), hour (5), minute (6) and second (6).
+    timestamps = records["timestamp"].astype(np.int64)
+    dates = (
+        (2000 + (timestamps >> 26)) * 10000
+        + ((timestamps >> 22) & 0xF) * 100
+        + ((timestamps >> 17) & 0x1F)
+    )
+    minutes = ((timestamps >> 12) & 0x1F) * 60 + ((timestamps >> 6) & 0x3F)
+    values = np.empty((nrows, len(names)))
+    for index in range(len(names)):
+        column = np.round(records[f"value_{index}"].astype(np.float64), 1)
+        values[:, index] = np.where(records[f"status_{index}"] == 0, column, np.nan)
+    return THIESRecords(names, dates, minutes, values)
@@ -0,0 +1,89 @@
+"""Timing instrumentation of the SAVIIA coordinators."""
+
+import math
+from collections import deque
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass
+from time import monotonic
+
+from .const import CoordinatorParams
+
+
+def _percentile(ordered: list[float], percent: float) -> float:
+    # Nearest-rank percentile of an ascending list.
+    index = max(0, math.ceil(percent * len(ordered) / 100) - 1)
+    return ordered[min(index, len(ordered) - 1)]
+
+
+class StageTimings:
+    """
+    Rolling durations of the stages of a coordinator refresh.
+
+    Every stage keeps the durations of its latest `TIMING_WINDOW` spans,
+    measured with the monotonic clock.
+    """
+
+    def __init__(self, window: int = CoordinatorParams.TIMING_WINDOW) -> None:
+        self.window = window
+        self.samples: dict[str, deque[float]] = {}
+
+    @contextmanager
+    def span(self, stage: str) -> Iterator[None]:
+        """Measure the duration of the enclosed block as a span of a stage."""
+        started = monotonic()
+        try:
+            yield
+        finally:
+            self.record(stage, monotonic() - started)
+
+    def record(self, stage: str, duration: float) -> None:
+        if stage not in self.samples:
+            self.samples[stage] = deque(maxlen=self.window)
+        self.samples[stage].append(duration)
+
+    def last(self, stage: str) -> float | None:
+        samples = self.samples.get(stage)
+        return samples[-1] if samples else None
+
+    def summary(self) -> dict[str, dict[str, float | int]]:
+        """Return the count, last, p50, p95 and max duration of every stage."""
+        summary = {}
+        for stage, samples in self.samples.items():
+            ordered = sorted(samples)
+            summary[stage] = {
+                "count": len(samples),
+                "last": round(samples[-1], 3),
+                "p50": round(_percentile(ordered, 50), 3),
+                "p95": round(_percentile(ordered, 95), 3),
+                "max": round(ordered[-1], 3),
+            }
+        return summary
+
+
+@dataclass
+class RunStats:
+    """Throughput of the last run of a coordinator."""
+
+    duration: float
+    files_transferred: int = 0
+    files_failed: int = 0
+    bytes_transferred: int = 0
+    # Whether the whole run failed, for example when the uplink is down.
+    failed: bool = False
+
+    @property
+    def files_per_second(self) -> float:
+        if not self.duration:
+            return 0.0
+        return round(self.files_transferred / self.duration, 3)
+
+    @property
+    def error_rate(self) -> float:
+        """Percentage of the attempted files that failed."""
+        if self.failed:
+            return 100.0
+        attempted = self.files_transferred + self.files_failed
+        if not attempted:
+            return 0.0
+        return round(self.files_failed / attempted * 100, 2)
@@ -1,10 +1,12 @@
 from custom_components.saviia.libs.log_client.log_client import LogClient
+from custom_components.saviia.libs.log_client.log_history import log_history
 
 from .types.log_client_types import (
     DebugArgs,
     ErrorArgs,
     InfoArgs,
     LogClientArgs,
+    LogHistoryRecord,
     LogStatus,
     WarningArgs,
 )
@@ -15,6 +17,8 @@ __all__ = [
     "InfoArgs",
     "LogClient",
     "LogClientArgs",
+    "LogHistoryRecord",
     "LogStatus",
     "WarningArgs",
+    "log_history",
 ]
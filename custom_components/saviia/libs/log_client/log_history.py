@@ -0,0 +1,112 @@
+import reprlib
+import sys
+from collections import deque
+from time import time
+
+from custom_components.saviia.libs.log_client.types.log_client_types import (
+    LogHistoryRecord,
+    LogStatus,
+)
+from custom_components.saviia.libs.log_client.utils.log_client_utils import (
+    resolve_message,
+)
+
+HISTORY_CAPACITY = 2000
+# Longest message kept by the history, longer ones are cut.
+MAX_MESSAGE_LENGTH = 1000
+
+# Bounded representation of the arguments of the messages, so a record never
+# formats, or keeps, a whole response payload.
+_args_repr = reprlib.Repr()
+_args_repr.maxlevel = 3
+_args_repr.maxdict = 20
+_args_repr.maxlist = 20
+_args_repr.maxtuple = 20
+_args_repr.maxset = 20
+_args_repr.maxstring = 100
+_args_repr.maxother = 100
+
+
+def _snapshot(arg: object) -> object:
+    if isinstance(arg, (int, float)):
+        return arg
+    if isinstance(arg, (dict, list, tuple, set, frozenset)):
+        return _args_repr.repr(arg)
+    return str(arg)[:MAX_MESSAGE_LENGTH]
+
+
+def _history_message(metadata: dict) -> str:
+    """Format the message of a record with a bounded snapshot of its arguments."""
+    if "args" in metadata:
+        args = metadata["args"]
+        args = tuple(map(_snapshot, args if isinstance(args, tuple) else (args,)))
+        metadata = {**metadata, "args": args}
+    msg = resolve_message(metadata)
+    if len(msg) > MAX_MESSAGE_LENGTH:
+        return msg[:MAX_MESSAGE_LENGTH] + "..."
+    return msg
+
+
+class LogHistory:
+    """
+    Fixed-capacity history of the log records, shared by every log client.
+
+    Once full, each new record drops the oldest one. Records are compact
+    tuples with an epoch timestamp and interned class and method names. Their
+    message is formatted when recorded, from a bounded representation of its
+    arguments, so the history never holds on to the logged objects.
+    """
+
+    def __init__(self, capacity: int = HISTORY_CAPACITY) -> None:
+        self.records: deque[tuple] = deque(maxlen=capacity)
+
+    def append(
+        self,
+        level: int,
+        class_name: str,
+        method_name: str,
+        status: LogStatus,
+        metadata: dict,
+    ) -> None:
+        self.records.append(
+            (
+                int(time()),
+                level,
+                sys.intern(class_name),
+                sys.intern(method_name),
+                status,
+                _history_message(metadata),
+            )
+        )
+
+    def query(
+        self,
+        min_level: int = 0,
+        start: int | None = None,
+        end: int | None = None,
+        class_name: str | None = None,
+        limit: int | None = None,
+    ) -> list[LogHistoryRecord]:
+        """
+        Return the records matching the filters, oldest first.
+
+        :param min_level: Lowest logging level of the records.
+        :param start: Earliest epoch timestamp of the records.
+        :param end: Latest epoch timestamp of the records.
+        :param class_name: Class name of the records.
+        :param limit: Maximum number of records, keeping the latest ones.
+        """
+        matches = [
+            record
+            for record in list(self.records)
+            if record[1] >= min_level
+            and (start is None or record[0] >= start)
+            and (end is None or record[0] <= end)
+            and (class_name is None or record[2] == class_name)
+        ]
+        if limit is not None:
+            matches = matches[-limit:] if limit > 0 else []
+        return [LogHistoryRecord(*record) for record in matches]
+
+
+log_history = LogHistory()
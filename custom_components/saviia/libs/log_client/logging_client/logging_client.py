@@ -1,15 +1,16 @@
 import logging
-
-from saviialib.libs.zero_dependency.utils.datetime_utils import datetime_to_str, today
+import sys
 
 from custom_components.saviia.libs.log_client.log_client_contract import (
     LogClientContract,
 )
+from custom_components.saviia.libs.log_client.log_history import log_history
 from custom_components.saviia.libs.log_client.types.log_client_types import (
     DebugArgs,
     ErrorArgs,
     InfoArgs,
     LogClientArgs,
+    LogHistoryRecord,
     WarningArgs,
 )
 
@@ -18,53 +19,56 @@ from custom_components.saviia.libs.log_client.utils.log_client_utils import (
     format_message,
 )
 
+LOGGER_NAME = "custom_components.saviia.log_client"
+
 
 class LoggingClient(LogClientContract):
     def __init__(self, args: LogClientArgs):
-        log_format = "{message}"
-        logging.basicConfig(format=log_format, level=logging.INFO, style="{")
-        self.class_name = args.class_name
+        # The records propagate to the handlers Home Assistant sets on the root
+        # logger, which already hands them to a queue off the event loop.
+        self.logger = logging.getLogger(f"{LOGGER_NAME}.{args.class_name}")
+        for handler in args.handlers:
+            if handler not in self.logger.handlers:
+                self.logger.addHandler(handler)
+        self.class_name = sys.intern(args.class_name)
         self.method_name = args.method_name
         self.active_record = args.active_record
-        self.log_history = []
 
-    def _save_to_history(self, meta: dict) -> None:
-        self.log_history.append(
-            f"[{datetime_to_str(today(), date_format='%m-%d-%Y %H:%M:%S')}][{self.class_name}] {meta.get('msg', '')}"
-        )
+    @property
+    def log_history(self) -> list[LogHistoryRecord]:
+        return log_history.query(class_name=self.class_name)
 
-    def info(self, args: InfoArgs) -> None:
-        if self.active_record:
-            self._save_to_history(args.metadata)
-        return logging.info(  # noqa: LOG015
+    def _log(
+        self, level: int, args: InfoArgs | ErrorArgs | DebugArgs | WarningArgs
+    ) -> None:
+        enabled = self.logger.isEnabledFor(level)
+        # Debug records are only kept while debugging, the others always.
+        if self.active_record and (enabled or level >= logging.INFO):
+            log_history.append(
+                level,
+                self.class_name,
+                self.method_name,
+                args.status,
+                args.metadata,
+            )
+        # Format nothing unless the record will be emitted.
+        if not enabled:
+            return
+        self.logger.log(
+            level,
             format_message(
                 self.class_name, self.method_name, args.status, args.metadata
-            )
+            ),
         )
 
+    def info(self, args: InfoArgs) -> None:
+        self._log(logging.INFO, args)
+
     def error(self, args: ErrorArgs) -> None:
-        if self.active_record:
-            self._save_to_history(args.metadata)
-        return logging.error(  # noqa: LOG015
-            format_message(
-                self.class_name, self.method_name, args.status, args.metadata
-            )
-        )
+        self._log(logging.ERROR, args)
 
     def debug(self, args: DebugArgs) -> None:
-        if self.active_record:
-            self._save_to_history(args.metadata)
-        return logging.debug(  # noqa: LOG015
-            format_message(
-                self.class_name, self.method_name, args.status, args.metadata
-            )
-        )
+        self._log(logging.DEBUG, args)
 
     def warning(self, args: WarningArgs) -> None:
-        if self.active_record:
-            self._save_to_history(args.metadata)
-        return logging.warning(  # noqa: LOG015
-            format_message(
-                self.class_name, self.method_name, args.status, args.metadata
-            )
-        )
+        self._log(logging.WARNING, args)
@@ -1,6 +1,7 @@
+import logging
 from dataclasses import dataclass, field
 from enum import Enum
-from typing import Literal
+from typing import Literal, NamedTuple
 
 
 class LogStatus(Enum):
@@ -18,7 +19,9 @@ class LogClientArgs:
     service_name: str = field(default="")
     class_name: str = field(default="")
     method_name: str = field(default="")
-    active_record: bool = False
+    active_record: bool = True
+    # Extra handlers for the records of this client, on top of the propagation.
+    handlers: tuple[logging.Handler, ...] = ()
 
 
 @dataclass
@@ -45,3 +48,12 @@ class ErrorArgs:
 class WarningArgs:
     status: Literal[LogStatus.FAILED, LogStatus.ALERT]
     metadata: dict = field(default_factory=dict)
+
+
+class LogHistoryRecord(NamedTuple):
+    timestamp: int
+    level: int
+    class_name: str
+    method_name: str
+    status: LogStatus
+    msg: str
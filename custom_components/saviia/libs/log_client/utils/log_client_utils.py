@@ -1,6 +1,21 @@
 from custom_components.saviia.libs.log_client.types.log_client_types import LogStatus
 
 
+def resolve_message(metadata: dict) -> str:
+    """
+    Build the message of a log record.
+
+    The message is formatted with the optional `args` of the metadata, using
+    the %-style of the logging module, so callers can defer the formatting of
+    large objects until the record is emitted.
+    """
+    msg = metadata.get("msg", "")
+    if msg and "args" in metadata:
+        args = metadata["args"]
+        return msg % (args if isinstance(args, tuple) else (args,))
+    return msg
+
+
 def format_message(
     class_name: str,
     method_name: str,
@@ -9,6 +24,7 @@ def format_message(
 ) -> str:
     if metadata is None:
         metadata = {}
+    prefix = f"{class_name}::{method_name}_{status.value}"
     if metadata.get("msg"):
-        return f"{class_name}::{method_name}_{status.value}: {metadata.get('msg')}"
-    return f"{class_name}::{method_name}_{status.value}"
+        return f"{prefix}: {resolve_message(metadata)}"
+    return prefix
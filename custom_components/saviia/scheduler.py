@@ -0,0 +1,58 @@
+"""Scheduling of the SAVIIA coordinators that share the station uplink."""
+
+import asyncio
+import random
+from datetime import datetime, timedelta
+
+from homeassistant.util import dt as dt_util
+
+from .const import CoordinatorParams
+
+
+class UplinkScheduler:
+    """
+    Plan the refreshes of the heavy I/O coordinators of a config entry.
+
+    Every planned refresh gets a random jitter and is kept at least
+    `SCHEDULE_MIN_GAP` away from the refreshes planned by the other
+    coordinators. The lock serialises the transfers that still overlap, for
+    example when a service call triggers a refresh.
+    """
+
+    def __init__(self) -> None:
+        self.lock = asyncio.Lock()
+        self.planned: dict[str, datetime] = {}
+
+    def plan(self, name: str, delay: timedelta) -> timedelta:
+        """
+        Plan the next refresh of a coordinator.
+
+        :param name: Name of the coordinator.
+        :param delay: Delay before the refresh, without jitter.
+        :return: The delay to use as the coordinator update interval.
+        """
+        jitter = delay.total_seconds() * CoordinatorParams.SCHEDULE_JITTER
+        now = dt_util.utcnow()
+        run_at = now + delay + timedelta(seconds=random.uniform(0, jitter))  # noqa: S311
+        for other_name, other_run_at in sorted(
+            self.planned.items(), key=lambda item: item[1]
+        ):
+            if other_name == name or other_run_at < now:
+                continue
+            if abs(run_at - other_run_at) < CoordinatorParams.SCHEDULE_MIN_GAP:
+                run_at = other_run_at + CoordinatorParams.SCHEDULE_MIN_GAP
+        self.planned[name] = run_at
+        return run_at - now
+
+    @staticmethod
+    def backoff(interval: timedelta | None, failures: int) -> timedelta | None:
+        """
+        Return the delay before retrying after consecutive failures.
+
+        The delay doubles with every failure, never exceeding the regular
+        interval of the coordinator.
+        """
+        if interval is None:
+            return None
+        delay = CoordinatorParams.FAILURE_BACKOFF * 2 ** (failures - 1)
+        return min(delay, interval)
@@ -1,15 +1,22 @@
+from collections.abc import Callable
+from dataclasses import dataclass
 from typing import Any
 
 from homeassistant.components.sensor import (
+    SensorDeviceClass,
     SensorEntity,
+    SensorEntityDescription,
+    SensorStateClass,
 )
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.const import PERCENTAGE, UnitOfInformation, UnitOfTime
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
-from .const import GeneralParams
-from .coordinator import SyncThiesDataCoordinator
+from .const import GeneralParams, SensorParams
+from .coordinator import SaviiaBaseCoordinator, SyncThiesDataCoordinator
+from .instrumentation import RunStats
 
 
 async def async_setup_entry(
@@ -35,9 +42,73 @@ async def async_setup_entry(
         SaviiaBackupStatusSensor(backup_coordinator, config_entry),
         SaviiaNetcameraRatesSensor(netcamera_rates_coordinator, config_entry),
     ]
+    sensors.extend(
+        SaviiaRunSensor(coordinator, config_entry, prefix, description)
+        for coordinator, prefix in (
+            (thies_coordinator, "THIES Sync"),
+            (backup_coordinator, "Backup"),
+        )
+        for description in RUN_SENSOR_DESCRIPTIONS
+    )
     async_add_entities(sensors, update_before_add=True)
 
 
+@dataclass(frozen=True, kw_only=True)
+class SaviiaRunSensorEntityDescription(SensorEntityDescription):
+    """Description of a sensor measuring the last run of a coordinator."""
+
+    value_fn: Callable[[RunStats], float | int]
+
+
+RUN_SENSOR_DESCRIPTIONS = (
+    SaviiaRunSensorEntityDescription(
+        key="last_run_duration",
+        name="Last Run Duration",
+        icon="mdi:timer-outline",
+        device_class=SensorDeviceClass.DURATION,
+        state_class=SensorStateClass.MEASUREMENT,
+        native_unit_of_measurement=UnitOfTime.SECONDS,
+        suggested_display_precision=1,
+        value_fn=lambda run: round(run.duration, 3),
+    ),
+    SaviiaRunSensorEntityDescription(
+        key="bytes_transferred",
+        name="Bytes Transferred",
+        icon="mdi:upload-network",
+        device_class=SensorDeviceClass.DATA_SIZE,
+        state_class=SensorStateClass.MEASUREMENT,
+        native_unit_of_measurement=UnitOfInformation.BYTES,
+        value_fn=lambda run: run.bytes_transferred,
+    ),
+    SaviiaRunSensorEntityDescription(
+        key="files_per_second",
+        name="Files per Second",
+        icon="mdi:speedometer",
+        state_class=SensorStateClass.MEASUREMENT,
+        native_unit_of_measurement="files/s",
+        suggested_display_precision=2,
+        value_fn=lambda run: run.files_per_second,
+    ),
+    SaviiaRunSensorEntityDescription(
+        key="error_rate",
+        name="Error Rate",
+        icon="mdi:alert-circle-outline",
+        state_class=SensorStateClass.MEASUREMENT,
+        native_unit_of_measurement=PERCENTAGE,
+        suggested_display_precision=1,
+        value_fn=lambda run: run.error_rate,
+    ),
+)
+
+
+# Key of the response in the data of each coordinator.
+COORDINATOR_RESPONSE_KEYS = {
+    "thies_coordinator": "synced_files",
+    "local_backup_coordinator": "exported_files",
+    "netcamera_rates_coordinator": "netcamera_rates",
+}
+
+
 class SaviiaBaseSensor(CoordinatorEntity, SensorEntity):
     """Sensor to display the list of uploaded files to SharePoint folder."""
 
@@ -55,35 +126,56 @@ class SaviiaBaseSensor(CoordinatorEntity, SensorEntity):
         self._attribute = attribute
         self._attr_icon = icon or "mdi:file"
         self.coordinator = coordinator
+        if coordinator.name not in COORDINATOR_RESPONSE_KEYS:
+            error_message = "Invalid coordinator name."
+            raise KeyError(error_message)
+        self._data: dict[str, Any] = {}
+        self._metadata: dict[str, Any] = {}
+        self._attributes: dict[str, Any] = {}
+        self._written_state: tuple | None = None
+        self._extract_data()
+
+    def _extract_data(self) -> None:
+        """Extract the response of the coordinator and its state, once per update."""
+        self._data = (
+            self.coordinator.data.get(COORDINATOR_RESPONSE_KEYS[self.coordinator.name])
+            or {}
+        )
+        self._metadata = self._extract_metadata()
+        self._attr_native_value = self._native_value()
+        self._attributes = self._state_attributes()
+        self._attr_extra_state_attributes = {
+            "last_update": self.coordinator.last_update,
+            **self._attributes,
+        }
+
+    def _extract_metadata(self) -> dict[str, Any]:
+        return self._data.get("metadata", {}).get("data", {})
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Write the state only when the values derived from the data change."""
+        self._extract_data()
+        # The update time changes on every refresh, so it is not compared.
+        state = (self.available, self._attr_native_value, self._attributes)
+        if state == self._written_state:
+            return
+        self._written_state = state
+        self.async_write_ha_state()
 
     @property
     def data(self) -> dict[str, Any]:
-        # Add mapping for different coordinators and their data keys !
-        coordinator_response = {
-            "thies_coordinator": "synced_files",
-            "local_backup_coordinator": "exported_files",
-            "netcamera_rates_coordinator": "netcamera_rates",
-        }
-        if coordinator_response.get(self.coordinator.name):
-            return (
-                self.coordinator.data.get(
-                    coordinator_response[self.coordinator.name], {}
-                )
-                or {}
-            )
-        error_message = "Invalid coordinator name."
-        raise KeyError(error_message)
+        return self._data
 
     @property
     def metadata(self) -> dict[str, Any]:
-        return self.data.get("metadata", {}).get("data", {})
+        return self._metadata
 
-    @property
-    def extra_state_attributes(self) -> dict[str, Any] | None:
-        return {
-            "last_update": self.coordinator.last_update,
-            "error": self.data.get("metadata", {}).get("error", {}),
-        }
+    def _native_value(self) -> Any:
+        return None
+
+    def _state_attributes(self) -> dict[str, Any]:
+        return {"error": self.data.get("metadata", {}).get("error", {})}
 
 
 class SaviiaFileSyncStatusSensor(SaviiaBaseSensor):
@@ -98,15 +190,13 @@ class SaviiaFileSyncStatusSensor(SaviiaBaseSensor):
             icon="mdi:file-cloud-upload",
         )
 
-    @property
-    def native_value(self) -> str | None:
+    def _native_value(self) -> str | None:
         message = self.data.get("message", "No sync message")
         server_status = self.data.get("status")
         return f"[{server_status}] {message}"
 
-    @property
-    def extra_state_attributes(self) -> dict[str, Any]:
-        base = super().extra_state_attributes or {}
+    def _state_attributes(self) -> dict[str, Any]:
+        base = super()._state_attributes()
         server_status = self.data.get("status")
         return {**base, "status": server_status}
 
@@ -114,6 +204,8 @@ class SaviiaFileSyncStatusSensor(SaviiaBaseSensor):
 class SaviiaNewFilesSensor(SaviiaBaseSensor):
     """Sensor for number of new uploaded files."""
 
+    _unrecorded_attributes = frozenset({"new_files", "new_files_bytes"})
+
     def __init__(self, coordinator, config_entry):
         super().__init__(
             coordinator,
@@ -123,24 +215,28 @@ class SaviiaNewFilesSensor(SaviiaBaseSensor):
             icon="mdi:file-plus",
         )
 
-    @property
-    def native_value(self) -> int:
+    def _native_value(self) -> int:
         return len(self.metadata.get("new_files", []))
 
-    @property
-    def extra_state_attributes(self) -> dict[str, Any]:
-        base = super().extra_state_attributes or {}
+    def _state_attributes(self) -> dict[str, Any]:
+        base = super()._state_attributes()
+        new_files = self.metadata.get("new_files", [])
         processed_files = self.metadata.get("processed_files", {})
         return {
             **base,
-            "new_files": self.metadata.get("new_files", []),
-            "new_files_attributes": processed_files,
+            "new_files": new_files[: SensorParams.ATTRIBUTE_PREVIEW_SIZE],
+            "new_files_bytes": sum(
+                processed_files.get(file_key, {}).get("file_size", 0)
+                for file_key in new_files
+            ),
         }
 
 
 class SaviiaFailedFilesSensor(SaviiaBaseSensor):
     """Sensor for number of failed file uploads."""
 
+    _unrecorded_attributes = frozenset({"failed_files"})
+
     def __init__(self, coordinator, config_entry):
         super().__init__(
             coordinator,
@@ -150,14 +246,16 @@ class SaviiaFailedFilesSensor(SaviiaBaseSensor):
             icon="mdi:file-alert",
         )
 
-    @property
-    def native_value(self) -> int:
+    def _native_value(self) -> int:
         return len(self.metadata.get("failed_files", []))
 
-    @property
-    def extra_state_attributes(self) -> dict[str, Any]:
-        base = super().extra_state_attributes or {}
-        return {**base, "failed_files": self.metadata.get("failed_files", [])}
+    def _state_attributes(self) -> dict[str, Any]:
+        base = super()._state_attributes()
+        failed_files = self.metadata.get("failed_files", [])
+        return {
+            **base,
+            "failed_files": failed_files[: SensorParams.ATTRIBUTE_PREVIEW_SIZE],
+        }
 
 
 class SaviiaBackupStatusSensor(SaviiaBaseSensor):
@@ -172,16 +270,18 @@ class SaviiaBackupStatusSensor(SaviiaBaseSensor):
             icon="mdi:backup-restore",
         )
 
-    @property
-    def native_value(self) -> str | None:
+    def _native_value(self) -> str | None:
         message = self.data.get("message", "No sync message")
         server_status = self.data.get("status")
         return f"[{server_status}] {message}"
 
-    @property
-    def extra_state_attributes(self) -> dict[str, Any]:
-        base = super().extra_state_attributes or {}
-        return {**base, "new_files": self.metadata.get("new_files", 0)}
+    def _state_attributes(self) -> dict[str, Any]:
+        base = super()._state_attributes()
+        return {
+            **base,
+            "new_files": self.metadata.get("new_files", 0),
+            **self.coordinator.pipeline.progress.as_dict(),
+        }
 
 
 class SaviiaNetcameraRatesSensor(SaviiaBaseSensor):
@@ -196,17 +296,14 @@ class SaviiaNetcameraRatesSensor(SaviiaBaseSensor):
             icon="mdi:camera-timer",
         )
 
-    @property
-    def metadata(self) -> dict[str, Any]:
-        return self.data.get("metadata", {})
+    def _extract_metadata(self) -> dict[str, Any]:
+        return self._data.get("metadata", {})
 
-    @property
-    def native_value(self) -> str | None:
-        return self.data.get("metadata", {}).get("status", None)
+    def _native_value(self) -> str | None:
+        return self.metadata.get("status", None)
 
-    @property
-    def extra_state_attributes(self) -> dict[str, Any]:
-        base = super().extra_state_attributes or {}
+    def _state_attributes(self) -> dict[str, Any]:
+        base = super()._state_attributes()
         return {
             **base,
             "photo_rate": self.metadata.get("photo_rate", -1),
@@ -214,3 +311,34 @@ class SaviiaNetcameraRatesSensor(SaviiaBaseSensor):
             "precipitation": self.metadata.get("precipitation", -1),
             "precipitation_prob": self.metadata.get("precipitation_probability", -1),
         }
+
+
+class SaviiaRunSensor(CoordinatorEntity, SensorEntity):
+    """Numeric sensor measuring the last run of a coordinator."""
+
+    entity_description: SaviiaRunSensorEntityDescription
+
+    def __init__(
+        self,
+        coordinator: SaviiaBaseCoordinator,
+        config_entry: ConfigEntry,
+        prefix: str,
+        description: SaviiaRunSensorEntityDescription,
+    ) -> None:
+        super().__init__(coordinator)
+        self.entity_description = description
+        self._attr_unique_id = (
+            f"{config_entry.entry_id}_{coordinator.name}_{description.key}"
+        )
+        self._attr_name = f"{config_entry.title} - {prefix} {description.name}"
+        self.coordinator = coordinator
+
+    @property
+    def available(self) -> bool:
+        return self.coordinator.last_run is not None
+
+    @property
+    def native_value(self) -> float | int | None:
+        if self.coordinator.last_run is None:
+            return None
+        return self.entity_description.value_fn(self.coordinator.last_run)
@@ -12,18 +12,39 @@ if TYPE_CHECKING:
     )
 
 
+import asyncio
+import logging
+from dataclasses import asdict
 from http import HTTPStatus
 
 from homeassistant.core import (
     SupportsResponse,
 )
 from homeassistant.exceptions import HomeAssistantError
+from homeassistant.util import dt as dt_util
 from saviialib import SaviiaAPI
 
+from custom_components.saviia.api_registry import get_api_registry
+from custom_components.saviia.camera_rates_cache import get_camera_rates_cache
 from custom_components.saviia.const import (
+    FailureDetectionParams,
     GeneralParams,
     ServicesParams,
 )
+from custom_components.saviia.coordinator import (
+    SaviiaBaseCoordinator,
+    entry_diagnostics,
+)
+from custom_components.saviia.day_summaries import (
+    get_day_summary_store,
+    shutdown_executor,
+)
+from custom_components.saviia.failure_detection import (
+    async_run_detection,
+    create_db_client,
+)
+from custom_components.saviia.helpers.datetime_utils import timestamps_to_str
+from custom_components.saviia.helpers.single_flight import SingleFlight, call_key
 from custom_components.saviia.libs.log_client import (
     DebugArgs,
     ErrorArgs,
@@ -31,11 +52,101 @@ from custom_components.saviia.libs.log_client import (
     LogClient,
     LogClientArgs,
     LogStatus,
+    log_history,
 )
 
 logclient = LogClient(
     LogClientArgs(client_name="logging", service_name="services", class_name="services")
 )
+# Identical service calls made while one is running share its execution.
+single_flight = SingleFlight()
+# Config entries refreshed at the same time by the sync and backup services.
+entry_refreshes = asyncio.Semaphore(ServicesParams.ENTRY_CONCURRENCY)
+
+
+def _is_ok(result: dict) -> bool:
+    return result.get("status") == HTTPStatus.OK.value
+
+
+def _invalidate_tasks_cache(result: dict) -> None:
+    """Forget the cached task lists once a task change succeeds."""
+    if _is_ok(result):
+        single_flight.invalidate(
+            lambda key: key[0] in ServicesParams.TASK_READ_SERVICES
+        )
+
+
+async def _async_refresh_entry(
+    entry_id: str, coordinator: SaviiaBaseCoordinator
+) -> dict:
+    """Refresh the coordinator of an entry and return the result of its run."""
+    logclient.method_name = "_async_refresh_entry"
+    async with entry_refreshes:
+        # Not debounced, so the result reported is always the one of this call.
+        await coordinator.async_refresh()
+    if coordinator.last_update_success:
+        logclient.info(
+            InfoArgs(
+                status=LogStatus.SUCCESSFUL,
+                metadata={
+                    "msg": "%s of %s successful",
+                    "args": (coordinator.name, entry_id),
+                },
+            )
+        )
+    else:
+        logclient.error(
+            ErrorArgs(
+                status=LogStatus.ERROR,
+                metadata={
+                    "msg": "%s of %s failed: %s",
+                    "args": (coordinator.name, entry_id, coordinator.last_exception),
+                },
+            )
+        )
+    return {
+        "success": coordinator.last_update_success,
+        "error": None
+        if coordinator.last_update_success
+        else str(coordinator.last_exception),
+        "last_run": asdict(coordinator.last_run) if coordinator.last_run else None,
+    }
+
+
+async def _async_refresh_entries(
+    hass: HomeAssistant,
+    coordinator_key: str,
+    entry_id: str | None = None,
+    *,
+    full_reconciliation: bool = False,
+) -> ServiceResponse:
+    """
+    Refresh a coordinator of every config entry, or of one, concurrently.
+
+    At most `ENTRY_CONCURRENCY` entries refresh at the same time, across the
+    sync and backup services, so a slow station does not delay the others.
+
+    :param hass: Home Assistant instance.
+    :param coordinator_key: Key of the coordinator in the entry data.
+    :param entry_id: ID of the entry to refresh. Defaults to every entry.
+    :param full_reconciliation: Reconcile every THIES file against SharePoint.
+    :return: The result of each entry, keyed by entry ID.
+    """
+    entries_data = _get_entries_data(hass, entry_id, coordinator_key)
+    coordinators = {
+        target_id: entry_data[coordinator_key]
+        for target_id, entry_data in entries_data.items()
+    }
+    if full_reconciliation:
+        for coordinator in coordinators.values():
+            coordinator.force_full_sync = True
+    results = await asyncio.gather(
+        *(
+            _async_refresh_entry(entry_id, coordinator)
+            for entry_id, coordinator in coordinators.items()
+        )
+    )
+    return {"entries": dict(zip(coordinators, results, strict=True))}
 
 
 def _ensure_domain_setup(hass) -> None:
@@ -54,32 +165,69 @@ def _ensure_domain_setup(hass) -> None:
         raise ValueError(error_message)
 
 
-def _check_api_in_entry(hass) -> SaviiaAPI:
-    api_exists = False
-    api: SaviiaAPI
-    for entry_data in hass.data[GeneralParams.DOMAIN].values():
-        try:
-            if entry_data.get("api"):
-                api_exists = True
-                api = entry_data["api"]
-                break
-        except AttributeError:
-            continue
-    if not api_exists:
-        error_message = "No API instance found in any config entry"
-        logclient.error(
-            ErrorArgs(
-                status=LogStatus.ERROR,
-                metadata={"msg": error_message},
-            )
+def _unknown_entry(entry_id: str) -> HomeAssistantError:
+    error_message = f"No SAVIIA config entry found with id '{entry_id}'"
+    logclient.error(
+        ErrorArgs(
+            status=LogStatus.ERROR,
+            metadata={"msg": error_message},
         )
-        raise ValueError(error_message)
-    return api
+    )
+    return HomeAssistantError(error_message)
+
+
+def _get_api(call: ServiceCall) -> SaviiaAPI:
+    """Get the API of the entry targeted by a call, or of the first entry."""
+    logclient.method_name = "_get_api"
+    entry_id = call.data.get("entry_id")
+    api = get_api_registry(call.hass).get(entry_id)
+    if api is not None:
+        return api
+    if entry_id is not None:
+        raise _unknown_entry(entry_id)
+    error_message = "No API instance found in any config entry"
+    logclient.error(
+        ErrorArgs(
+            status=LogStatus.ERROR,
+            metadata={"msg": error_message},
+        )
+    )
+    raise ValueError(error_message)
+
+
+def _get_entries_data(
+    hass: HomeAssistant, entry_id: str | None, key: str | None = None
+) -> dict[str, dict]:
+    """
+    Get the data of the entry targeted by a call, or of every entry.
+
+    :param hass: Home Assistant instance.
+    :param entry_id: ID of the targeted entry, or None for every entry.
+    :param key: Key the entry data must hold, like a coordinator name.
+    :return: The data of the entries, keyed by entry ID.
+    """
+    logclient.method_name = "_get_entries_data"
+    domain_data = hass.data[GeneralParams.DOMAIN]
+    if entry_id is None:
+        return {
+            target_id: entry_data
+            for target_id, entry_data in domain_data.items()
+            if isinstance(entry_data, dict) and (key is None or key in entry_data)
+        }
+    entry_data = domain_data.get(entry_id)
+    if not isinstance(entry_data, dict) or (key is not None and key not in entry_data):
+        raise _unknown_entry(entry_id)
+    return {entry_id: entry_data}
 
 
-def _get_config_entry_data(hass) -> dict:
+def _get_config_entry_data(hass, entry_id: str | None = None) -> dict:
     """Get config entry data for the integration."""
     logclient.method_name = "_get_config_entry_data"
+    if entry_id is not None:
+        entry = hass.config_entries.async_get_entry(entry_id)
+        if entry is None or entry.domain != GeneralParams.DOMAIN:
+            raise _unknown_entry(entry_id)
+        return dict(entry.data)
     entries = hass.config_entries.async_entries(GeneralParams.DOMAIN)
     if not entries:
         error_message = "No config entry found for SAVIIA"
@@ -114,7 +262,7 @@ async def async_get_config_value(call: ServiceCall) -> ServiceResponse:
         )
         raise HomeAssistantError(error_message)
 
-    config_data = _get_config_entry_data(call.hass)
+    config_data = _get_config_entry_data(call.hass, call.data.get("entry_id"))
     if key not in config_data:
         error_message = f"Key '{key}' was not found in SAVIIA config entry data"
         logclient.error(
@@ -131,65 +279,63 @@ async def async_get_config_value(call: ServiceCall) -> ServiceResponse:
     }
 
 
-async def async_sync_thies_files(call: ServiceCall) -> None:
+async def async_sync_thies_files(call: ServiceCall) -> ServiceResponse:
     """File synchronization."""
     logclient.method_name = "async_sync_thies_files"
     logclient.debug(DebugArgs(status=LogStatus.STARTED))
-    hass = call.hass
-    _ensure_domain_setup(hass)
-
-    for entry_id in hass.data[GeneralParams.DOMAIN]:
-        if entry_id == "services_registered":
-            continue
-
-        coordinator = hass.data[GeneralParams.DOMAIN][entry_id]["thies_coordinator"]
-        if not coordinator:
-            continue
-        try:
-            success = await coordinator.async_request_refresh()
-            logclient.info(
-                InfoArgs(
-                    status=LogStatus.SUCCESSFUL,
-                    metadata={"msg": "File sync successful"},
-                )
-            )
-            if success:
-                metadata = coordinator.data.get("metadata")
-                logclient.debug(
-                    DebugArgs(
-                        status=LogStatus.SUCCESSFUL,
-                        metadata={"msg": f"Metadata: {metadata}"},
-                    )
-                )
-
-        except Exception as e:
-            logclient.error(
-                ErrorArgs(
-                    status=LogStatus.ERROR,
-                    metadata={"msg": e.__str__()},
-                )
-            )
-            raise
+    _ensure_domain_setup(call.hass)
+    return await single_flight.run(
+        call_key(ServicesParams.SERVICE_SYNC_FILES, call.data),
+        lambda: _async_refresh_entries(
+            call.hass,
+            "thies_coordinator",
+            call.data.get("entry_id"),
+            full_reconciliation=call.data.get("full_reconciliation", False),
+        ),
+    )
 
 
 async def async_detect_failures(call: ServiceCall) -> ServiceResponse:
     logclient.method_name = "async_detect_failures"
     logclient.debug(DebugArgs(status=LogStatus.STARTED))
     _ensure_domain_setup(call.hass)
-    api = _check_api_in_entry(call.hass)
+    api = _get_api(call)
     thies_service = api.get("thies")
     try:
-        local_backup_source_path, n_days, db_driver, db_host, db_name, user, pwd = (
+        local_backup_source_path, n_days = (
             call.data.get("local_backup_source_path"),
             call.data.get("n_days"),
+        )
+        db_client = create_db_client(
             call.data.get("db_driver", ""),
             call.data.get("db_host", ""),
             call.data.get("db_name", ""),
             call.data.get("user", ""),
             call.data.get("pwd", ""),
         )
-        result = await thies_service.detect_failures(
-            local_backup_source_path, n_days, db_driver, db_host, db_name, user, pwd
+
+        def fire_progress(progress: dict) -> None:
+            call.hass.bus.async_fire(
+                FailureDetectionParams.PROGRESS_EVENT,
+                {
+                    "local_backup_source_path": local_backup_source_path,
+                    "n_days": n_days,
+                    **progress,
+                },
+            )
+
+        result = await single_flight.run(
+            call_key(ServicesParams.SERVICE_DETECT_FAILURES, call.data),
+            lambda: async_run_detection(
+                thies_service.config,
+                local_backup_source_path,
+                n_days,
+                get_day_summary_store(call.hass),
+                fire_progress,
+                db_client=db_client,
+            ),
+            ServicesParams.RESULT_TTL[ServicesParams.SERVICE_DETECT_FAILURES],
+            cache_if=_is_ok,
         )
         if result.get("status") != HTTPStatus.OK.value:
             logclient.error(
@@ -203,7 +349,8 @@ async def async_detect_failures(call: ServiceCall) -> ServiceResponse:
                 InfoArgs(
                     status=LogStatus.SUCCESSFUL,
                     metadata={
-                        "msg": f"The validation for thies sensors was successful: {result.get('metadata')}"
+                        "msg": "The validation for thies sensors was successful: %s",
+                        "args": result.get("metadata"),
                     },
                 )
             )
@@ -222,42 +369,16 @@ async def async_detect_failures(call: ServiceCall) -> ServiceResponse:
         raise
 
 
-async def async_local_backup(call: ServiceCall) -> None:
+async def async_local_backup(call: ServiceCall) -> ServiceResponse:
     logclient.method_name = "async_local_backup"
     logclient.debug(DebugArgs(status=LogStatus.STARTED))
-    hass = call.hass
-    _ensure_domain_setup(hass)
-
-    for entry_id in hass.data[GeneralParams.DOMAIN]:
-        if entry_id == "services_registered":
-            continue
-        coordinator = hass.data[GeneralParams.DOMAIN][entry_id][
-            "local_backup_coordinator"
-        ]
-        try:
-            success = await coordinator.async_request_refresh()
-            logclient.info(
-                InfoArgs(
-                    status=LogStatus.SUCCESSFUL,
-                    metadata={"msg": "Local backup successful"},
-                )
-            )
-            if success:
-                metadata = coordinator.data.get("metadata")
-                logclient.debug(
-                    DebugArgs(
-                        status=LogStatus.SUCCESSFUL,
-                        metadata={"msg": f"Metadata: {metadata}"},
-                    )
-                )
-        except Exception as e:
-            logclient.error(
-                ErrorArgs(
-                    status=LogStatus.ERROR,
-                    metadata={"msg": e.__str__()},
-                )
-            )
-            raise
+    _ensure_domain_setup(call.hass)
+    return await single_flight.run(
+        call_key(ServicesParams.SERVICE_LOCAL_BACKUP, call.data),
+        lambda: _async_refresh_entries(
+            call.hass, "local_backup_coordinator", call.data.get("entry_id")
+        ),
+    )
 
 
 async def async_get_netcamera_rates(call: ServiceCall) -> ServiceResponse:
@@ -265,10 +386,12 @@ async def async_get_netcamera_rates(call: ServiceCall) -> ServiceResponse:
     logclient.method_name = "async_get_netcamera_rates"
     logclient.debug(DebugArgs(status=LogStatus.STARTED))
     _ensure_domain_setup(call.hass)
-    api = _check_api_in_entry(call.hass)
+    api = _get_api(call)
     camera_services = api.get("netcamera")
     try:
-        result = await camera_services.get_camera_rates()
+        result = await get_camera_rates_cache(call.hass).async_get(
+            camera_services, call.data["latitude"], call.data["longitude"]
+        )
         if result.get("status") != HTTPStatus.OK.value:
             logclient.error(
                 ErrorArgs(
@@ -281,7 +404,8 @@ async def async_get_netcamera_rates(call: ServiceCall) -> ServiceResponse:
                 InfoArgs(
                     status=LogStatus.SUCCESSFUL,
                     metadata={
-                        "msg": f"Camera rates retrieved: {result.get('metadata')}"
+                        "msg": "Camera rates retrieved: %s",
+                        "args": result.get("metadata"),
                     },
                 )
             )
@@ -305,11 +429,12 @@ async def async_update_task(call: ServiceCall) -> ServiceResponse:
     logclient.method_name = "async_update_task"
     logclient.debug(DebugArgs(status=LogStatus.STARTED))
     _ensure_domain_setup(call.hass)
-    api = _check_api_in_entry(call.hass)
+    api = _get_api(call)
     task_service = api.get("tasks")
     try:
         task, completed = call.data.get("task"), call.data.get("completed")
         result = await task_service.update_task(task, completed)
+        _invalidate_tasks_cache(result)
         if result.get("status") != HTTPStatus.OK.value:
             logclient.error(
                 ErrorArgs(
@@ -322,7 +447,8 @@ async def async_update_task(call: ServiceCall) -> ServiceResponse:
                 InfoArgs(
                     status=LogStatus.SUCCESSFUL,
                     metadata={
-                        "msg": f"Task updated successfully: {result.get('metadata')}"
+                        "msg": "Task updated successfully: %s",
+                        "args": result.get("metadata"),
                     },
                 )
             )
@@ -346,11 +472,12 @@ async def async_delete_task(call: ServiceCall) -> ServiceResponse:
     logclient.method_name = "async_delete_task"
     logclient.debug(DebugArgs(status=LogStatus.STARTED))
     _ensure_domain_setup(call.hass)
-    api = _check_api_in_entry(call.hass)
+    api = _get_api(call)
     task_service = api.get("tasks")
     try:
         task_id = call.data.get("task_id")
         result = await task_service.delete_task(task_id)
+        _invalidate_tasks_cache(result)
         if result.get("status") != HTTPStatus.OK.value:
             logclient.error(
                 ErrorArgs(
@@ -363,7 +490,8 @@ async def async_delete_task(call: ServiceCall) -> ServiceResponse:
                 InfoArgs(
                     status=LogStatus.SUCCESSFUL,
                     metadata={
-                        "msg": f"Task deleted successfully: {result.get('metadata')}"
+                        "msg": "Task deleted successfully: %s",
+                        "args": result.get("metadata"),
                     },
                 )
             )
@@ -387,11 +515,12 @@ async def async_create_task(call: ServiceCall) -> ServiceResponse:
     logclient.method_name = "async_create_task"
     logclient.debug(DebugArgs(status=LogStatus.STARTED))
     _ensure_domain_setup(call.hass)
-    api = _check_api_in_entry(call.hass)
+    api = _get_api(call)
     task_service = api.get("tasks")
     try:
         task, images = call.data.get("task"), call.data.get("images", [])
         result = await task_service.create_task(task, images)
+        _invalidate_tasks_cache(result)
         if result.get("status") != HTTPStatus.OK.value:
             logclient.error(
                 ErrorArgs(
@@ -404,7 +533,8 @@ async def async_create_task(call: ServiceCall) -> ServiceResponse:
                 InfoArgs(
                     status=LogStatus.SUCCESSFUL,
                     metadata={
-                        "msg": f"Task created successfully: {result.get('metadata')}"
+                        "msg": "Task created successfully: %s",
+                        "args": result.get("metadata"),
                     },
                 )
             )
@@ -428,11 +558,19 @@ async def async_get_tasks(call: ServiceCall) -> ServiceResponse:
     logclient.method_name = "async_get_tasks"
     logclient.debug(DebugArgs(status=LogStatus.STARTED))
     _ensure_domain_setup(call.hass)
-    api = _check_api_in_entry(call.hass)
+    api = _get_api(call)
     task_service = api.get("tasks")
     try:
         params = call.data.get("params", {})
-        result = await task_service.get_tasks(params)
+        result = await single_flight.run(
+            call_key(
+                ServicesParams.SERVICE_GET_TASKS,
+                {"entry_id": call.data.get("entry_id"), "params": params},
+            ),
+            lambda: task_service.get_tasks(params),
+            ServicesParams.RESULT_TTL[ServicesParams.SERVICE_GET_TASKS],
+            cache_if=_is_ok,
+        )
         if result.get("status") != HTTPStatus.OK.value:
             logclient.error(
                 ErrorArgs(
@@ -445,7 +583,8 @@ async def async_get_tasks(call: ServiceCall) -> ServiceResponse:
                 InfoArgs(
                     status=LogStatus.SUCCESSFUL,
                     metadata={
-                        "msg": f"Tasks fetched successfully: {result.get('metadata')}"
+                        "msg": "Tasks fetched successfully: %s",
+                        "args": result.get("metadata"),
                     },
                 )
             )
@@ -469,12 +608,24 @@ async def async_get_pending_tasks(call: ServiceCall) -> ServiceResponse:
     logclient.method_name = "async_get_pending_tasks"
     logclient.debug(DebugArgs(status=LogStatus.STARTED))
     _ensure_domain_setup(call.hass)
-    api = _check_api_in_entry(call.hass)
+    api = _get_api(call)
     task_service = api.get("tasks")
     try:
         download = call.data.get("download", False)
         notify = call.data.get("notify", False)
-        result = await task_service.get_pending_tasks(download, notify)
+        if download or notify:
+            # Downloading and notifying have side effects, never share them.
+            result = await task_service.get_pending_tasks(download, notify)
+        else:
+            result = await single_flight.run(
+                call_key(
+                    ServicesParams.SERVICE_GET_PENDING_TASKS,
+                    {"entry_id": call.data.get("entry_id")},
+                ),
+                task_service.get_pending_tasks,
+                ServicesParams.RESULT_TTL[ServicesParams.SERVICE_GET_PENDING_TASKS],
+                cache_if=_is_ok,
+            )
         if result.get("status") != HTTPStatus.OK.value:
             logclient.error(
                 ErrorArgs(
@@ -487,7 +638,8 @@ async def async_get_pending_tasks(call: ServiceCall) -> ServiceResponse:
                 InfoArgs(
                     status=LogStatus.SUCCESSFUL,
                     metadata={
-                        "msg": f"Pending tasks fetched successfully: {result.get('metadata')}"
+                        "msg": "Pending tasks fetched successfully: %s",
+                        "args": result.get("metadata"),
                     },
                 )
             )
@@ -506,6 +658,79 @@ async def async_get_pending_tasks(call: ServiceCall) -> ServiceResponse:
         raise
 
 
+def _synced_files(coordinator, kind: str) -> list:
+    response = coordinator.data.get("synced_files") or {}
+    data = (response.get("metadata") or {}).get("data") or {}
+    if kind == "processed":
+        return [
+            {"file": file_key, **attributes}
+            for file_key, attributes in data.get("processed_files", {}).items()
+        ]
+    return data.get(f"{kind}_files", [])
+
+
+async def async_list_synced_files(call: ServiceCall) -> ServiceResponse:
+    """Get a page of the files handled by the last THIES synchronization."""
+    logclient.method_name = "async_list_synced_files"
+    logclient.debug(DebugArgs(status=LogStatus.STARTED))
+    hass = call.hass
+    _ensure_domain_setup(hass)
+    kind, offset, limit = call.data["kind"], call.data["offset"], call.data["limit"]
+    entries = {}
+    for entry_id, entry_data in _get_entries_data(
+        hass, call.data.get("entry_id"), "thies_coordinator"
+    ).items():
+        files = _synced_files(entry_data["thies_coordinator"], kind)
+        entries[entry_id] = {
+            "total": len(files),
+            "files": files[offset : offset + limit],
+        }
+    return {"kind": kind, "offset": offset, "limit": limit, "entries": entries}
+
+
+async def async_get_diagnostics(call: ServiceCall) -> ServiceResponse:
+    """Get the timings of the coordinators of every config entry."""
+    logclient.method_name = "async_get_diagnostics"
+    logclient.debug(DebugArgs(status=LogStatus.STARTED))
+    _ensure_domain_setup(call.hass)
+    return {
+        entry_id: entry_diagnostics(entry_data)
+        for entry_id, entry_data in _get_entries_data(
+            call.hass, call.data.get("entry_id")
+        ).items()
+    }
+
+
+async def async_get_log_history(call: ServiceCall) -> ServiceResponse:
+    """Get the latest records of the SAVIIA log history."""
+    start, end = call.data.get("start"), call.data.get("end")
+    records = log_history.query(
+        min_level=logging.getLevelName(call.data["level"].upper()),
+        start=int(dt_util.as_timestamp(start)) if start else None,
+        end=int(dt_util.as_timestamp(end)) if end else None,
+        class_name=call.data.get("class_name"),
+        limit=call.data["limit"],
+    )
+    times = timestamps_to_str(
+        (record.timestamp for record in records),
+        timezone=dt_util.get_default_time_zone(),
+        date_format=None,
+    )
+    return {
+        "records": [
+            {
+                "time": time,
+                "level": logging.getLevelName(record.level).lower(),
+                "class_name": record.class_name,
+                "method_name": record.method_name,
+                "status": record.status.value,
+                "msg": record.msg,
+            }
+            for record, time in zip(records, times, strict=True)
+        ]
+    }
+
+
 async def async_setup_services(hass: HomeAssistant) -> None:
     """Set up services for the SAVIIA integration."""
     hass.services.async_register(
@@ -513,12 +738,14 @@ async def async_setup_services(hass: HomeAssistant) -> None:
         ServicesParams.SERVICE_SYNC_FILES,
         async_sync_thies_files,
         schema=ServicesParams.SERVICE_SYNC_FILES_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
     )
     hass.services.async_register(
         GeneralParams.DOMAIN,
         ServicesParams.SERVICE_LOCAL_BACKUP,
         async_local_backup,
         schema=ServicesParams.SERVICE_LOCAL_BACKUP_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
     )
     hass.services.async_register(
         GeneralParams.DOMAIN,
@@ -576,10 +803,33 @@ async def async_setup_services(hass: HomeAssistant) -> None:
         schema=ServicesParams.SERVICE_GET_CONFIG_VALUE_SCHEMA,
         supports_response=SupportsResponse.ONLY,
     )
+    hass.services.async_register(
+        GeneralParams.DOMAIN,
+        ServicesParams.SERVICE_LIST_SYNCED_FILES,
+        async_list_synced_files,
+        schema=ServicesParams.SERVICE_LIST_SYNCED_FILES_SCHEMA,
+        supports_response=SupportsResponse.ONLY,
+    )
+    hass.services.async_register(
+        GeneralParams.DOMAIN,
+        ServicesParams.SERVICE_GET_DIAGNOSTICS,
+        async_get_diagnostics,
+        schema=ServicesParams.SERVICE_GET_DIAGNOSTICS_SCHEMA,
+        supports_response=SupportsResponse.ONLY,
+    )
+    hass.services.async_register(
+        GeneralParams.DOMAIN,
+        ServicesParams.SERVICE_GET_LOG_HISTORY,
+        async_get_log_history,
+        schema=ServicesParams.SERVICE_GET_LOG_HISTORY_SCHEMA,
+        supports_response=SupportsResponse.ONLY,
+    )
 
 
 async def async_unload_services(hass: HomeAssistant) -> None:
     """Unload services for the SAVIIA integration."""
+    single_flight.clear()
+    shutdown_executor()
     hass.services.async_remove(GeneralParams.DOMAIN, ServicesParams.SERVICE_SYNC_FILES)
     hass.services.async_remove(
         GeneralParams.DOMAIN, ServicesParams.SERVICE_LOCAL_BACKUP
@@ -600,3 +850,12 @@ async def async_unload_services(hass: HomeAssistant) -> None:
     hass.services.async_remove(
         GeneralParams.DOMAIN, ServicesParams.SERVICE_GET_CONFIG_VALUE
     )
+    hass.services.async_remove(
+        GeneralParams.DOMAIN, ServicesParams.SERVICE_LIST_SYNCED_FILES
+    )
+    hass.services.async_remove(
+        GeneralParams.DOMAIN, ServicesParams.SERVICE_GET_DIAGNOSTICS
+    )
+    hass.services.async_remove(
+        GeneralParams.DOMAIN, ServicesParams.SERVICE_GET_LOG_HISTORY
+    )
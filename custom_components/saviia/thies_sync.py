@@ -0,0 +1,462 @@
+"""Incremental synchronization of THIES Data Logger binfiles."""
+
+import asyncio
+import ftplib
+from contextlib import suppress
+from dataclasses import dataclass
+from http import HTTPStatus
+from pathlib import Path
+from typing import Any
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.storage import Store
+from saviialib.libs.directory_client import DirectoryClient, DirectoryClientArgs
+from saviialib.services.thies.use_cases.components.create_thies_statistics_file import (
+    create_thies_daily_statistics_file,
+)
+
+from custom_components.saviia.helpers.datetime_utils import (
+    DAY_FORMAT,
+    datetime_to_str,
+    today,
+)
+from custom_components.saviia.helpers.ftp_utils import (
+    list_ftp_folders,
+    stream_ftp_file,
+)
+from custom_components.saviia.helpers.sharepoint_utils import (
+    SharepointStreamUpload,
+    is_unreachable,
+)
+from custom_components.saviia.helpers.stream_buffer import (
+    StreamBuffer,
+    StreamClosedError,
+)
+from custom_components.saviia.libs.log_client import (
+    DebugArgs,
+    LogClient,
+    LogClientArgs,
+    LogStatus,
+    WarningArgs,
+)
+
+from .connection_pool import get_connection_pool
+from .const import GeneralParams, StorageParams, ThiesSyncParams
+from .instrumentation import StageTimings
+from .upload_spool import UploadSpool
+
+THIES_BASE_FOLDER_NAME = "thies"
+
+
+class ThiesSyncManifest:
+    """Persistent manifest of the THIES binfiles already synchronised, per entry."""
+
+    def __init__(self, hass: HomeAssistant, entry_id: str) -> None:
+        self._store: Store[dict[str, dict]] = Store(
+            hass,
+            StorageParams.STORAGE_VERSION,
+            StorageParams.THIES_MANIFEST_KEY.format(entry_id=entry_id),
+        )
+        self.files: dict[str, dict] = {}
+        self.loaded = False
+
+    async def async_load(self) -> None:
+        data = await self._store.async_load() or {}
+        self.files = data.get("files", {})
+        self.loaded = True
+
+    async def async_save(self) -> None:
+        await self._store.async_save({"files": self.files})
+
+    async def async_remove(self) -> None:
+        await self._store.async_remove()
+        self.files = {}
+
+    def pending(self, listing: dict[str, dict]) -> dict[str, dict]:
+        """Return the listed files whose size or mtime differ from the manifest."""
+        return {
+            path: info for path, info in listing.items() if self.files.get(path) != info
+        }
+
+    def prune(self, listing: dict[str, dict]) -> None:
+        """Forget the files that are no longer present in the FTP server."""
+        for path in self.files.keys() - listing.keys():
+            del self.files[path]
+
+
+@dataclass
+class StreamedFile:
+    """Upload of a file streamed from the FTP server."""
+
+    upload: SharepointStreamUpload
+    size: int = 0
+    # Latest chunk, sent once the next one shows whether it is the last.
+    held: bytes | None = None
+    error: Exception | None = None
+
+    async def async_feed(self, data: bytes | Exception | None) -> None:
+        """Send a chunk, or finish the upload on None, or cancel it on an error."""
+        if isinstance(data, Exception):
+            self.error = data
+            await self.upload.async_cancel()
+        elif data is None:
+            await self.upload.async_write(self.held or b"", last=True)
+            self.held = None
+        else:
+            self.size += len(data)
+            if self.held is not None:
+                await self.upload.async_write(self.held, last=False)
+            self.held = data
+
+
+class ThiesIncrementalSync:
+    """Transfer only the new or changed THIES binfiles, using the manifest."""
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        config_entry: ConfigEntry,
+        config: Any,
+        manifest: ThiesSyncManifest,
+        spool: UploadSpool,
+    ) -> None:
+        self.hass = hass
+        self.config = config
+        self.manifest = manifest
+        self.spool = spool
+        self.spool.handlers["thies"] = self._async_spooled
+        self.sharepoint_folders_path = [
+            config_entry.data["sharepoint_avg_backup_folder_name"],
+            config_entry.data["sharepoint_ext_backup_folder_name"],
+        ]
+        self.ftp_server_folders_path = [
+            config_entry.data["thies_ftp_server_avg_path"],
+            config_entry.data["thies_ftp_server_ext_path"],
+        ]
+        self.local_backup_path = config_entry.data["local_backup_source_path"]
+        self.connections = get_connection_pool(hass)
+        self.sharepoint_folder_by_ftp_folder = dict(
+            zip(self.ftp_server_folders_path, self.sharepoint_folders_path, strict=True)
+        )
+        self.timings = StageTimings()
+        self.logclient = LogClient(
+            LogClientArgs(
+                client_name="logging",
+                service_name="thies_sync",
+                class_name="thies_incremental_sync",
+            )
+        )
+
+    @staticmethod
+    def _prefix(ftp_folder: str) -> str:
+        # AV for average, and EXT for extreme.
+        return "AVG" if "AV" in ftp_folder else "EXT"
+
+    def _file_key(self, ftp_path: str) -> str:
+        ftp_folder, filename = ftp_path.rsplit("/", 1)
+        return f"{self._prefix(ftp_folder)}_{filename}"
+
+    async def _async_list_ftp(self) -> dict[str, dict]:
+        return await self.hass.async_add_executor_job(
+            list_ftp_folders,
+            self.connections.ftp(self.config),
+            self.ftp_server_folders_path,
+        )
+
+    def _local_path(self, ftp_path: str) -> Path:
+        ftp_folder, filename = ftp_path.rsplit("/", 1)
+        return (
+            Path(self.local_backup_path)
+            / THIES_BASE_FOLDER_NAME
+            / self._prefix(ftp_folder)
+            / filename
+        )
+
+    def _stream_file(
+        self, ftp: ftplib.FTP, ftp_path: str, buffer: StreamBuffer
+    ) -> None:
+        """
+        Write a file to the local backup while its chunks go to the buffer.
+
+        The file is written to a hidden part file next to the local copy, and
+        only replaces it once complete, so a failed download keeps the copy.
+        """
+        dest_path = self._local_path(ftp_path)
+        part_path = dest_path.with_name(f".{dest_path.name}.part")
+        dest_path.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            with part_path.open("wb") as local_file:
+
+                def on_chunk(chunk: bytes) -> None:
+                    local_file.write(chunk)
+                    buffer.put((ftp_path, chunk))
+
+                stream_ftp_file(
+                    ftp, ftp_path, on_chunk, ThiesSyncParams.STREAM_CHUNK_SIZE
+                )
+            part_path.replace(dest_path)
+        except BaseException:
+            part_path.unlink(missing_ok=True)
+            raise
+
+    def _download(self, ftp_paths: list[str], buffer: StreamBuffer) -> None:
+        """
+        Stream the files from the FTP server into the local backup and the buffer.
+
+        Every file ends with a None, or with its error, and the stream with a
+        single None. This is blocking and must run in an executor.
+        """
+        try:
+            with self.connections.ftp(self.config).connection() as ftp:
+                for ftp_path in ftp_paths:
+                    try:
+                        self._stream_file(ftp, ftp_path, buffer)
+                    except FileNotFoundError as error:
+                        buffer.put((ftp_path, error))
+                        continue
+                    except StreamClosedError:
+                        raise
+                    except Exception as error:
+                        buffer.put((ftp_path, error))
+                        raise
+                    buffer.put((ftp_path, None))
+        finally:
+            with suppress(StreamClosedError):
+                buffer.put(None)
+
+    def _sharepoint_folder(self, ftp_path: str) -> str:
+        ftp_folder = ftp_path.rsplit("/", 1)[0]
+        folder_path = self.sharepoint_folder_by_ftp_folder[ftp_folder]
+        return f"/sites/{self.config.sharepoint_site_name}/{folder_path}"
+
+    def _remote_url(self, ftp_path: str) -> str:
+        return f"{self._sharepoint_folder(ftp_path)}/{ftp_path.rsplit('/', 1)[1]}"
+
+    async def _async_spooled(self, item: dict) -> None:
+        """Record in the manifest a file uploaded by the spool."""
+        if not self.manifest.loaded:
+            await self.manifest.async_load()
+        self.manifest.files[item["key"]] = item["info"]
+        await self.manifest.async_save()
+
+    async def _async_upload(
+        self, buffer: StreamBuffer, pending: dict[str, dict]
+    ) -> tuple[dict[str, list[str]], dict[str, int]]:
+        """
+        Upload the files of the buffer as they are downloaded.
+
+        Every uploaded file is recorded in the manifest right away. Once
+        SharePoint is unreachable, the remaining files are only drained, so
+        the local backup still completes, and are queued in the spool.
+
+        :param buffer: Chunks of the downloaded files.
+        :param pending: Size and modification time of the files, by FTP path.
+        :return: The upload results and the size of every downloaded file.
+        """
+        self.logclient.method_name = "_async_upload"
+        upload_results: dict[str, list[str]] = {
+            "failed_files": [],
+            "new_files": [],
+            "spooled_files": [],
+        }
+        file_sizes: dict[str, int] = {}
+        client = self.connections.sharepoint(self.config)
+        unreachable: Exception | None = None
+        streamed: StreamedFile | None = None
+        while (item := await buffer.get()) is not None:
+            ftp_path, data = item
+            if streamed is None:
+                streamed = StreamedFile(
+                    SharepointStreamUpload(
+                        client,
+                        self._sharepoint_folder(ftp_path),
+                        ftp_path.rsplit("/", 1)[1],
+                    ),
+                    error=unreachable,
+                )
+            try:
+                if streamed.error is None:
+                    await streamed.async_feed(data)
+                elif isinstance(data, bytes):
+                    streamed.size += len(data)
+            except (ConnectionError, TimeoutError) as error:
+                streamed.error = error
+                if is_unreachable(error):
+                    unreachable = error
+                with suppress(ConnectionError, TimeoutError):
+                    await streamed.upload.async_cancel()
+            if isinstance(data, bytes):
+                continue
+            file_key = self._file_key(ftp_path)
+            if data is None:
+                file_sizes[ftp_path] = streamed.size
+            if streamed.error is None:
+                upload_results["new_files"].append(file_key)
+                self.manifest.files[ftp_path] = pending[ftp_path]
+                self.spool.discard(self._remote_url(ftp_path))
+            elif data is None and is_unreachable(streamed.error):
+                self.spool.enqueue(
+                    "thies",
+                    ftp_path,
+                    self._local_path(ftp_path),
+                    folder_url=self._sharepoint_folder(ftp_path),
+                    file_name=ftp_path.rsplit("/", 1)[1],
+                    info=pending[ftp_path],
+                )
+                upload_results["spooled_files"].append(file_key)
+            else:
+                self.logclient.warning(
+                    WarningArgs(
+                        status=LogStatus.FAILED,
+                        metadata={"msg": f"{file_key} could not be uploaded"},
+                    )
+                )
+                upload_results["failed_files"].append(
+                    f"{file_key} (Error: {streamed.error!s})"
+                )
+            streamed = None
+        if upload_results["new_files"]:
+            self.spool.wake()
+        return upload_results, file_sizes
+
+    async def _async_extract_daily_statistics(self, new_files: list[str]) -> None:
+        filename = datetime_to_str(today(), date_format=DAY_FORMAT) + ".BIN"
+        if not {f"AVG_{filename}", f"EXT_{filename}"} & set(new_files):
+            return
+        dest_path = Path(self.local_backup_path) / THIES_BASE_FOLDER_NAME
+        daily_files_exist = await self.hass.async_add_executor_job(
+            lambda: all((dest_path / p / filename).exists() for p in ("AVG", "EXT"))
+        )
+        if not daily_files_exist:
+            return
+        await create_thies_daily_statistics_file(
+            self.local_backup_path,
+            DirectoryClient(DirectoryClientArgs(client_name="os_client")),
+            GeneralParams.LOGGER,
+        )
+
+    async def async_execute(self) -> dict:
+        """
+        Synchronise the files that changed since the last run.
+
+        :return: A response with the same shape as `update_thies_data`.
+        """
+        self.logclient.method_name = "async_execute"
+        with self.timings.span("ftp_listing"):
+            listing = await self._async_list_ftp()
+        self.manifest.prune(listing)
+        # The files queued in the spool are already in the local backup.
+        pending = {
+            ftp_path: info
+            for ftp_path, info in self.manifest.pending(listing).items()
+            if not self.spool.contains(self._remote_url(ftp_path), info)
+        }
+        self.logclient.debug(
+            DebugArgs(
+                status=LogStatus.STARTED,
+                metadata={
+                    "msg": f"Listed files: {len(listing)}. Pending files: {len(pending)}"
+                },
+            )
+        )
+        if not pending:
+            await self.manifest.async_save()
+            return {
+                "message": "No files to upload",
+                "status": HTTPStatus.NO_CONTENT.value,
+                "metadata": {},
+            }
+        # The download and the upload overlap, so they share a single span.
+        buffer = StreamBuffer(
+            asyncio.get_running_loop(), ThiesSyncParams.STREAM_BUFFER_CHUNKS
+        )
+        with self.timings.span("ftp_to_sharepoint"):
+            download = self.hass.async_add_executor_job(
+                self._download, list(pending), buffer
+            )
+            try:
+                upload_results, file_sizes = await self._async_upload(buffer, pending)
+            except BaseException:
+                download.cancel()
+                raise
+            finally:
+                buffer.close()
+                # The uploads are recorded as they complete, so a failed run
+                # only transfers the files it did not upload again.
+                await self.manifest.async_save()
+            # The stream always ends, so this only raises the download error.
+            await download
+        with self.timings.span("daily_statistics"):
+            await self._async_extract_daily_statistics(
+                upload_results["new_files"] + upload_results["spooled_files"]
+            )
+
+        processed_date = datetime_to_str(today())
+        data = {
+            **upload_results,
+            "processed_files": {
+                self._file_key(ftp_path): {
+                    "file_size": file_size,
+                    "processed_date": processed_date,
+                }
+                for ftp_path, file_size in file_sizes.items()
+            },
+        }
+        if upload_results["failed_files"]:
+            return {
+                "message": "An error ocurred while uploading files to RCER Cloud",
+                "status": HTTPStatus.BAD_REQUEST.value,
+                "metadata": {
+                    "error": "Files failed to upload: "
+                    + ", ".join(upload_results["failed_files"]),
+                    "data": data,
+                },
+            }
+        if upload_results["spooled_files"]:
+            return {
+                "message": "Files were queued until SharePoint is reachable",
+                "status": HTTPStatus.ACCEPTED.value,
+                "metadata": {"data": data},
+            }
+        return {
+            "message": "THIES was synced successfully",
+            "status": HTTPStatus.OK.value,
+            "metadata": {"data": data},
+        }
+
+    async def async_reconcile(self, thies_service: Any) -> dict:
+        """
+        Run a full reconciliation against SharePoint and rebuild the manifest.
+
+        :param thies_service: The SAVIIA THIES API service.
+        :return: The `update_thies_data` response.
+        """
+        self.logclient.method_name = "async_reconcile"
+        # Listed before the reconciliation, so a file changing while it runs is
+        # still pending for the next incremental run.
+        with self.timings.span("ftp_listing"):
+            listing = await self._async_list_ftp()
+        with self.timings.span("full_reconciliation"):
+            response = await thies_service.update_thies_data(
+                sharepoint_folders_path=self.sharepoint_folders_path,
+                ftp_server_folders_path=self.ftp_server_folders_path,
+                local_backup_source_path=self.local_backup_path,
+            )
+        reconciled = response.get("status") in (
+            HTTPStatus.OK.value,
+            HTTPStatus.NO_CONTENT.value,
+        ) and not (response.get("metadata") or {}).get("error")
+        if reconciled:
+            # Every listed file is now both in SharePoint and in the local backup.
+            self.manifest.files = listing
+            await self.manifest.async_save()
+            self.logclient.debug(
+                DebugArgs(
+                    status=LogStatus.SUCCESSFUL,
+                    metadata={
+                        "msg": f"Manifest rebuilt with {len(self.manifest.files)} files"
+                    },
+                )
+            )
+        return response
@@ -0,0 +1,302 @@
+"""Persistent spool of the uploads waiting for SharePoint to be reachable."""
+
+import asyncio
+from contextlib import suppress
+from pathlib import Path
+from time import monotonic
+from typing import TYPE_CHECKING, Any
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.storage import Store
+from saviialib.libs.sharepoint_client import SpCreateFolderArgs
+
+from custom_components.saviia.helpers.sharepoint_utils import (
+    SharepointSession,
+    SharepointStreamUpload,
+    is_unreachable,
+)
+from custom_components.saviia.libs.log_client import (
+    DebugArgs,
+    LogClient,
+    LogClientArgs,
+    LogStatus,
+    WarningArgs,
+)
+
+from .connection_pool import get_connection_pool
+from .const import SpoolParams, StorageParams
+from .scheduler import UplinkScheduler
+
+if TYPE_CHECKING:
+    from collections.abc import Awaitable, Callable
+
+
+def _spool_store(hass: HomeAssistant, entry_id: str) -> Store[dict[str, dict]]:
+    return Store(
+        hass,
+        StorageParams.STORAGE_VERSION,
+        StorageParams.UPLOAD_SPOOL_KEY.format(entry_id=entry_id),
+    )
+
+
+async def async_remove_spool(hass: HomeAssistant, entry_id: str) -> None:
+    """Remove the queued uploads of a config entry."""
+    await _spool_store(hass, entry_id).async_remove()
+
+
+def _read_chunk(path: Path, offset: int, size: int) -> bytes:
+    with path.open("rb") as file:
+        file.seek(offset)
+        return file.read(size)
+
+
+class UploadSpool:
+    """
+    Uploads that failed while SharePoint was unreachable, per config entry.
+
+    The files stay in the local backup, and every item only keeps where the
+    file goes and what its producer must record once it is uploaded. Items
+    are keyed by their SharePoint URL, so a newer version of a file replaces
+    the queued one. The spool drains in the background, spacing the uploads
+    by `DRAIN_RATE` and holding the uplink lock one file at a time. While
+    SharePoint is still unreachable it backs off exponentially, and a
+    successful upload of a coordinator wakes it up right away.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        entry_id: str,
+        config: Any,
+        scheduler: UplinkScheduler,
+    ) -> None:
+        self.hass = hass
+        self.entry_id = entry_id
+        self.config = config
+        self.scheduler = scheduler
+        self._store = _spool_store(hass, entry_id)
+        self.items: dict[str, dict] = {}
+        # Called with every item before its upload, keyed by the kind of the item.
+        self.preparers: dict[str, Callable[[dict], Awaitable[None]]] = {}
+        # Called with every uploaded item, keyed by the kind of the item.
+        self.handlers: dict[str, Callable[[dict], Awaitable[None]]] = {}
+        self.loaded = False
+        # Consecutive drains stopped by an unreachable SharePoint.
+        self.failures = 0
+        self._wake = asyncio.Event()
+        self._task: asyncio.Task | None = None
+        self.logclient = LogClient(
+            LogClientArgs(
+                client_name="logging",
+                service_name="upload_spool",
+                class_name="upload_spool",
+            )
+        )
+
+    def _data_to_save(self) -> dict[str, dict]:
+        return {"items": self.items}
+
+    def _delay_save(self) -> None:
+        self._store.async_delay_save(self._data_to_save, SpoolParams.SAVE_DELAY)
+
+    async def async_load(self) -> None:
+        data = await self._store.async_load() or {}
+        self.items = data.get("items", {})
+        self.loaded = True
+
+    async def async_start(self) -> None:
+        """Load the spool and drain the items left by a previous run."""
+        if not self.loaded:
+            await self.async_load()
+        if self.items and self._task is None:
+            self._start_drain()
+
+    async def async_stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            with suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+        await self._store.async_save(self._data_to_save())
+
+    def contains(self, remote_url: str, info: dict) -> bool:
+        """Return whether a file is queued, unless it has changed since."""
+        item = self.items.get(remote_url)
+        return item is not None and item["info"] == info
+
+    def enqueue(  # noqa: PLR0913
+        self,
+        kind: str,
+        key: str,
+        local_path: str | Path,
+        *,
+        folder_url: str,
+        file_name: str,
+        info: dict,
+    ) -> None:
+        """
+        Queue the upload of a file of the local backup.
+
+        :param kind: Kind of the item, selecting the handler called once uploaded.
+        :param key: Key of the file for its handler.
+        :param local_path: Path of the file in the local backup.
+        :param folder_url: Server relative URL of the SharePoint folder.
+        :param file_name: Name of the file in SharePoint.
+        :param info: Size and modification time of the file, for its handler.
+        """
+        self.items[f"{folder_url}/{file_name}"] = {
+            "kind": kind,
+            "key": key,
+            "local_path": str(local_path),
+            "folder_url": folder_url,
+            "file_name": file_name,
+            "info": info,
+            "attempts": 0,
+        }
+        self._delay_save()
+        if self._task is None:
+            # SharePoint was just found unreachable, so the drain backs off.
+            self.failures = max(self.failures, 1)
+            self._start_drain()
+
+    def discard(self, remote_url: str) -> None:
+        """Forget a queued file, after it was uploaded by other means."""
+        if self.items.pop(remote_url, None) is not None:
+            self._delay_save()
+
+    def wake(self) -> None:
+        """Drain the spool now, as SharePoint is reachable again."""
+        self.failures = 0
+        self._wake.set()
+
+    def diagnostics(self) -> dict:
+        return {
+            "pending_uploads": len(self.items),
+            "draining": self._task is not None,
+            "failures": self.failures,
+        }
+
+    def _start_drain(self) -> None:
+        self._task = self.hass.async_create_background_task(
+            self._async_drain(), name=f"saviia_upload_spool_{self.entry_id}"
+        )
+
+    def _backoff(self) -> float:
+        delay = SpoolParams.BACKOFF * 2 ** (max(self.failures, 1) - 1)
+        return min(delay, SpoolParams.MAX_BACKOFF).total_seconds()
+
+    async def _async_drain(self) -> None:
+        self.logclient.method_name = "_async_drain"
+        client = get_connection_pool(self.hass).sharepoint(self.config)
+        first = True
+        try:
+            while self.items:
+                # Later passes only retry the uploads rejected by SharePoint.
+                if self.failures or not first:
+                    self._wake.clear()
+                    with suppress(TimeoutError):
+                        await asyncio.wait_for(self._wake.wait(), self._backoff())
+                first = False
+                reached = await self._async_drain_once(client)
+                self.failures = 0 if reached else self.failures + 1
+        finally:
+            self._task = None
+        self.logclient.debug(
+            DebugArgs(status=LogStatus.SUCCESSFUL, metadata={"msg": "Spool drained"})
+        )
+
+    async def _async_drain_once(self, client: SharepointSession) -> bool:
+        """Upload the queued files. Return False if SharePoint is unreachable."""
+        folders: set[str] = set()
+        next_upload = monotonic()
+        for remote_url, item in list(self.items.items()):
+            await asyncio.sleep(max(0.0, next_upload - monotonic()))
+            next_upload = monotonic() + 1 / SpoolParams.DRAIN_RATE
+            if self.items.get(remote_url) is not item:
+                # Replaced by a newer version, or uploaded by a coordinator.
+                continue
+            try:
+                preparer = self.preparers.get(item["kind"])
+                if preparer is not None:
+                    await preparer(item)
+                async with self.scheduler.lock:
+                    if item["folder_url"] not in folders:
+                        await client.create_folder(
+                            SpCreateFolderArgs(folder_relative_url=item["folder_url"])
+                        )
+                        folders.add(item["folder_url"])
+                    await self._async_upload(client, item)
+            except (ConnectionError, TimeoutError) as error:
+                if is_unreachable(error):
+                    return False
+                item["attempts"] += 1
+                if item["attempts"] < SpoolParams.MAX_ATTEMPTS:
+                    continue
+                self._drop(remote_url, item, error)
+                continue
+            except OSError as error:
+                # The file left the local backup, its producer will find it again.
+                self._drop(remote_url, item, error)
+                continue
+            await self._async_handle(remote_url, item)
+            if self.items.get(remote_url) is item:
+                del self.items[remote_url]
+            self._delay_save()
+        return True
+
+    async def _async_handle(self, remote_url: str, item: dict) -> None:
+        """Run the handler of an uploaded item, without ending the drain."""
+        handler = self.handlers.get(item["kind"])
+        if handler is None:
+            return
+        try:
+            await handler(item)
+        except Exception as error:  # noqa: BLE001
+            self.logclient.warning(
+                WarningArgs(
+                    status=LogStatus.FAILED,
+                    metadata={
+                        "msg": f"{remote_url} was uploaded but not recorded: {error}"
+                    },
+                )
+            )
+
+    def _drop(self, remote_url: str, item: dict, error: Exception) -> None:
+        self.logclient.warning(
+            WarningArgs(
+                status=LogStatus.FAILED,
+                metadata={"msg": f"{remote_url} dropped from the spool: {error}"},
+            )
+        )
+        if self.items.get(remote_url) is item:
+            del self.items[remote_url]
+        self._delay_save()
+
+    async def _async_send(
+        self, upload: SharepointStreamUpload, path: Path, size: int
+    ) -> None:
+        offset = 0
+        while True:
+            chunk = await self.hass.async_add_executor_job(
+                _read_chunk, path, offset, SpoolParams.CHUNK_SIZE
+            )
+            offset += len(chunk)
+            last = offset >= size
+            if not chunk and not last:
+                msg = f"{path} changed during the upload"
+                raise OSError(msg)
+            await upload.async_write(chunk, last=last)
+            if last:
+                return
+
+    async def _async_upload(self, client: SharepointSession, item: dict) -> None:
+        path = Path(item["local_path"])
+        size = (await self.hass.async_add_executor_job(path.stat)).st_size
+        upload = SharepointStreamUpload(client, item["folder_url"], item["file_name"])
+        try:
+            await self._async_send(upload, path, size)
+        except Exception:
+            # Drop the part file, so a dropped item leaves no partial upload.
+            with suppress(ConnectionError, TimeoutError):
+                await upload.async_cancel()
+            raise
@@ -0,0 +1,89 @@
+from collections.abc import Callable
+
+import pytest
+
+from custom_components.saviia import backup_journal
+from custom_components.saviia.backup_journal import BackupJournal
+
+SESSION = {"upload_id": "guid", "size": 30, "mtime": 1.5}
+
+
+class MemoryStore:
+    """Store kept in memory and shared by every journal of the same key."""
+
+    data: dict[str, dict] = {}
+
+    def __init__(self, _hass: object, _version: int, key: str) -> None:
+        self.key = key
+
+    async def async_load(self) -> dict | None:
+        return self.data.get(self.key)
+
+    async def async_save(self, data: dict) -> None:
+        self.data[self.key] = data
+
+    async def async_remove(self) -> None:
+        self.data.pop(self.key, None)
+
+    def async_delay_save(self, data_func: Callable[[], dict], _delay: float) -> None:
+        self.data[self.key] = data_func()
+
+
+@pytest.fixture(autouse=True)
+def memory_store(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(MemoryStore, "data", {})
+    monkeypatch.setattr(backup_journal, "Store", MemoryStore)
+
+
+async def _reloaded(entry_id: str = "entry") -> BackupJournal:
+    journal = BackupJournal(None, entry_id)
+    await journal.async_load()
+    return journal
+
+
+@pytest.mark.asyncio
+async def test_resume_from_checkpoint() -> None:
+    journal = await _reloaded()
+    await journal.async_checkpoint("a/b.dat", SESSION, 10)
+
+    journal = await _reloaded()
+    assert journal.loaded
+    assert journal.get_session("a/b.dat", 30, 1.5) == {**SESSION, "offset": 10}
+    assert journal.get_session("a/b.dat", 31, 1.5) is None
+    assert journal.get_session("a/b.dat", 30, 2.0) is None
+
+
+@pytest.mark.asyncio
+async def test_uploaded_files_are_skipped_until_changed() -> None:
+    journal = await _reloaded()
+    await journal.async_checkpoint("a/b.dat", SESSION, 10)
+    journal.mark_uploaded("a/b.dat", 30, 1.5)
+
+    journal = await _reloaded()
+    assert journal.is_uploaded("a/b.dat", 30, 1.5)
+    assert not journal.is_uploaded("a/b.dat", 30, 2.0)
+    assert journal.get_session("a/b.dat", 30, 1.5) is None
+
+
+@pytest.mark.asyncio
+async def test_discard_and_clear() -> None:
+    journal = await _reloaded()
+    await journal.async_checkpoint("a/b.dat", SESSION, 10)
+    await journal.async_discard_session("a/b.dat")
+    assert (await _reloaded()).sessions == {}
+
+    journal.mark_uploaded("a/c.dat", 5, 1.0)
+    await journal.async_clear()
+    journal = await _reloaded()
+    assert journal.files == {}
+    assert journal.sessions == {}
+
+
+@pytest.mark.asyncio
+async def test_journals_are_kept_per_entry() -> None:
+    journal = await _reloaded("first")
+    await journal.async_checkpoint("a/b.dat", SESSION, 10)
+
+    assert (await _reloaded("second")).sessions == {}
+    await journal.async_remove()
+    assert (await _reloaded("first")).sessions == {}
@@ -0,0 +1,64 @@
+import pytest
+
+from custom_components.saviia.instrumentation import RunStats, StageTimings
+
+
+def test_summary_reports_nearest_rank_percentiles() -> None:
+    timings = StageTimings()
+    for duration in (5.0, 1.0, 4.0, 2.0, 3.0):
+        timings.record("upload", duration)
+    assert timings.summary()["upload"] == {
+        "count": 5,
+        "last": 3.0,
+        "p50": 3.0,
+        "p95": 5.0,
+        "max": 5.0,
+    }
+
+
+def test_percentiles_of_a_hundred_samples() -> None:
+    timings = StageTimings(window=100)
+    for duration in range(100, 0, -1):
+        timings.record("hashing", float(duration))
+    summary = timings.summary()["hashing"]
+    assert summary["p50"] == 50.0
+    assert summary["p95"] == 95.0
+    assert summary["max"] == 100.0
+
+
+def test_single_sample() -> None:
+    timings = StageTimings()
+    timings.record("total", 0.1234)
+    assert timings.summary()["total"] == {
+        "count": 1,
+        "last": 0.123,
+        "p50": 0.123,
+        "p95": 0.123,
+        "max": 0.123,
+    }
+
+
+def test_window_keeps_the_latest_samples() -> None:
+    timings = StageTimings(window=3)
+    for duration in (10.0, 1.0, 2.0, 3.0):
+        timings.record("listing", duration)
+    summary = timings.summary()["listing"]
+    assert summary["count"] == 3
+    assert summary["max"] == 3.0
+    assert timings.last("listing") == 3.0
+    assert timings.last("unknown") is None
+
+
+def test_span_records_its_duration_on_errors() -> None:
+    timings = StageTimings()
+    with pytest.raises(ConnectionError), timings.span("download"):
+        raise ConnectionError
+    assert timings.summary()["download"]["count"] == 1
+
+
+def test_run_stats_rates() -> None:
+    stats = RunStats(duration=4.0, files_transferred=6, files_failed=2)
+    assert stats.files_per_second == 1.5
+    assert stats.error_rate == 25.0
+    assert RunStats(duration=0).files_per_second == 0.0
+    assert RunStats(duration=1.0, failed=True).error_rate == 100.0
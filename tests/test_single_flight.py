@@ -0,0 +1,106 @@
+import asyncio
+
+import pytest
+
+from custom_components.saviia.helpers.single_flight import SingleFlight, call_key
+
+
+class Operation:
+    """Operation counting its runs, blocked until released."""
+
+    def __init__(self, result: dict | None = None) -> None:
+        self.result = result if result is not None else {"status": 200}
+        self.runs = 0
+        self.release = asyncio.Event()
+        self.release.set()
+
+    async def __call__(self) -> dict:
+        self.runs += 1
+        await self.release.wait()
+        return self.result
+
+
+def test_call_key_ignores_the_order_of_the_data() -> None:
+    assert call_key("get_tasks", {"a": 1, "b": 2}) == call_key(
+        "get_tasks", {"b": 2, "a": 1}
+    )
+    assert call_key("get_tasks", {"a": 1}) != call_key("get_tasks", {"a": 2})
+
+
+@pytest.mark.asyncio
+async def test_concurrent_calls_share_one_execution() -> None:
+    single_flight = SingleFlight()
+    operation = Operation()
+    operation.release.clear()
+    calls = [
+        asyncio.ensure_future(single_flight.run("key", operation)) for _ in range(3)
+    ]
+    await asyncio.sleep(0)
+    operation.release.set()
+    assert await asyncio.gather(*calls) == [operation.result] * 3
+    assert operation.runs == 1
+
+
+@pytest.mark.asyncio
+async def test_results_are_reused_until_invalidated() -> None:
+    single_flight = SingleFlight()
+    tasks = Operation()
+    other = Operation()
+    await single_flight.run(("get_tasks", "1"), tasks, ttl=60)
+    await single_flight.run(("get_config_value", "1"), other, ttl=60)
+    await single_flight.run(("get_tasks", "1"), tasks, ttl=60)
+    assert tasks.runs == 1
+
+    single_flight.invalidate(lambda key: key[0] == "get_tasks")
+    await single_flight.run(("get_tasks", "1"), tasks, ttl=60)
+    await single_flight.run(("get_config_value", "1"), other, ttl=60)
+    assert tasks.runs == 2
+    assert other.runs == 1
+
+
+@pytest.mark.asyncio
+async def test_invalidation_detaches_running_operations() -> None:
+    single_flight = SingleFlight()
+    stale = Operation({"status": 200, "tasks": ["old"]})
+    stale.release.clear()
+    stale_call = asyncio.ensure_future(single_flight.run("key", stale, ttl=60))
+    await asyncio.sleep(0)
+
+    single_flight.invalidate(lambda _key: True)
+    fresh = Operation({"status": 200, "tasks": ["new"]})
+    assert await single_flight.run("key", fresh, ttl=60) == fresh.result
+    stale.release.set()
+    assert await stale_call == stale.result
+
+    # The stale result finished after the invalidation, so it is not cached.
+    assert await single_flight.run("key", Operation(), ttl=60) == fresh.result
+    assert fresh.runs == 1
+
+
+@pytest.mark.asyncio
+async def test_results_rejected_by_cache_if_are_not_reused() -> None:
+    single_flight = SingleFlight()
+    failed = Operation({"status": 500})
+
+    def is_ok(result: dict) -> bool:
+        return result["status"] == 200
+
+    await single_flight.run("key", failed, ttl=60, cache_if=is_ok)
+    await single_flight.run("key", failed, ttl=60, cache_if=is_ok)
+    assert failed.runs == 2
+
+
+@pytest.mark.asyncio
+async def test_failed_operations_are_not_cached() -> None:
+    single_flight = SingleFlight()
+    runs = 0
+
+    async def failing() -> None:
+        nonlocal runs
+        runs += 1
+        raise ConnectionError
+
+    for _ in range(2):
+        with pytest.raises(ConnectionError):
+            await single_flight.run("key", failing, ttl=60)
+    assert runs == 2
@@ -0,0 +1,95 @@
+import struct
+from datetime import UTC, datetime
+from pathlib import Path
+
+import numpy as np
+import pytest
+from saviialib.services.thies.use_cases.components.thies_bp import THIESDayData
+
+from custom_components.saviia.helpers.thies_binfile import (
+    PARAMETER_SIZE,
+    read_binfile,
+    read_descfile,
+)
+
+NAMES = ["Pressure", "Humidity", "AirTemperature"]
+VALUES = [
+    (1013.25, 0, 45.04, 0, -3.75, 0),
+    (1012.96, 0, 47.5, 1, -2.45, 0),
+    (1011.0, 2, 52.15, 0, 0.05, 0),
+    (1010.55, 0, 58.0, 0, 1.35, 0),
+]
+
+
+def _timestamp(moment: datetime) -> bytes:
+    packed = (
+        (moment.year - 2000) << 26
+        | moment.month << 22
+        | moment.day << 17
+        | moment.hour << 12
+        | moment.minute << 6
+        | moment.second
+    )
+    return struct.pack("<I", packed)
+
+
+def _write_fixture(root: Path, datatype: str) -> tuple[Path, Path]:
+    """Write a DESCFILE.INI and a binfile of four records, every 10 minutes."""
+    inipath = root / "DESCFILE.INI"
+    inipath.write_text(
+        "".join(
+            f"[{index}]\nname = {name}\nsize = {PARAMETER_SIZE[datatype]}\n\n"
+            for index, name in enumerate(NAMES, 1)
+        )
+    )
+    content = bytearray()
+    for row, values in enumerate(VALUES):
+        moment = datetime(2026, 3, 14, 23, row * 10, tzinfo=UTC)
+        content += _timestamp(moment)
+        for value, status in zip(values[::2], values[1::2], strict=True):
+            content += bytes([status]) + struct.pack("<f", value)
+            if datatype == "ex":
+                content += _timestamp(moment)
+    binpath = root / "20260314.BIN"
+    binpath.write_bytes(content)
+    return binpath, inipath
+
+
+@pytest.mark.parametrize("datatype", ["av", "ex"])
+def test_read_binfile_matches_saviialib(tmp_path: Path, datatype: str) -> None:
+    binpath, inipath = _write_fixture(tmp_path, datatype)
+    records = read_binfile(binpath, read_descfile(inipath), datatype)
+
+    expected = THIESDayData(datatype)
+    expected.read_binfile(str(binpath), str(inipath))
+
+    assert records.names == NAMES
+    assert len(records.dates) == expected.nrows == len(VALUES)
+    assert [
+        f"{date // 10000}/{date // 100 % 100:02}/{date % 100:02}"
+        for date in records.dates
+    ] == ["2026/03/14"] * len(VALUES)
+    assert [f"{minute // 60:02}:{minute % 60:02}" for minute in records.minutes] == [
+        "23:00",
+        "23:10",
+        "23:20",
+        "23:30",
+    ]
+    expected_values = expected.dataDF[NAMES].to_numpy(dtype=float, na_value=np.nan)
+    np.testing.assert_array_equal(records.values, expected_values)
+
+
+def test_values_with_a_status_are_missing(tmp_path: Path) -> None:
+    binpath, inipath = _write_fixture(tmp_path, "av")
+    records = read_binfile(binpath, read_descfile(inipath), "av")
+    assert np.isnan(records.values[1, 1])
+    assert np.isnan(records.values[2, 0])
+    assert records.values[0].tolist() == [1013.2, 45.0, -3.8]
+
+
+def test_empty_binfile(tmp_path: Path) -> None:
+    binpath = tmp_path / "20260314.BIN"
+    binpath.write_bytes(b"")
+    records = read_binfile(binpath, NAMES, "av")
+    assert records.values.shape == (0, len(NAMES))
+    assert len(records.dates) == len(records.minutes) == 0
@@ -0,0 +1,172 @@
+import asyncio
+from collections.abc import Callable
+
+import pytest
+from aiohttp import ClientResponseError
+
+from custom_components.saviia import upload_spool
+from custom_components.saviia.const import SpoolParams
+from custom_components.saviia.upload_spool import UploadSpool
+
+
+class MemoryStore:
+    def __init__(self, _hass: object, _version: int, _key: str) -> None:
+        self.data: dict | None = None
+
+    async def async_load(self) -> dict | None:
+        return self.data
+
+    async def async_save(self, data: dict) -> None:
+        self.data = data
+
+    def async_delay_save(self, data_func: Callable[[], dict], _delay: float) -> None:
+        self.data = data_func()
+
+
+class Scheduler:
+    def __init__(self) -> None:
+        self.lock = asyncio.Lock()
+
+
+class Client:
+    def __init__(self) -> None:
+        self.folders: list[str] = []
+
+    async def create_folder(self, args: object) -> None:
+        self.folders.append(args.folder_relative_url)
+
+
+def _rejected() -> ConnectionError:
+    error = ConnectionError("rejected")
+    error.__cause__ = ClientResponseError(None, (), status=400)
+    return error
+
+
+@pytest.fixture
+def spool(monkeypatch: pytest.MonkeyPatch) -> UploadSpool:
+    monkeypatch.setattr(upload_spool, "Store", MemoryStore)
+    monkeypatch.setattr(SpoolParams, "DRAIN_RATE", 1e6)
+    spool = UploadSpool(None, "entry", None, Scheduler())
+    spool.uploads = []
+    spool.errors = {}
+
+    async def upload(_client: Client, item: dict) -> None:
+        error = spool.errors.get(item["file_name"])
+        if error is not None:
+            raise error
+        spool.uploads.append(item["file_name"])
+
+    monkeypatch.setattr(spool, "_async_upload", upload)
+    monkeypatch.setattr(spool, "_start_drain", lambda: None)
+    return spool
+
+
+def _enqueue(spool: UploadSpool, file_name: str, folder_url: str = "/a") -> None:
+    spool.enqueue(
+        "backup",
+        file_name,
+        f"/backup/{file_name}",
+        folder_url=folder_url,
+        file_name=file_name,
+        info={"size": 1, "mtime": 1.0},
+    )
+
+
+def test_backoff_doubles_up_to_the_maximum(spool: UploadSpool) -> None:
+    delays = []
+    for failures in range(8):
+        spool.failures = failures
+        delays.append(spool._backoff())
+    assert delays == [60, 60, 120, 240, 480, 960, 1800, 1800]
+
+
+def test_enqueue_replaces_the_queued_version(spool: UploadSpool) -> None:
+    _enqueue(spool, "b.dat")
+    assert spool.failures == 1
+    spool.items["/a/b.dat"]["attempts"] = 3
+    spool.enqueue(
+        "backup",
+        "b.dat",
+        "/backup/b.dat",
+        folder_url="/a",
+        file_name="b.dat",
+        info={"size": 2, "mtime": 2.0},
+    )
+    assert spool.contains("/a/b.dat", {"size": 2, "mtime": 2.0})
+    assert not spool.contains("/a/b.dat", {"size": 1, "mtime": 1.0})
+    assert spool.items["/a/b.dat"]["attempts"] == 0
+
+
+@pytest.mark.asyncio
+async def test_drain_uploads_and_records_the_items(spool: UploadSpool) -> None:
+    handled = []
+
+    async def handler(item: dict) -> None:
+        handled.append(item["key"])
+
+    spool.handlers["backup"] = handler
+    _enqueue(spool, "b.dat")
+    _enqueue(spool, "c.dat")
+    _enqueue(spool, "d.dat", folder_url="/e")
+    client = Client()
+
+    assert await spool._async_drain_once(client)
+    assert spool.uploads == ["b.dat", "c.dat", "d.dat"]
+    assert handled == ["b.dat", "c.dat", "d.dat"]
+    assert client.folders == ["/a", "/e"]
+    assert spool.items == {}
+    assert spool._store.data == {"items": {}}
+
+
+@pytest.mark.asyncio
+async def test_unreachable_sharepoint_stops_the_drain(spool: UploadSpool) -> None:
+    _enqueue(spool, "b.dat")
+    _enqueue(spool, "c.dat")
+    spool.errors["b.dat"] = TimeoutError()
+
+    assert not await spool._async_drain_once(Client())
+    assert spool.uploads == []
+    assert list(spool.items) == ["/a/b.dat", "/a/c.dat"]
+    assert spool.items["/a/b.dat"]["attempts"] == 0
+
+
+@pytest.mark.asyncio
+async def test_rejected_upload_is_dropped_after_max_attempts(
+    spool: UploadSpool,
+) -> None:
+    _enqueue(spool, "b.dat")
+    _enqueue(spool, "c.dat")
+    spool.errors["b.dat"] = _rejected()
+
+    for attempt in range(1, SpoolParams.MAX_ATTEMPTS):
+        assert await spool._async_drain_once(Client())
+        assert spool.items["/a/b.dat"]["attempts"] == attempt
+    assert spool.uploads == ["c.dat"]
+
+    assert await spool._async_drain_once(Client())
+    assert spool.items == {}
+
+
+@pytest.mark.asyncio
+async def test_missing_file_is_dropped(spool: UploadSpool) -> None:
+    _enqueue(spool, "b.dat")
+    spool.errors["b.dat"] = FileNotFoundError("/backup/b.dat")
+
+    assert await spool._async_drain_once(Client())
+    assert spool.items == {}
+
+
+@pytest.mark.asyncio
+async def test_failed_handler_does_not_stop_the_drain(spool: UploadSpool) -> None:
+    async def handler(item: dict) -> None:
+        if item["key"] == "b.dat":
+            msg = "boom"
+            raise RuntimeError(msg)
+
+    spool.handlers["backup"] = handler
+    _enqueue(spool, "b.dat")
+    _enqueue(spool, "c.dat")
+
+    assert await spool._async_drain_once(Client())
+    assert spool.uploads == ["b.dat", "c.dat"]
+    assert spool.items == {}